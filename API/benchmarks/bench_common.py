@@ -0,0 +1,71 @@
+"""
+Shared helpers for the JSON-reporting benchmarks (bench_micro.py, bench_http.py)
+Latency summaries and the run metadata that makes results comparable
+across commits (see compare_results.py)
+"""
+
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+from importlib import metadata
+
+import numpy as np
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Distributions whose versions are recorded with each run
+TRACKED_PACKAGES = ('numpy', 'pandas', 'faiss-cpu', 'torch', 'sentence-transformers', 'onnxruntime',
+                    'fastapi', 'uvicorn')
+
+
+def latency_summary(latencies_ms) -> dict:
+    """Count, mean and p50/p95/p99 of latencies in milliseconds"""
+    latencies = np.asarray(latencies_ms, dtype='float64')
+    if len(latencies) == 0:
+        return {'count': 0}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'count': int(len(latencies)),
+        'mean_ms': round(float(latencies.mean()), 4),
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'max_ms': round(float(latencies.max()), 4)
+    }
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(['git', *args], cwd=API_DIR, capture_output=True, text=True,
+                              timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def run_metadata(args=None) -> dict:
+    """Commit, host and package versions of the current run, plus its arguments"""
+    versions = {}
+    for package in TRACKED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            pass
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': _git('rev-parse', 'HEAD') or None,
+        'git_dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': versions,
+        'args': vars(args) if args is not None else {}
+    }
+
+
+def write_results(results: dict, path: str):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {path}")
@@ -0,0 +1,90 @@
+"""
+Query encoder backend benchmark
+Reports single-query p50/p99 latency and cosine parity against the
+reference embeddings in legal_search_model.pkl for each encoder backend.
+
+Queries are article labels from penal.csv, one encode call per query as in
+the API. ONNX backends need `python export_encoder.py --quantize` first.
+
+Usage (from the API directory):
+    python benchmarks/bench_encoder.py --backends torch torch-int8 onnx onnx-int8 --threads 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from encoder_backends import ENCODER_BACKENDS, load_encoder, parity_check  # noqa: E402
+
+
+def time_queries(encoder, queries, warmup: int = 5):
+    """Encode one query at a time and return latencies in ms"""
+    for query in queries[:warmup]:
+        encoder.encode([query], normalize_embeddings=True)
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        encoder.encode([query], batch_size=1, normalize_embeddings=True)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query encoder backends")
+    parser.add_argument('--backends', nargs='+', choices=ENCODER_BACKENDS, default=['torch', 'torch-int8'])
+    parser.add_argument('--model-name', default='paraphrase-multilingual-mpnet-base-v2')
+    parser.add_argument('--encoder-dir', default='encoder_onnx')
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--csv', default='penal.csv')
+    parser.add_argument('--model-path', default='legal_search_model.pkl')
+    parser.add_argument('--parity-sample', type=int, default=100, help="Articles for the parity check (0 skips it)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    labels = pd.read_csv(args.csv)['article_label'].dropna().tolist()
+    rng = np.random.default_rng(args.seed)
+    queries = [labels[i] for i in rng.integers(0, len(labels), args.queries)]
+
+    print("=" * 80)
+    print(f"Encoder backend benchmark ({args.queries} queries, threads={args.threads or 'default'})")
+    print("=" * 80)
+
+    results = []
+    for backend in args.backends:
+        start = time.perf_counter()
+        encoder = load_encoder(args.model_name, backend, args.encoder_dir, args.threads)
+        load_s = time.perf_counter() - start
+
+        latencies = time_queries(encoder, queries)
+        result = {
+            'backend': backend,
+            'threads': args.threads,
+            'load_s': round(load_s, 3),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+            'p99_ms': round(float(np.percentile(latencies, 99)), 3)
+        }
+        if args.parity_sample:
+            result['parity'] = parity_check(encoder, args.model_path, sample=args.parity_sample, seed=args.seed)
+        results.append(result)
+
+        parity = result.get('parity')
+        print(f"{backend:<11} p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms load={load_s:.1f}s"
+              + (f" cosine mean={parity['mean_cosine']:.5f} min={parity['min_cosine']:.5f}" if parity else ""))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
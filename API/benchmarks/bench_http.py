@@ -0,0 +1,221 @@
+"""
+Concurrent HTTP load generator for the search API
+Starts the app locally with uvicorn (or targets --url), waits for
+/health/ready, then drives one endpoint with N concurrent keep-alive
+clients per concurrency level and reports throughput and p50/p95/p99.
+
+Queries come from benchmarks/queries.json. A locally started app runs with
+its query caches disabled (unless --cached) so repeated queries measure the
+full pipeline; other settings are passed with --env KEY=VALUE.
+
+Usage (from the API directory):
+    python benchmarks/bench_http.py --scenario search --concurrency 1 4 16 --duration 15 \\
+        --env INFERENCE_WORKERS=2 --output results/http-$(git rev-parse --short HEAD).json
+"""
+
+import argparse
+import collections
+import http.client
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_common import API_DIR, latency_summary, run_metadata, write_results  # noqa: E402
+from query_set import DEFAULT_QUERY_SET, load_query_set  # noqa: E402
+
+SCENARIOS = ('search', 'search-hybrid', 'search-lexical', 'cross-lingual', 'translations', 'article-number')
+LANGUAGES = ('rw', 'en', 'fr')
+
+
+def build_requests(scenario: str, queries: list, top_k: int) -> list:
+    """(method, path, JSON body or None) per query for a scenario"""
+    if scenario == 'translations':
+        return [('GET', f"/article/{query['article_id']}/translations", None) for query in queries]
+    if scenario == 'cross-lingual':
+        return [('POST', '/search/cross-lingual', {
+            'query': query['query'],
+            'target_language': LANGUAGES[(LANGUAGES.index(query['language']) + 1) % len(LANGUAGES)]
+        }) for query in queries]
+    mode = {'search-hybrid': 'hybrid', 'search-lexical': 'lexical'}.get(scenario, 'semantic')
+    if scenario == 'article-number':
+        mode = 'lexical'
+    return [('POST', '/search', {'query': query['query'], 'top_k': top_k, 'mode': mode}) for query in queries]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_app(port: int, env: dict, log_path: str) -> subprocess.Popen:
+    """Start legal_search_api:app under uvicorn in a child process"""
+    log = open(log_path, 'w')
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'legal_search_api:app', '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning'],
+        cwd=API_DIR, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+def wait_ready(host: str, port: int, timeout: float, process: subprocess.Popen = None):
+    """Poll /health/ready until it answers 200"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"App exited during startup (code {process.returncode})")
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=5)
+            connection.request('GET', '/health/ready')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(1)
+    raise TimeoutError(f"App not ready after {timeout:.0f}s")
+
+
+def run_level(host: str, port: int, requests: list, concurrency: int, duration: float, warmup: float) -> dict:
+    """
+    Drive the app with concurrent keep-alive clients for a while
+
+    Each client thread sends its next request as soon as the previous one
+    completes (closed loop), so throughput is bounded by server latency.
+
+    Returns:
+        Throughput, status counts and latency summary of the measured window
+    """
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies = []
+    statuses = collections.Counter()
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    def client():
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+        local_latencies = []
+        local_statuses = collections.Counter()
+        while True:
+            sent = time.perf_counter()
+            if sent >= deadline:
+                break
+            method, path, body = requests[next(counter) % len(requests)]
+            try:
+                if body is None:
+                    connection.request(method, path)
+                else:
+                    connection.request(method, path, body=json.dumps(body),
+                                       headers={'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=60)
+                status = 'error'
+            if sent >= measure_from:
+                local_statuses[status] += 1
+                if status == 200:
+                    local_latencies.append((time.perf_counter() - sent) * 1000)
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            statuses.update(local_statuses)
+
+    threads = [threading.Thread(target=client, name=f'client-{i}') for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Requests in flight at the deadline finish late; count the window they actually took
+    elapsed = max(time.perf_counter() - measure_from, 1e-9)
+    total = sum(statuses.values())
+    return {
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 3),
+        'requests': total,
+        'throughput_rps': round(statuses[200] / elapsed, 2),
+        'error_rate': round(1 - statuses[200] / total, 4) if total else None,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'latency': latency_summary(latencies)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the search API over HTTP")
+    parser.add_argument('--url', help="Target a running server instead of starting one (e.g. http://127.0.0.1:8000)")
+    parser.add_argument('--scenario', choices=SCENARIOS, default='search')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--duration', type=float, default=10.0, help="Measured seconds per concurrency level")
+    parser.add_argument('--warmup', type=float, default=2.0, help="Unmeasured seconds before each level")
+    parser.add_argument('--query-set', default=DEFAULT_QUERY_SET)
+    parser.add_argument('--queries', type=int, default=None, help="Use the first N queries of the set")
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help="Environment for the locally started app (repeatable)")
+    parser.add_argument('--cached', action='store_true', help="Keep the app's query caches enabled")
+    parser.add_argument('--startup-timeout', type=float, default=300.0)
+    parser.add_argument('--server-log', default='bench_http_server.log')
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    kind = 'article_number' if args.scenario == 'article-number' else 'label'
+    requests = build_requests(args.scenario, load_query_set(args.query_set, kind=kind, limit=args.queries),
+                              args.top_k)
+
+    env = {} if args.cached else {'EMBEDDING_CACHE_SIZE': '0', 'RESULT_CACHE_SIZE': '0'}
+    env.update(item.split('=', 1) for item in args.env)
+
+    process = None
+    if args.url:
+        target = urllib.parse.urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        print(f"Starting app on port {port} (log: {args.server_log})...")
+        process = start_app(port, env, args.server_log)
+
+    results = {'meta': run_metadata(args), 'scenario': args.scenario, 'levels': []}
+    results['meta']['app_env'] = env if process else None
+    try:
+        start = time.perf_counter()
+        wait_ready(host, port, args.startup_timeout, process)
+        results['startup_seconds'] = round(time.perf_counter() - start, 3) if process else None
+
+        print("=" * 80)
+        print(f"HTTP load test: {args.scenario} ({len(requests)} distinct requests, {args.duration:.0f}s per level)")
+        print("=" * 80)
+        print(f"{'concurrency':>11} {'requests':>9} {'req/s':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} "
+              f"{'p99 ms':>9}")
+        for concurrency in args.concurrency:
+            level = run_level(host, port, requests, concurrency, args.duration, args.warmup)
+            results['levels'].append(level)
+            latency = level['latency']
+            print(f"{concurrency:>11} {level['requests']:>9} {level['throughput_rps']:>9.1f} "
+                  f"{level['error_rate'] or 0:>7.2%} {latency.get('p50_ms', float('nan')):>9.2f} "
+                  f"{latency.get('p95_ms', float('nan')):>9.2f} {latency.get('p99_ms', float('nan')):>9.2f}")
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    if args.output:
+        write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+FAISS index backend benchmark
+Reports recall@k against the exact Flat index and p50/p99 query latency
+for each index type at several corpus sizes.
+
+Corpus vectors come from the saved embeddings in legal_search_model.pkl.
+Larger corpora are synthesized by replicating those vectors with small
+Gaussian noise, which keeps the neighbourhood structure of penal.csv.
+
+Usage (from the API directory):
+    python benchmarks/bench_index.py --sizes 374 5000 50000 --k 5
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from legal_semantic_search import build_faiss_index  # noqa: E402
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype('float32')
+
+
+def load_embeddings(model_path: str) -> np.ndarray:
+    with open(model_path, 'rb') as f:
+        data = pickle.load(f)
+    return normalize(np.asarray(data['embeddings'], dtype='float32'))
+
+
+def scale_corpus(base: np.ndarray, size: int, noise: float, rng) -> np.ndarray:
+    """Replicate base vectors with Gaussian noise up to the requested size"""
+    if size <= len(base):
+        return base[:size]
+    picks = rng.integers(0, len(base), size - len(base))
+    synthetic = base[picks] + rng.normal(0, noise, (len(picks), base.shape[1])).astype('float32')
+    return np.vstack([base, normalize(synthetic)])
+
+
+def make_queries(corpus: np.ndarray, num_queries: int, noise: float, rng) -> np.ndarray:
+    """Perturbed corpus vectors, so queries are near but not equal to stored rows"""
+    picks = rng.integers(0, len(corpus), num_queries)
+    return normalize(corpus[picks] + rng.normal(0, noise, (num_queries, corpus.shape[1])).astype('float32'))
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def time_queries(index, queries: np.ndarray, k: int):
+    """Search one query at a time (as the API does) and return latencies in ms"""
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        _, indices = index.search(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(indices[0])
+    return np.array(latencies), np.array(found)
+
+
+def run(sizes, configs, k, num_queries, model_path, seed):
+    rng = np.random.default_rng(seed)
+    base = load_embeddings(model_path)
+    results = []
+
+    for size in sizes:
+        corpus = scale_corpus(base, size, noise=0.05, rng=rng)
+        queries = make_queries(corpus, num_queries, noise=0.05, rng=rng)
+
+        exact = build_faiss_index(corpus, 'flat')
+        _, truth = exact.search(queries, k)
+
+        for name, index_type, params in configs:
+            start = time.perf_counter()
+            index = build_faiss_index(corpus, index_type, params)
+            build_s = time.perf_counter() - start
+
+            latencies, found = time_queries(index, queries, k)
+            results.append({
+                'corpus_size': size,
+                'index': name,
+                'index_type': index_type,
+                'index_params': params,
+                f'recall@{k}': round(recall_at_k(truth, found), 4),
+                'p50_ms': round(float(np.percentile(latencies, 50)), 4),
+                'p99_ms': round(float(np.percentile(latencies, 99)), 4),
+                'build_s': round(build_s, 3)
+            })
+            print(f"{size:>8} {name:<22} recall@{k}={results[-1][f'recall@{k}']:.4f} "
+                  f"p50={results[-1]['p50_ms']:.3f}ms p99={results[-1]['p99_ms']:.3f}ms "
+                  f"build={build_s:.2f}s")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index backends")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[374, 5000, 50000])
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--model-path', default='legal_search_model.pkl')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    configs = [
+        ('flat', 'flat', {}),
+        ('hnsw ef=32', 'hnsw', {'ef_search': 32}),
+        ('hnsw ef=64', 'hnsw', {'ef_search': 64}),
+        ('hnsw ef=128', 'hnsw', {'ef_search': 128}),
+        ('ivf nprobe=4', 'ivf', {'nprobe': 4}),
+        ('ivf nprobe=16', 'ivf', {'nprobe': 16}),
+    ]
+
+    print("=" * 80)
+    print("FAISS index benchmark")
+    print("=" * 80)
+    results = run(args.sizes, configs, args.k, args.queries, args.model_path, args.seed)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
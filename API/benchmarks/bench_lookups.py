@@ -0,0 +1,121 @@
+"""
+Article lookup endpoint benchmark
+Times GET /article/{id}, /article/{id}/translations and /export/articles
+through the ASGI app in-process (routing, validation and serialization
+included), with the previous DataFrame mask scans patched in for
+comparison when --baseline is given.
+
+The app starts with its own lifespan, loading the bundle from --bundle-dir.
+The query encoder is not loaded: none of these endpoints use it.
+
+Usage (from the API directory):
+    python benchmarks/bench_lookups.py --repeat 2000 --baseline --output results/lookups.json
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_common import latency_summary, run_metadata, write_results  # noqa: E402
+
+
+def mask_get_article(df, article_id, language):
+    """Previous get_article(): two-column boolean mask"""
+    rows = df[(df['id'] == article_id) & (df['language'] == language)]
+    return rows.iloc[0].to_dict() if len(rows) else None
+
+
+def mask_find_translation(df, article_id):
+    """Previous find_translation(): two full boolean-mask scans"""
+    if len(df[df['id'] == article_id]) == 0:
+        return []
+    return [row.to_dict() for _, row in df[df['id'] == article_id].iterrows()]
+
+
+async def measure(client, paths: list, repeat: int, warmup: int = 5) -> dict:
+    """GET each path in turn repeat times (reading the whole body) after a few warm-up calls"""
+    for path in paths[:warmup]:
+        (await client.get(path)).raise_for_status()
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(paths[i % len(paths)])
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latency_summary(latencies)
+
+
+async def run(args, results: dict):
+    import httpx
+    import legal_search_api as api
+
+    async with api.app.router.lifespan_context(api.app):
+        # Lookups serve as soon as the index is loaded; skip the background encoder load
+        api.startup_task.cancel()
+        model = api.search_model
+        results['meta']['corpus_rows'] = len(model.df)
+
+        # Each id is requested in its own row's language, which the mask scans also find
+        rng = np.random.default_rng(0)
+        positions = rng.choice(model.article_positions(), 50).tolist()
+        articles = [(model.df['id'].iat[position], model.df['language'].iat[position]) for position in positions]
+        cases = [
+            ('article', [f"/article/{int(article_id)}?language={language}" for article_id, language in articles],
+             args.repeat),
+            ('translations', [f"/article/{int(article_id)}/translations" for article_id, _ in articles], args.repeat),
+            ('export', [f"/export/articles?neighbours={args.export_neighbours}"], args.export_repeat),
+            ('export_articles_only', ["/export/articles?neighbours=0"], args.export_repeat)
+        ]
+
+        print("=" * 80)
+        print(f"Lookup endpoint benchmark ({len(model.df)} rows, milliseconds)")
+        print("=" * 80)
+        print(f"{'endpoint':<34} {'calls':>6} {'p50':>10} {'p95':>10} {'p99':>10}")
+
+        def record(name, summary):
+            results['benchmarks'][name] = summary
+            print(f"{name:<34} {summary['count']:>6} {summary['p50_ms']:>10.3f} {summary['p95_ms']:>10.3f} "
+                  f"{summary['p99_ms']:>10.3f}")
+
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            for name, paths, repeat in cases:
+                record(name, await measure(client, paths, repeat))
+
+            if args.baseline:
+                # The same endpoints served by the pre-lookup-table DataFrame scans
+                df = model.df
+                model.get_article = lambda article_id, language: mask_get_article(df, article_id, language)
+                model.find_translation = lambda article_id: mask_find_translation(df, article_id)
+                for name, paths, repeat in cases[:2]:
+                    record(f'{name}[mask]', await measure(client, paths, repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the article lookup endpoints")
+    parser.add_argument('--bundle-dir', default='legal_search_bundle')
+    parser.add_argument('--repeat', type=int, default=2000, help="Calls per lookup endpoint")
+    parser.add_argument('--export-repeat', type=int, default=5, help="Full corpus exports per export benchmark")
+    parser.add_argument('--export-neighbours', type=int, default=5)
+    parser.add_argument('--baseline', action='store_true',
+                        help="Also time /article and /translations with the previous DataFrame mask scans")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    # The app reads its settings from the environment when it is imported
+    os.environ['BUNDLE_DIR'] = args.bundle_dir
+    results = {'meta': run_metadata(args), 'benchmarks': {}}
+    asyncio.run(run(args, results))
+
+    if args.output:
+        write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+In-process microbenchmarks of the search model
+Times artifact loading, query encoding, search (per mode), search over
+pre-encoded queries, search_cross_lingual and find_translation with the
+queries of benchmarks/queries.json, reporting p50/p95/p99 per benchmark.
+
+The embedding and result caches are disabled so every call does the full
+work; each benchmark runs a few warm-up calls first.
+
+Usage (from the API directory):
+    python benchmarks/bench_micro.py --queries 200 --output results/micro-$(git rev-parse --short HEAD).json
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_common import latency_summary, run_metadata, write_results  # noqa: E402
+from encoder_backends import ENCODER_BACKENDS  # noqa: E402
+from legal_semantic_search import SEARCH_MODES, LegalSemanticSearch  # noqa: E402
+from query_set import DEFAULT_QUERY_SET, load_query_set  # noqa: E402
+
+BENCHMARKS = ('load', 'encode', 'search', 'search_embeddings', 'search_cross_lingual', 'find_translation')
+LANGUAGES = ('rw', 'en', 'fr')
+
+
+def measure(func, items, repeat: int = 1, warmup: int = 5) -> dict:
+    """Call func on each item repeat times after a few warm-up calls; latency summary in ms"""
+    for item in items[:warmup]:
+        func(item)
+    latencies = []
+    for _ in range(repeat):
+        for item in items:
+            start = time.perf_counter()
+            func(item)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latency_summary(latencies)
+
+
+def new_model(args, encoder=None) -> LegalSemanticSearch:
+    return LegalSemanticSearch(
+        model_name=args.model_name,
+        embedding_cache_size=0,
+        result_cache_size=0,
+        encoder=encoder,
+        encoder_backend=args.encoder_backend,
+        encoder_dir=args.encoder_dir,
+        encoder_threads=args.threads,
+        lazy_encoder=True
+    )
+
+
+def load_artifacts(model: LegalSemanticSearch, args):
+    """Load the bundle if there is one, else the legacy pickle (progress output suppressed)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        if os.path.exists(os.path.join(args.bundle_dir, 'CURRENT')):
+            model.load_bundle(args.bundle_dir)
+            return 'load_bundle'
+        model.load_model(args.model_path)
+        return 'load_model'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark the search model in-process")
+    parser.add_argument('--benchmarks', nargs='+', choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument('--bundle-dir', default='legal_search_bundle')
+    parser.add_argument('--model-path', default='legal_search_model.pkl', help="Used when there is no bundle")
+    parser.add_argument('--model-name', default='paraphrase-multilingual-mpnet-base-v2')
+    parser.add_argument('--encoder-backend', choices=ENCODER_BACKENDS, default='torch')
+    parser.add_argument('--encoder-dir', default='encoder_onnx')
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--query-set', default=DEFAULT_QUERY_SET)
+    parser.add_argument('--queries', type=int, default=200, help="Label queries taken from the query set")
+    parser.add_argument('--modes', nargs='+', choices=SEARCH_MODES, default=list(SEARCH_MODES))
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--load-repeat', type=int, default=5)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    queries = load_query_set(args.query_set, kind='label', limit=args.queries)
+    texts = [query['query'] for query in queries]
+    results = {'meta': run_metadata(args), 'benchmarks': {}}
+    benchmarks = results['benchmarks']
+
+    def record(name, summary):
+        benchmarks[name] = summary
+        print(f"{name:<34} {summary['count']:>6} {summary['p50_ms']:>10.3f} {summary['p95_ms']:>10.3f} "
+              f"{summary['p99_ms']:>10.3f}")
+
+    model = new_model(args)
+    loader = load_artifacts(model, args)
+    results['meta']['corpus_rows'] = len(model.df)
+    results['meta']['index_type'] = model.index_type
+    results['meta']['vector_storage'] = model.vector_storage
+
+    print("=" * 80)
+    print(f"Search model microbenchmarks ({len(texts)} queries x {args.repeat}, {args.encoder_backend}, "
+          f"{model.index_type}/{model.vector_storage}, milliseconds)")
+    print("=" * 80)
+    print(f"{'benchmark':<34} {'calls':>6} {'p50':>10} {'p95':>10} {'p99':>10}")
+
+    if 'load' in args.benchmarks:
+        record(loader, measure(lambda _: load_artifacts(new_model(args), args), list(range(args.load_repeat)),
+                               warmup=1))
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.load_query_encoder()
+        record('load_encoder', latency_summary([(time.perf_counter() - start) * 1000]))
+
+    needs_encoder = set(args.benchmarks) & {'encode', 'search', 'search_embeddings', 'search_cross_lingual'}
+    if needs_encoder and not model.encoder_ready:
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.load_query_encoder()
+
+    if 'encode' in args.benchmarks:
+        record('encode', measure(lambda text: model.encode_queries([text]), texts, args.repeat))
+        batches = [texts[start:start + 32] for start in range(0, len(texts), 32)]
+        batch = measure(lambda chunk: model.encode_queries(chunk), batches, args.repeat, warmup=1)
+        record('encode_batch32', batch)
+
+    if 'search' in args.benchmarks:
+        for mode in args.modes:
+            record(f'search[{mode}]', measure(
+                lambda text: model.search(text, top_k=args.top_k, mode=mode), texts, args.repeat))
+            record(f'search[{mode},lang]', measure(
+                lambda query: model.search(query['query'], top_k=args.top_k, language_filter=query['language'],
+                                           mode=mode), queries, args.repeat))
+
+    if 'search_embeddings' in args.benchmarks:
+        embeddings = model.encode_queries(texts)
+        record('search_embeddings', measure(
+            lambda embedding: model.search_embeddings(embedding.reshape(1, -1), args.top_k),
+            list(embeddings), args.repeat))
+
+    if 'search_cross_lingual' in args.benchmarks:
+        # Target the next language after the query's own, so every pair is crossed
+        targets = [LANGUAGES[(LANGUAGES.index(query['language']) + 1) % len(LANGUAGES)] for query in queries]
+        record('search_cross_lingual', measure(
+            lambda i: model.search_cross_lingual(texts[i], target_language=targets[i], top_k=args.top_k),
+            list(range(len(texts))), args.repeat))
+
+    if 'find_translation' in args.benchmarks:
+        ids = [query['article_id'] for query in queries]
+        record('find_translation', measure(model.find_translation, ids, args.repeat * 10))
+
+    if args.output:
+        write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Search result materialization benchmark
+Times search() minus query encoding: FAISS search plus building the result
+dicts, comparing the previous per-row DataFrame loop with the numpy masks
+over array-backed columns used by search_embeddings().
+
+Queries are perturbed corpus embeddings, so no encoder calls are made.
+
+Usage (from the API directory):
+    python benchmarks/bench_search.py --queries 200 --k 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from legal_semantic_search import LegalSemanticSearch  # noqa: E402
+
+
+def dataframe_collect(df, scores, indices, top_k, language_filter, min_score):
+    """Previous _collect_results(): one df.iloc per candidate"""
+    results = []
+    for score, idx in zip(scores, indices):
+        if score < min_score:
+            continue
+        if 0 <= idx < len(df):
+            row = df.iloc[idx]
+            if language_filter and row['language'] != language_filter:
+                continue
+            # The old loop raised on blank CSV rows; skip them to keep the comparison running
+            if row['id'] != row['id']:
+                continue
+            results.append({
+                'id': int(row['id']),
+                'article_label': row['article_label'],
+                'article_text': row['article_text'],
+                'language': row['language'],
+                'similarity_score': float(score)
+            })
+            if len(results) >= top_k:
+                break
+    return results
+
+
+def dataframe_search(model, query, top_k, language_filter, min_score):
+    scores, indices = model._search_index(query.reshape(1, -1), top_k, language_filter)
+    return dataframe_collect(model.df, scores[0], indices[0], top_k, language_filter, min_score)
+
+
+def array_search(model, query, top_k, language_filter, min_score):
+    return model.search_embeddings(query.reshape(1, -1), top_k, language_filter, min_score)[0]
+
+
+def measure(func, queries, repeat):
+    latencies = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            func(query)
+            latencies.append((time.perf_counter() - start) * 1e6)
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search result materialization")
+    parser.add_argument('--model-path', default='legal_search_model.pkl')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--min-score', type=float, default=0.0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # The benchmark never encodes, so the query encoder is not loaded
+    search_model = LegalSemanticSearch(lazy_encoder=True)
+    search_model.load_model(args.model_path)
+
+    rng = np.random.default_rng(args.seed)
+    embeddings = np.asarray(search_model.embeddings, dtype='float32')
+    picks = rng.integers(0, len(embeddings), args.queries)
+    queries = embeddings[picks] + rng.normal(0, 0.05, (args.queries, embeddings.shape[1])).astype('float32')
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print("=" * 80)
+    print(f"search() without encoding ({len(search_model.df)} rows, {args.queries} queries x {args.repeat}, "
+          f"top_k={args.k}, microseconds)")
+    print("=" * 80)
+    print(f"{'language filter':<16} {'df p50':>10} {'df p99':>10} {'array p50':>10} {'array p99':>10} {'speedup':>8}")
+    for language_filter in [None, 'en', 'fr', 'rw']:
+        before_p50, before_p99 = measure(
+            lambda q: dataframe_search(search_model, q, args.k, language_filter, args.min_score), queries, args.repeat)
+        after_p50, after_p99 = measure(
+            lambda q: array_search(search_model, q, args.k, language_filter, args.min_score), queries, args.repeat)
+        print(f"{language_filter or 'none':<16} {before_p50:>10.1f} {before_p99:>10.1f} {after_p50:>10.1f} "
+              f"{after_p99:>10.1f} {before_p50 / after_p50:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
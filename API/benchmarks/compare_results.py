@@ -0,0 +1,81 @@
+"""
+Compare two benchmark result files (bench_micro.py or bench_http.py --output)
+Prints the relative change of each latency percentile, and of throughput
+for HTTP runs, and exits with status 1 if any got worse by more than the
+threshold, so it can gate a CI job.
+
+Usage (from the API directory):
+    python benchmarks/compare_results.py results/micro-base.json results/micro-head.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+
+PERCENTILES = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+def result_rows(results: dict) -> dict:
+    """{row name: {metric: value}} for micro (benchmarks) and HTTP (levels) results"""
+    if 'benchmarks' in results:
+        return {name: {key: summary[key] for key in PERCENTILES if key in summary}
+                for name, summary in results['benchmarks'].items()}
+    rows = {}
+    for level in results['levels']:
+        name = f"{results['scenario']} x{level['concurrency']}"
+        rows[name] = {key: level['latency'][key] for key in PERCENTILES if key in level['latency']}
+        rows[name]['throughput_rps'] = level['throughput_rps']
+    return rows
+
+
+def compare(base: dict, head: dict, threshold: float) -> list:
+    """
+    Relative changes between two runs
+
+    Returns:
+        (row, metric, base value, head value, change, regressed) tuples; change
+        is positive when head is worse (slower, or lower throughput)
+    """
+    base_rows, head_rows = result_rows(base), result_rows(head)
+    changes = []
+    for name in base_rows.keys() & head_rows.keys():
+        for metric, before in base_rows[name].items():
+            after = head_rows[name].get(metric)
+            if after is None or not before:
+                continue
+            if metric == 'throughput_rps':
+                change = (before - after) / before
+            else:
+                change = (after - before) / before
+            changes.append((name, metric, before, after, change, change > threshold))
+    return sorted(changes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=0.10, help="Allowed relative slowdown (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print("=" * 80)
+    print(f"{(base['meta'].get('git_commit') or '?')[:10]} -> {(head['meta'].get('git_commit') or '?')[:10]} "
+          f"(regression threshold {args.threshold:.0%})")
+    print("=" * 80)
+    print(f"{'benchmark':<34} {'metric':<15} {'base':>10} {'head':>10} {'change':>8}")
+    changes = compare(base, head, args.threshold)
+    for name, metric, before, after, change, regressed in changes:
+        print(f"{name:<34} {metric:<15} {before:>10.3f} {after:>10.3f} {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+
+    regressions = sum(regressed for *_, regressed in changes)
+    print(f"\n{regressions} regression(s) out of {len(changes)} metrics")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Retrieval quality evaluation across search configurations
+Runs the labelled label queries of benchmarks/queries.json against every
+combination of model, encoder backend, index type, vector storage, search
+mode and min_score threshold, and prints a comparison table of recall@k, MRR and nDCG
+(per language pair with --per-pair) next to query latency and memory.
+
+A query is an article label without its number prefix; searched with a
+target-language filter, its one relevant result is the same article in
+that language. Corpus embeddings are built once per model with the torch
+backend, as build_index.py does; the backend only changes query encoding.
+
+Usage (from the API directory):
+    python benchmarks/eval_retrieval.py --backends torch onnx-int8 --index-types flat hnsw \\
+        --storage float32 sq8 --min-scores 0 0.5 0.65 --output results/eval.json --markdown results/eval.md
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_common import latency_summary, run_metadata, write_results  # noqa: E402
+from embedding_pipeline import EmbeddingCache  # noqa: E402
+from encoder_backends import ENCODER_BACKENDS, load_encoder  # noqa: E402
+from legal_semantic_search import INDEX_TYPES, SEARCH_MODES, VECTOR_STORAGE_MODES, LegalSemanticSearch  # noqa: E402
+from query_set import DEFAULT_QUERY_SET, load_query_set  # noqa: E402
+
+LANGUAGES = ('rw', 'en', 'fr')
+
+
+def rss_bytes():
+    """Resident set size of this process (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def import_runtime(backend: str):
+    """Import a backend's runtime up front so the encoder RSS delta covers only the model"""
+    if backend.startswith('onnx'):
+        import onnxruntime  # noqa: F401
+        import transformers  # noqa: F401
+    else:
+        import sentence_transformers  # noqa: F401
+        import torch  # noqa: F401
+
+
+def ranking_metrics(ranks: list, ks: list) -> dict:
+    """
+    recall@k, MRR and nDCG for queries with a single relevant result
+
+    Args:
+        ranks: 1-based rank of the relevant result per query (None if not retrieved)
+        ks: Cutoffs for recall@k; MRR and nDCG use the largest
+
+    Returns:
+        Metric name -> mean over queries
+    """
+    cutoff = max(ks)
+    found = np.array([rank if rank is not None and rank <= cutoff else 0 for rank in ranks], dtype='float64')
+    hit = found > 0
+    metrics = {f'recall@{k}': float(np.mean(hit & (found <= k))) for k in ks}
+    metrics[f'mrr@{cutoff}'] = float(np.mean(np.where(hit, 1.0 / np.maximum(found, 1), 0.0)))
+    # One relevant document, so the ideal DCG is 1
+    metrics[f'ndcg@{cutoff}'] = float(np.mean(np.where(hit, 1.0 / np.log2(found + 1), 0.0)))
+    metrics['queries'] = len(ranks)
+    return {name: round(value, 4) if isinstance(value, float) else value for name, value in metrics.items()}
+
+
+def evaluate(model: LegalSemanticSearch, queries: list, mode: str, ks: list, min_score: float = 0.0) -> dict:
+    """
+    Search every query against every target language
+
+    Returns:
+        Metrics and mean result count per 'source->target' pair, for all
+        cross-lingual pairs ('cross') and for all pairs ('all'), and the
+        latency summary of the search calls
+    """
+    ranks = {}
+    returned = {}
+    latencies = []
+    for query in queries:
+        for target in LANGUAGES:
+            start = time.perf_counter()
+            results = model.search(query['query'], top_k=max(ks), language_filter=target,
+                                   min_score=min_score, mode=mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+            ids = [result['id'] for result in results]
+            relevant = query['relevant_ids'].get(target)
+            rank = ids.index(relevant) + 1 if relevant in ids else None
+            pair = f"{query['language']}->{target}"
+            ranks.setdefault(pair, []).append(rank)
+            returned.setdefault(pair, []).append(len(results))
+
+    def summarize(pairs):
+        metrics = ranking_metrics([rank for pair in pairs for rank in ranks[pair]], ks)
+        metrics['mean_results'] = round(float(np.mean([n for pair in pairs for n in returned[pair]])), 2)
+        return metrics
+
+    metrics = {pair: summarize([pair]) for pair in sorted(ranks)}
+    metrics['cross'] = summarize([pair for pair in ranks if pair[:2] != pair[-2:]])
+    metrics['all'] = summarize(list(ranks))
+    return {'metrics': metrics, 'latency': latency_summary(latencies)}
+
+
+def corpus_embeddings(model_name: str, csv_path: str, cache_path: str, encoder=None) -> np.ndarray:
+    """Corpus embeddings of a model with its torch encoder (reusing the embedding cache)"""
+    builder = LegalSemanticSearch(model_name=model_name, encoder=encoder, lazy_encoder=True)
+    cache = EmbeddingCache(cache_path) if cache_path else None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            builder.load_data(csv_path)
+            if encoder is None:
+                builder.load_query_encoder()
+            return builder.create_embeddings(embedding_cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def format_table(rows: list, columns: list, markdown: bool = False) -> str:
+    """Rows of dicts as an aligned text table, or a markdown table"""
+    cells = [[str(row.get(column, '')) for column in columns] for row in rows]
+    if markdown:
+        lines = ['| ' + ' | '.join(columns) + ' |', '|' + '|'.join('---' for _ in columns) + '|']
+        return '\n'.join(lines + ['| ' + ' | '.join(row) + ' |' for row in cells]) + '\n'
+    widths = [max(len(column), *(len(row[i]) for row in cells)) for i, column in enumerate(columns)]
+    lines = ['  '.join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines += ['  '.join(cell.rjust(width) for cell, width in zip(row, widths)) for row in cells]
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality, latency and memory per configuration")
+    parser.add_argument('--models', nargs='+', default=['paraphrase-multilingual-mpnet-base-v2'])
+    parser.add_argument('--backends', nargs='+', choices=ENCODER_BACKENDS, default=['torch'])
+    parser.add_argument('--encoder-dir', default='encoder_onnx', help="Exported model for the ONNX backends")
+    parser.add_argument('--index-types', nargs='+', choices=INDEX_TYPES, default=['flat'])
+    parser.add_argument('--storage', nargs='+', choices=list(VECTOR_STORAGE_MODES), default=['float32'])
+    parser.add_argument('--rescore-factor', type=int, default=0)
+    parser.add_argument('--modes', nargs='+', choices=SEARCH_MODES, default=['semantic'])
+    parser.add_argument('--min-scores', type=float, nargs='+', default=[0.0],
+                        help="min_score thresholds to compare (e.g. 0 0.5 0.65)")
+    parser.add_argument('--ks', type=int, nargs='+', default=[1, 5, 10])
+    parser.add_argument('--csv', default='penal.csv')
+    parser.add_argument('--query-set', default=DEFAULT_QUERY_SET)
+    parser.add_argument('--queries', type=int, default=None, help="Use the first N label queries")
+    parser.add_argument('--cache', default='embedding_cache.sqlite', help="Embedding cache path ('' disables)")
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--per-pair', action='store_true', help="Also print metrics per language pair")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--markdown', help="Write the comparison table as markdown to this file")
+    args = parser.parse_args()
+
+    queries = load_query_set(args.query_set, kind='label', limit=args.queries)
+    cutoff = max(args.ks)
+    results = {'meta': run_metadata(args), 'configs': []}
+    rows = []
+
+    print("=" * 80)
+    print(f"Retrieval evaluation ({len(queries)} queries x {len(LANGUAGES)} target languages)")
+    print("=" * 80)
+
+    for model_name, backend in itertools.product(args.models, args.backends):
+        try:
+            import_runtime(backend)
+            before = rss_bytes()
+            with contextlib.redirect_stdout(io.StringIO()):
+                encoder = load_encoder(model_name, backend, args.encoder_dir, args.threads)
+        except (ImportError, OSError, ValueError) as e:
+            print(f"Skipping {model_name} ({backend}): {e}")
+            continue
+        encoder_mb = round((rss_bytes() - before) / 2 ** 20, 1) if before is not None else None
+        embeddings = corpus_embeddings(model_name, args.csv, args.cache, encoder if backend == 'torch' else None)
+
+        for index_type, storage in itertools.product(args.index_types, args.storage):
+            model = LegalSemanticSearch(
+                model_name=model_name,
+                embedding_cache_size=0,
+                result_cache_size=0,
+                index_type=index_type,
+                vector_storage=storage,
+                rescore_factor=args.rescore_factor,
+                encoder=encoder,
+                encoder_backend=backend
+            )
+            with contextlib.redirect_stdout(io.StringIO()):
+                model.load_data(args.csv)
+                model.embeddings = embeddings.copy()
+                model.build_index()
+            storage_stats = model.storage_stats()
+            index_mb = (storage_stats['index_bytes_per_vector'] + storage_stats['embedding_bytes_per_vector']) \
+                * len(model.df) / 2 ** 20
+
+            for mode, min_score in itertools.product(args.modes, args.min_scores):
+                config = {'model': model_name, 'backend': backend, 'index': index_type, 'storage': storage,
+                          'mode': mode, 'min_score': min_score}
+                print(f"Evaluating {config}...")
+                evaluation = evaluate(model, queries, mode, args.ks, min_score)
+                results['configs'].append({
+                    'config': config,
+                    'memory': {'encoder_rss_mb': encoder_mb, 'index_and_embeddings_mb': round(index_mb, 2),
+                               **storage_stats},
+                    **evaluation
+                })
+
+                cross = evaluation['metrics']['cross']
+                rows.append({
+                    **config,
+                    **{f'R@{k}': f"{cross[f'recall@{k}']:.3f}" for k in args.ks},
+                    'MRR': f"{cross[f'mrr@{cutoff}']:.3f}",
+                    f'nDCG@{cutoff}': f"{cross[f'ndcg@{cutoff}']:.3f}",
+                    'results': f"{cross['mean_results']:.1f}",
+                    'p50 ms': f"{evaluation['latency']['p50_ms']:.2f}",
+                    'p95 ms': f"{evaluation['latency']['p95_ms']:.2f}",
+                    'index MB': f"{index_mb:.2f}",
+                    'encoder MB': encoder_mb if encoder_mb is not None else 'n/a'
+                })
+                if args.per_pair:
+                    pairs = [{'pair': pair, **metrics} for pair, metrics in evaluation['metrics'].items()]
+                    print(format_table(pairs, list(pairs[0].keys())))
+        del encoder
+
+    if not rows:
+        print("No configuration could be evaluated")
+        return
+
+    columns = list(rows[0].keys())
+    print()
+    print(f"Cross-lingual pairs (query language != target language), cutoff {cutoff}:")
+    print(format_table(rows, columns))
+
+    if args.markdown:
+        with open(args.markdown, 'w') as f:
+            f.write(format_table(rows, columns, markdown=True))
+        print(f"Table written to {args.markdown}")
+    if args.output:
+        write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
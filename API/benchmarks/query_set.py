@@ -0,0 +1,123 @@
+"""
+Benchmark query set derived from penal.csv article labels
+Each article label, stripped of its 'Article N:' / 'Ingingo ya N:' prefix,
+becomes a query in the label's language whose relevant articles are the
+label's translation group (the same article in every language). Article
+numbers ('Article 107') are included as lexical fast-path queries.
+
+The shuffle is seeded, so the committed queries.json is reproducible and
+its first N entries are a fixed mixed-language sample.
+
+Usage (from the API directory):
+    python benchmarks/query_set.py --csv penal.csv --output benchmarks/queries.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from legal_semantic_search import article_group_keys  # noqa: E402
+
+DEFAULT_QUERY_SET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'queries.json')
+
+# 'Article 107: ' / 'Ingingo ya 107: ' label prefixes
+LABEL_PREFIX_PATTERN = re.compile(r'^\s*(?:article|ingingo(?:\s+ya)?)\s*\d+\s*[:.\-–]?\s*', re.IGNORECASE)
+
+
+def label_topic(label: str) -> str:
+    """Label text without its article number prefix ('' if nothing is left)"""
+    return LABEL_PREFIX_PATTERN.sub('', label).strip()
+
+
+def build_query_set(csv_path: str = 'penal.csv', seed: int = 0) -> dict:
+    """
+    Build labelled queries from a corpus CSV
+
+    Args:
+        csv_path: Corpus CSV (id, article_label, article_text, language)
+        seed: Shuffle seed
+
+    Returns:
+        Dict with the source, seed and 'queries': one entry per article with
+        query, kind ('label' or 'article_number'), language, article_id and
+        relevant_ids ({language: id} of the translation group)
+    """
+    df = pd.read_csv(csv_path).dropna(subset=['id', 'article_label', 'language'])
+    labels = df['article_label'].tolist()
+    languages = df['language'].tolist()
+    ids = df['id'].astype(int).tolist()
+
+    groups = {}
+    keys = article_group_keys(labels, languages)
+    for key, article_id, language in zip(keys, ids, languages):
+        if key is not None:
+            groups.setdefault(key, {})[language] = article_id
+
+    queries = []
+    for key, article_id, language, label in zip(keys, ids, languages, labels):
+        relevant = groups[key] if key is not None else {language: article_id}
+        topic = label_topic(label)
+        if topic:
+            queries.append({'query': topic, 'kind': 'label', 'language': language,
+                            'article_id': article_id, 'relevant_ids': relevant})
+        if key is not None and key[1] == 0 and language == 'en':
+            queries.append({'query': f"Article {key[0]}", 'kind': 'article_number', 'language': None,
+                            'article_id': article_id, 'relevant_ids': relevant})
+
+    order = np.random.default_rng(seed).permutation(len(queries))
+    return {
+        'source': os.path.basename(csv_path),
+        'seed': seed,
+        'queries': [queries[i] for i in order]
+    }
+
+
+def load_query_set(path: str = DEFAULT_QUERY_SET, kind: str = None, limit: int = None) -> list:
+    """
+    Read queries written by this script
+
+    Args:
+        path: Query set JSON
+        kind: Keep only 'label' or 'article_number' queries (None = all)
+        limit: Keep the first N queries (None = all)
+
+    Returns:
+        List of query dicts
+    """
+    with open(path) as f:
+        queries = json.load(f)['queries']
+    if kind:
+        queries = [query for query in queries if query['kind'] == kind]
+    return queries[:limit] if limit else queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the benchmark query set from penal.csv labels")
+    parser.add_argument('--csv', default='penal.csv')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_QUERY_SET)
+    args = parser.parse_args()
+
+    query_set = build_query_set(args.csv, args.seed)
+    # One query per line keeps the committed file diffable
+    lines = [json.dumps(query, ensure_ascii=False) for query in query_set['queries']]
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(f'{{"source": {json.dumps(query_set["source"])}, "seed": {query_set["seed"]}, "queries": [\n')
+        f.write(',\n'.join(lines))
+        f.write('\n]}\n')
+
+    counts = pd.Series([f"{q['kind']}/{q['language'] or 'any'}" for q in query_set['queries']]).value_counts()
+    print(f"Wrote {len(query_set['queries'])} queries to {args.output}")
+    for name, count in counts.sort_index().items():
+        print(f"   {name}: {count}")
+
+
+if __name__ == "__main__":
+    main()
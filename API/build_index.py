@@ -0,0 +1,46 @@
+"""
+Offline index build CLI
+Embeds the corpus with length-bucketed batches (optionally across several
+processes), reusing a persistent embedding cache, and publishes an index bundle
+
+Usage:
+    python build_index.py penal.csv --workers 4 --cache embedding_cache.sqlite
+"""
+
+import argparse
+
+from legal_semantic_search import LegalSemanticSearch, INDEX_TYPES, VECTOR_STORAGE_MODES
+from embedding_pipeline import EmbeddingCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the legal search index bundle from a CSV")
+    parser.add_argument('csv_path', nargs='?', default='penal.csv')
+    parser.add_argument('--bundle-dir', default='legal_search_bundle')
+    parser.add_argument('--model-name', default='paraphrase-multilingual-mpnet-base-v2')
+    parser.add_argument('--cache', default='embedding_cache.sqlite', help="Embedding cache path ('' disables)")
+    parser.add_argument('--workers', type=int, default=1, help="Encoding processes")
+    parser.add_argument('--index-type', choices=INDEX_TYPES, default='flat')
+    parser.add_argument('--vector-storage', choices=list(VECTOR_STORAGE_MODES), default='float32')
+    args = parser.parse_args()
+
+    search_model = LegalSemanticSearch(
+        model_name=args.model_name,
+        index_type=args.index_type,
+        vector_storage=args.vector_storage
+    )
+    search_model.load_data(args.csv_path)
+
+    cache = EmbeddingCache(args.cache) if args.cache else None
+    try:
+        search_model.create_embeddings(embedding_cache=cache, workers=args.workers)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    search_model.build_index()
+    search_model.save_bundle(args.bundle_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Offline corpus embedding pipeline
+Length-bucketed batching, optional multi-process encoding and a
+persistent embedding cache keyed by (model name, text hash)
+"""
+
+import hashlib
+import sqlite3
+import time
+from typing import List
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed store of article embeddings.
+
+    Keys are (model name, SHA-1 of the embedded text), so rebuilds and model
+    comparisons only encode texts that have not been seen with that model.
+    """
+
+    def __init__(self, path: str = 'embedding_cache.sqlite'):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model_name TEXT NOT NULL, text_hash TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model_name, text_hash))"
+        )
+        self._conn.commit()
+
+    def get_many(self, model_name: str, text_hashes: List[str]) -> dict:
+        """Return {text_hash: float32 vector} for the hashes present in the cache"""
+        found = {}
+        unique = list(dict.fromkeys(text_hashes))
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model_name = ? AND text_hash IN ({placeholders})",
+                [model_name, *chunk]
+            )
+            for text_hash, vector in rows:
+                found[text_hash] = np.frombuffer(vector, dtype='float32')
+        return found
+
+    def put_many(self, model_name: str, text_hashes: List[str], vectors: np.ndarray):
+        """Store vectors for the given text hashes"""
+        vectors = np.asarray(vectors, dtype='float32')
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model_name, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+            [(model_name, text_hash, vectors.shape[1], vector.tobytes()) for text_hash, vector in zip(text_hashes, vectors)]
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def token_lengths(model, texts: List[str]) -> np.ndarray:
+    """Token count of each text after truncation to the model's max sequence length"""
+    # Remote encoders (encoder_service.RemoteEncoder) count where the tokenizer lives
+    if hasattr(model, 'token_lengths'):
+        return np.asarray(model.token_lengths(texts))
+    encoded = model.tokenizer(texts, add_special_tokens=True, truncation=True, max_length=model.max_seq_length)
+    return np.array([len(ids) for ids in encoded['input_ids']])
+
+
+def make_buckets(lengths: np.ndarray, token_budget: int = 8192, max_batch_size: int = 128) -> List[np.ndarray]:
+    """
+    Group text positions into batches of similar token length.
+
+    Texts are sorted by length and each batch is sized so that
+    batch_size * longest_text stays under token_budget, which keeps padding
+    low and lets short texts run in large batches.
+    """
+    order = np.argsort(lengths, kind='stable')
+    buckets = []
+    start = 0
+    while start < len(order):
+        end = start + 1
+        while end < len(order) and end - start < max_batch_size:
+            if (end - start + 1) * lengths[order[end]] > token_budget:
+                break
+            end += 1
+        buckets.append(order[start:end])
+        start = end
+    return buckets
+
+
+def encode_corpus(model, texts: List[str], model_name: str, cache: EmbeddingCache = None, workers: int = 1,
+                  token_budget: int = 8192, max_batch_size: int = 128) -> np.ndarray:
+    """
+    Encode corpus texts into normalized embeddings
+
+    Args:
+        model: Loaded SentenceTransformer
+        texts: Texts to embed
+        model_name: Name used as the cache key namespace
+        cache: Optional EmbeddingCache for reuse across builds
+        workers: Number of encoding processes (1 = encode in this process)
+        token_budget: Max padded tokens per batch
+        max_batch_size: Max texts per batch
+
+    Returns:
+        float32 matrix of normalized embeddings in input order
+    """
+    if not texts:
+        # np.vstack() rejects an empty list (e.g. an update that drops every row of a language)
+        return np.empty((0, model.get_sentence_embedding_dimension()), dtype='float32')
+
+    start = time.time()
+    hashes = [text_hash(text) for text in texts]
+    cached = cache.get_many(model_name, hashes) if cache is not None else {}
+
+    missing = [i for i, h in enumerate(hashes) if h not in cached]
+    # Duplicate texts only need encoding once
+    first_seen = {}
+    for i in missing:
+        first_seen.setdefault(hashes[i], i)
+    to_encode = list(first_seen.values())
+
+    print(f"Embedding {len(to_encode)} texts ({len(texts) - len(missing)} cached, {workers} worker(s))...")
+
+    encoded = {}
+    if to_encode:
+        encode_texts = [texts[i] for i in to_encode]
+        lengths = token_lengths(model, encode_texts)
+        buckets = make_buckets(lengths, token_budget, max_batch_size)
+
+        if workers > 1:
+            # Feed length-sorted texts so each worker chunk has similar lengths
+            order = np.concatenate(buckets)
+            pool = model.start_multi_process_pool(['cpu'] * workers)
+            try:
+                vectors = model.encode_multi_process([encode_texts[i] for i in order], pool,
+                                                     batch_size=int(np.median([len(b) for b in buckets])))
+            finally:
+                model.stop_multi_process_pool(pool)
+            vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            for position, vector in zip(order, vectors):
+                encoded[hashes[to_encode[position]]] = vector
+        else:
+            for bucket in buckets:
+                vectors = model.encode(
+                    [encode_texts[i] for i in bucket],
+                    batch_size=len(bucket),
+                    normalize_embeddings=True
+                )
+                for position, vector in zip(bucket, vectors):
+                    encoded[hashes[to_encode[position]]] = vector
+
+        print(f"   {len(buckets)} length buckets, mean batch size {len(to_encode) / len(buckets):.1f}")
+
+        if cache is not None:
+            new_hashes = list(encoded)
+            cache.put_many(model_name, new_hashes, np.vstack([encoded[h] for h in new_hashes]))
+
+    embeddings = np.vstack([cached[h] if h in cached else encoded[h] for h in hashes]).astype('float32')
+
+    elapsed = time.time() - start
+    rate = len(texts) / elapsed if elapsed > 0 else float('inf')
+    encode_rate = len(to_encode) / elapsed if elapsed > 0 else float('inf')
+    print(f"Embedded {len(texts)} articles in {elapsed:.2f}s "
+          f"({rate:.1f} articles/sec overall, {encode_rate:.1f} encoded/sec)")
+    return embeddings
@@ -0,0 +1,279 @@
+"""
+Query encoder backends for CPU inference
+PyTorch (optionally int8 dynamically quantized) or an exported ONNX Runtime
+model, all exposing the SentenceTransformer methods the search model uses
+
+torch, sentence_transformers and onnxruntime are imported when an encoder
+is loaded, not at import time, so the API can start serving before them.
+"""
+
+import inspect
+import json
+import os
+import pickle
+from typing import List
+
+import numpy as np
+
+from metrics import stage
+
+ENCODER_BACKENDS = ('torch', 'torch-int8', 'onnx', 'onnx-int8')
+
+ONNX_CONFIG_FILE = 'encoder_config.json'
+ONNX_MODEL_FILES = {'onnx': 'model.onnx', 'onnx-int8': 'model.int8.onnx'}
+
+
+def _pooling_mode(model) -> str:
+    """Pooling of a transformer + pooling SentenceTransformer ('mean' or 'cls')"""
+    modules = list(model)
+    if len(modules) != 2 or type(modules[1]).__name__ != 'Pooling':
+        raise ValueError("Only transformer + pooling models can be exported "
+                         f"(got {[type(module).__name__ for module in modules]})")
+    pooling = modules[1]
+    # sentence-transformers 2.x keeps one flag per mode, newer releases a mode string
+    mode = getattr(pooling, 'pooling_mode', None)
+    if mode is None:
+        mode = 'mean' if pooling.pooling_mode_mean_tokens else 'cls' if pooling.pooling_mode_cls_token else None
+    if mode not in ('mean', 'cls'):
+        raise ValueError(f"Only mean and CLS pooling are supported (got {mode})")
+    return mode
+
+
+def export_onnx(model_name: str, output_dir: str = 'encoder_onnx', quantize: bool = False, opset: int = 14) -> dict:
+    """
+    Export a SentenceTransformer's transformer to ONNX for the 'onnx' backends
+
+    Writes model.onnx (and model.int8.onnx with quantize), the tokenizer
+    files and encoder_config.json into output_dir. Pooling and normalization
+    run in numpy at query time.
+
+    Args:
+        model_name: SentenceTransformer model to export
+        output_dir: Directory for the exported files
+        quantize: Also write an int8 dynamically quantized copy (needs onnxruntime)
+        opset: ONNX opset version
+
+    Returns:
+        The written encoder config
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device='cpu')
+    pooling = _pooling_mode(model)
+    transformer = model[0]
+    os.makedirs(output_dir, exist_ok=True)
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, input_ids, attention_mask):
+            return self.auto_model(input_ids=input_ids, attention_mask=attention_mask)[0]
+
+    sample = transformer.tokenizer(['Article 107: Voluntary murder'], return_tensors='pt')
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILES['onnx'])
+    # Newer torch versions default to the dynamo exporter; keep the TorchScript one
+    export_kwargs = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            LastHiddenState(transformer.auto_model.eval()),
+            (sample['input_ids'], sample['attention_mask']),
+            model_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['last_hidden_state'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'last_hidden_state': {0: 'batch', 1: 'sequence'}
+            },
+            opset_version=opset,
+            **export_kwargs
+        )
+    transformer.tokenizer.save_pretrained(output_dir)
+
+    files = {'onnx': ONNX_MODEL_FILES['onnx']}
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(model_path, os.path.join(output_dir, ONNX_MODEL_FILES['onnx-int8']),
+                         weight_type=QuantType.QInt8)
+        files['onnx-int8'] = ONNX_MODEL_FILES['onnx-int8']
+
+    config = {
+        'model_name': model_name,
+        'pooling': pooling,
+        'max_seq_length': model.max_seq_length,
+        'dimension': model.get_sentence_embedding_dimension(),
+        'opset': opset,
+        'files': files
+    }
+    with open(os.path.join(output_dir, ONNX_CONFIG_FILE), 'w') as f:
+        json.dump(config, f, indent=2)
+    return config
+
+
+class OnnxEncoder:
+    """
+    ONNX Runtime query encoder with the SentenceTransformer interface used
+    by LegalSemanticSearch and the embedding pipeline (encode, tokenizer,
+    max_seq_length, get_sentence_embedding_dimension).
+    """
+
+    def __init__(self, model_dir: str = 'encoder_onnx', quantized: bool = False, threads: int = None):
+        """
+        Load an exported encoder.
+
+        Args:
+            model_dir: Directory written by export_onnx()
+            quantized: Use the int8 model
+            threads: ONNX Runtime intra-op threads (None = runtime default)
+        """
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, ONNX_CONFIG_FILE)) as f:
+            self.config = json.load(f)
+        backend = 'onnx-int8' if quantized else 'onnx'
+        if backend not in self.config['files']:
+            raise ValueError(f"{model_dir} has no {backend} model; export it with --quantize")
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, self.config['files'][backend]),
+            options,
+            providers=['CPUExecutionProvider']
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = self.config['max_seq_length']
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config['dimension']
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        with stage('tokenize'):
+            inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_seq_length,
+                                    return_tensors='np')
+        mask = inputs['attention_mask'].astype('int64')
+        hidden = self.session.run(None, {'input_ids': inputs['input_ids'].astype('int64'), 'attention_mask': mask})[0]
+
+        if self.config['pooling'] == 'cls':
+            return hidden[:, 0]
+        weights = mask[:, :, None].astype('float32')
+        return (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        # Length-sorted batches keep padding low, as SentenceTransformer does
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        embeddings = np.zeros((len(texts), self.get_sentence_embedding_dimension()), dtype='float32')
+        for start in range(0, len(texts), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = self._encode_batch([texts[i] for i in batch])
+
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+
+def load_encoder(model_name: str, backend: str = 'torch', model_dir: str = 'encoder_onnx', threads: int = None):
+    """
+    Load the query encoder for a backend
+
+    Args:
+        model_name: SentenceTransformer model name
+        backend: One of ENCODER_BACKENDS
+        model_dir: Exported model directory for the ONNX backends
+        threads: Intra-op threads (None = leave the runtime default)
+
+    Returns:
+        An encoder with the SentenceTransformer interface
+    """
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}', expected one of {ENCODER_BACKENDS}")
+
+    if backend.startswith('onnx'):
+        encoder = OnnxEncoder(model_dir, quantized=backend == 'onnx-int8', threads=threads)
+        if encoder.config['model_name'] != model_name:
+            raise ValueError(f"{model_dir} was exported from {encoder.config['model_name']}, not {model_name}")
+        return encoder
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+    if threads:
+        torch.set_num_threads(threads)
+
+    if backend == 'torch':
+        encoder = SentenceTransformer(model_name)
+    else:
+        # Dynamic quantization is CPU-only; Linear layers hold nearly all weights and FLOPs
+        encoder = SentenceTransformer(model_name, device='cpu')
+        encoder = torch.quantization.quantize_dynamic(encoder, {torch.nn.Linear}, dtype=torch.qint8)
+    # SentenceTransformer.encode() tokenizes through self.tokenize (self.preprocess from v6)
+    method = 'preprocess' if hasattr(type(encoder), 'preprocess') else 'tokenize'
+    setattr(encoder, method, TimedTokenize(encoder, method))
+    return encoder
+
+
+class TimedTokenize:
+    """
+    Replacement for a SentenceTransformer's tokenizing method that records the
+    'tokenize' stage. A class rather than a closure so the encoder still
+    pickles for multi-process encoding.
+    """
+
+    def __init__(self, encoder, method: str = 'tokenize'):
+        self.encoder = encoder
+        self.method = method
+
+    def __call__(self, texts, *args, **kwargs):
+        with stage('tokenize'):
+            return getattr(type(self.encoder), self.method)(self.encoder, texts, *args, **kwargs)
+
+
+def parity_check(encoder, model_path: str = 'legal_search_model.pkl', sample: int = None, seed: int = 0,
+                 batch_size: int = 32) -> dict:
+    """
+    Cosine agreement between an encoder and the reference corpus embeddings
+
+    Args:
+        encoder: Encoder from load_encoder()
+        model_path: Legacy pickle with the reference 'df' and 'embeddings'
+        sample: Number of articles to compare (None = all, blank rows excluded)
+        seed: Sampling seed
+        batch_size: Encoding batch size
+
+    Returns:
+        Row count and mean/min/1st-percentile cosine similarity
+    """
+    from legal_semantic_search import article_texts
+
+    with open(model_path, 'rb') as f:
+        data = pickle.load(f)
+    reference = np.asarray(data['embeddings'], dtype='float32')
+    df = data['df']
+    texts = article_texts(df)
+
+    # Blank CSV rows were embedded from NaN text; skip them as article_positions() does
+    rows = np.flatnonzero(df['language'].notna().to_numpy() & df['article_text'].notna().to_numpy())
+    if sample and sample < len(rows):
+        rows = np.sort(np.random.default_rng(seed).choice(rows, sample, replace=False))
+
+    encoded = np.asarray(
+        encoder.encode([texts[i] for i in rows], batch_size=batch_size, normalize_embeddings=True),
+        dtype='float32'
+    )
+    expected = reference[rows] / np.linalg.norm(reference[rows], axis=1, keepdims=True)
+    cosine = (encoded * expected).sum(axis=1)
+    return {
+        'rows': int(len(rows)),
+        'mean_cosine': round(float(cosine.mean()), 6),
+        'min_cosine': round(float(cosine.min()), 6),
+        'p01_cosine': round(float(np.percentile(cosine, 1)), 6)
+    }
@@ -0,0 +1,321 @@
+"""
+Shared query encoder process for multi-worker deployments
+One process loads the encoder and serves every API worker on the host over
+a Unix socket, so the model weights are held once instead of per worker.
+
+Requests from all workers are batched opportunistically: whatever queued up
+while the previous encode call ran goes into the next one, so an idle
+service adds no wait and a busy one runs larger batches.
+
+Usage (started by `python legal_search_api.py --workers N`, or standalone):
+    python encoder_service.py --socket /run/legal-search/encoder.sock --backend onnx-int8
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+import orjson
+
+from embedding_pipeline import token_lengths
+from encoder_backends import ENCODER_BACKENDS, load_encoder
+from legal_semantic_search import EncoderNotReadyError
+
+# Every message is a 4-byte big-endian length followed by the payload: a JSON
+# request, a JSON response header, and for 'encode' the float32 matrix bytes
+FRAME_HEADER = struct.Struct('!I')
+
+
+class EncoderUnavailableError(EncoderNotReadyError):
+    """Raised by RemoteEncoder when the encoder service cannot be reached"""
+
+
+def _frame(payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+class EncoderService:
+    """
+    Serves encode requests for one loaded encoder over a Unix socket.
+
+    Encoding runs on a single thread, so the encoder's intra-op threads get
+    the cores; each connection may send requests back to back.
+    """
+
+    def __init__(self, encoder, socket_path: str, model_name: str = None, max_batch_size: int = 64):
+        """
+        Initialize the service.
+
+        Args:
+            encoder: Encoder from load_encoder()
+            socket_path: Unix socket to listen on (replaced if it exists)
+            model_name: Reported to clients so they can check it matches their index
+            max_batch_size: Maximum texts per encoder forward pass, and the size at
+                which queued requests stop being merged into one encode call
+        """
+        self.encoder = encoder
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='encoder')
+        self._queue = None
+
+        self.total_batches = 0
+        self.total_texts = 0
+
+    def info(self) -> dict:
+        return {
+            'model_name': self.model_name,
+            'dimension': self.encoder.get_sentence_embedding_dimension(),
+            'max_seq_length': self.encoder.max_seq_length,
+            'pid': os.getpid(),
+            'total_batches': self.total_batches,
+            'total_texts': self.total_texts
+        }
+
+    async def serve_forever(self):
+        """Listen on the socket until cancelled"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._queue = asyncio.Queue()
+        batcher = asyncio.create_task(self._run_batches())
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self._pool.shutdown(wait=False)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                    request = orjson.loads(await reader.readexactly(length))
+                except asyncio.IncompleteReadError:
+                    break
+
+                try:
+                    if request['op'] == 'encode':
+                        embeddings = await self._encode(request['texts'], request.get('normalize', False),
+                                                        request.get('batch_size', self.max_batch_size))
+                        writer.write(_frame(orjson.dumps({'ok': True, 'shape': embeddings.shape})))
+                        writer.write(_frame(embeddings.tobytes()))
+                    elif request['op'] == 'token_lengths':
+                        lengths = await asyncio.get_running_loop().run_in_executor(
+                            self._pool, self._token_lengths, request['texts'])
+                        writer.write(_frame(orjson.dumps({'ok': True, 'lengths': lengths})))
+                    elif request['op'] == 'info':
+                        writer.write(_frame(orjson.dumps({'ok': True, **self.info()})))
+                    else:
+                        raise ValueError(f"Unknown op '{request['op']}'")
+                except Exception as e:
+                    writer.write(_frame(orjson.dumps({'ok': False, 'error': f"{type(e).__name__}: {e}"})))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _encode(self, texts: List[str], normalize: bool, batch_size: int) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, normalize, batch_size, future))
+        return await future
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            while size < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                size += len(batch[-1][0])
+
+            # One encoder call per normalization setting in the batch
+            for normalize in (True, False):
+                requests = [request for request in batch if request[1] == normalize]
+                if not requests:
+                    continue
+                texts = [text for request in requests for text in request[0]]
+                # Forward passes are no larger than any merged request asked for
+                batch_size = min(self.max_batch_size, *(request[2] for request in requests))
+                try:
+                    embeddings = await loop.run_in_executor(self._pool, self._encode_batch, texts, normalize,
+                                                            batch_size)
+                except Exception as e:
+                    for _, _, _, future in requests:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                self.total_batches += 1
+                self.total_texts += len(texts)
+                start = 0
+                for request_texts, _, _, future in requests:
+                    if not future.done():
+                        future.set_result(embeddings[start:start + len(request_texts)])
+                    start += len(request_texts)
+
+    def _encode_batch(self, texts: List[str], normalize: bool, batch_size: int) -> np.ndarray:
+        embeddings = self.encoder.encode(texts, batch_size=max(1, min(len(texts), batch_size)),
+                                         normalize_embeddings=normalize)
+        return np.ascontiguousarray(embeddings, dtype='float32').reshape(len(texts), -1)
+
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        return token_lengths(self.encoder, texts).tolist()
+
+
+class RemoteEncoder:
+    """
+    Client for EncoderService with the SentenceTransformer methods the search
+    model uses (encode, get_sentence_embedding_dimension, max_seq_length).
+
+    Thread-safe: each thread keeps its own connection, so concurrent
+    inference threads are batched together by the service.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        """
+        Connect to a running service.
+
+        Args:
+            socket_path: The service's Unix socket
+            timeout: Seconds to wait for a reply
+
+        Raises:
+            EncoderUnavailableError: If the service is not reachable
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+        info = self._call({'op': 'info'})
+        self.model_name = info['model_name']
+        self.max_seq_length = info['max_seq_length']
+        self._dimension = info['dimension']
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dimension
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _read_frame(self, sock: socket.socket) -> bytes:
+        (length,) = FRAME_HEADER.unpack(self._read_exactly(sock, FRAME_HEADER.size))
+        return self._read_exactly(sock, length)
+
+    @staticmethod
+    def _read_exactly(sock: socket.socket, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(min(size - len(data), 1 << 20))
+            if not chunk:
+                raise ConnectionError("Encoder service closed the connection")
+            data.extend(chunk)
+        return bytes(data)
+
+    def _call(self, request: dict, with_data: bool = False):
+        # A connection broken by a service restart is retried once on a new one
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                sock.sendall(_frame(orjson.dumps(request)))
+                header = orjson.loads(self._read_frame(sock))
+                if not header['ok']:
+                    raise RuntimeError(f"Encoder service error: {header['error']}")
+                if not with_data:
+                    return header
+                data = self._read_frame(sock)
+                return np.frombuffer(data, dtype='float32').reshape(header['shape'])
+            except (OSError, ConnectionError) as e:
+                sock = getattr(self._local, 'sock', None)
+                if sock is not None:
+                    sock.close()
+                    self._local.sock = None
+                if attempt == 1:
+                    raise EncoderUnavailableError(f"Encoder service at {self.socket_path} unavailable: {e}") from e
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self._dimension), dtype='float32')
+        embeddings = self._call({'op': 'encode', 'texts': texts, 'normalize': bool(normalize_embeddings),
+                                 'batch_size': int(batch_size)}, with_data=True)
+        return embeddings[0] if single else embeddings
+
+    def token_lengths(self, texts: List[str]) -> np.ndarray:
+        """Token counts from the service's tokenizer (used by encode_corpus)"""
+        return np.array(self._call({'op': 'token_lengths', 'texts': list(texts)})['lengths'])
+
+
+def connect_encoder(socket_path: str, timeout: float = 300.0, poll_interval: float = 0.5) -> RemoteEncoder:
+    """
+    Wait for an encoder service to come up and connect to it (blocking)
+
+    Raises:
+        EncoderUnavailableError: If it is not reachable within timeout seconds
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return RemoteEncoder(socket_path)
+        except EncoderUnavailableError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(poll_interval)
+
+
+def run_service(socket_path: str, model_name: str, backend: str = 'torch', model_dir: str = 'encoder_onnx',
+                threads: int = None, max_batch_size: int = 64):
+    """Load the encoder and serve it until the process is stopped (process entry point)"""
+    start = time.monotonic()
+    encoder = load_encoder(model_name, backend, model_dir, threads)
+    print(f"Encoder service: {model_name} ({backend}) loaded in {time.monotonic() - start:.1f}s, "
+          f"listening on {socket_path}")
+    service = EncoderService(encoder, socket_path, model_name=model_name, max_batch_size=max_batch_size)
+    # Exit through serve_forever's cleanup (removing the socket) when the launcher terminates us
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the query encoder to local API workers over a Unix socket")
+    parser.add_argument('--socket', required=True, help="Unix socket path (set ENCODER_SOCKET to it for the API)")
+    parser.add_argument('--model-name', default='paraphrase-multilingual-mpnet-base-v2')
+    parser.add_argument('--backend', choices=ENCODER_BACKENDS, default='torch')
+    parser.add_argument('--encoder-dir', default='encoder_onnx')
+    parser.add_argument('--threads', type=int, default=None, help="Intra-op threads (default: runtime default)")
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    run_service(args.socket, args.model_name, args.backend, args.encoder_dir, args.threads, args.max_batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+One-time encoder export CLI
+Exports the query encoder to ONNX (optionally int8-quantized) next to the
+index artifacts and checks cosine parity against the reference corpus
+embeddings in legal_search_model.pkl
+
+Usage:
+    python export_encoder.py --output encoder_onnx --quantize
+"""
+
+import argparse
+import sys
+
+from encoder_backends import export_onnx, load_encoder, parity_check
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the query encoder for the ONNX backends")
+    parser.add_argument('--model-name', default='paraphrase-multilingual-mpnet-base-v2')
+    parser.add_argument('--output', default='encoder_onnx')
+    parser.add_argument('--quantize', action='store_true', help="Also write an int8 dynamically quantized model")
+    parser.add_argument('--opset', type=int, default=14)
+    parser.add_argument('--model-path', default='legal_search_model.pkl', help="Reference embeddings for parity")
+    parser.add_argument('--sample', type=int, default=0, help="Articles to compare (0 = all)")
+    parser.add_argument('--min-cosine', type=float, default=0.99, help="Required min cosine for the fp32 model")
+    parser.add_argument('--min-cosine-int8', type=float, default=0.95, help="Required min cosine for the int8 model")
+    parser.add_argument('--skip-parity', action='store_true')
+    args = parser.parse_args()
+
+    print(f"Exporting {args.model_name} to {args.output}...")
+    config = export_onnx(args.model_name, args.output, quantize=args.quantize, opset=args.opset)
+    print(f"Exported: {config['files']}")
+
+    if args.skip_parity:
+        return
+
+    failed = False
+    for backend, min_cosine in [('onnx', args.min_cosine), ('onnx-int8', args.min_cosine_int8)]:
+        if backend not in config['files']:
+            continue
+        encoder = load_encoder(args.model_name, backend, args.output)
+        stats = parity_check(encoder, args.model_path, sample=args.sample or None)
+        ok = stats['min_cosine'] >= min_cosine
+        failed |= not ok
+        print(f"{backend:<10} parity over {stats['rows']} articles: mean={stats['mean_cosine']:.6f} "
+              f"min={stats['min_cosine']:.6f} p01={stats['p01_cosine']:.6f} "
+              f"{'OK' if ok else f'FAILED (< {min_cosine})'}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
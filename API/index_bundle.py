@@ -0,0 +1,285 @@
+"""
+Versioned on-disk index bundle for the legal search model
+Replaces the pickle artifact with memory-mappable files
+
+Layout:
+    legal_search_bundle/
+        CURRENT                  name of the active version directory
+        <version>/
+            manifest.json        model name, dimension, corpus hash, index config
+            embeddings.npy       embedding matrix (np.load with mmap_mode='r')
+            ids.npy              article ids (-1 for missing)
+            <column>.bin         UTF-8 text blob per text column
+            <column>.offsets.npy start offsets into the blob (len = rows + 1)
+            index.<lang>.faiss   per-language FAISS index
+            rows.<lang>.npy      row positions of the language index entries
+            bm25.<lang>.npz      per-language BM25 inverted index arrays (uncompressed)
+
+Every file is opened with mmap, so workers on the same host share pages
+through the OS page cache instead of holding private copies. For the FAISS
+indexes that depends on the FAISS build: IVF inverted lists are mapped by
+any version, but flat codes (flat indexes and the vectors of HNSW indexes)
+only by builds with IO_FLAG_MMAP_IFC. The pinned faiss-cpu 1.7.4 has no
+such flag, so with it each worker reads flat and HNSW indexes into private
+memory; use index_type 'ivf' there, or a newer FAISS, to share them. HNSW
+graph links are always read into memory.
+
+write_bundle keeps the newest KEEP_VERSIONS versions and deletes older ones.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import time
+import uuid
+import zipfile
+
+import faiss
+import numpy as np
+
+BUNDLE_FORMAT_VERSION = 2
+# Version 1 bundles also hold a combined index.faiss, which is ignored
+SUPPORTED_FORMAT_VERSIONS = (1, 2)
+TEXT_COLUMNS = ('article_label', 'article_text', 'language')
+
+# Version directories kept by write_bundle (the active one is never deleted)
+KEEP_VERSIONS = 3
+
+# read_index tries these in order: flat codes are mapped only where the FAISS
+# build has IO_FLAG_MMAP_IFC, and IVF lists fail to map under that flag, so
+# they are retried with IO_FLAG_MMAP alone
+FAISS_MMAP_FLAG_SETS = (
+    ([faiss.IO_FLAG_MMAP | faiss.IO_FLAG_MMAP_IFC] if hasattr(faiss, 'IO_FLAG_MMAP_IFC') else [])
+    + [faiss.IO_FLAG_MMAP]
+)
+
+
+class TextColumn:
+    """
+    Read-only string column backed by a memory-mapped UTF-8 blob.
+
+    Strings are decoded on access, so opening a bundle does not touch the
+    article text until it is actually read.
+    """
+
+    def __init__(self, blob_path: str, offsets_path: str):
+        self.offsets = np.load(offsets_path, mmap_mode='r')
+        self._file = open(blob_path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self._blob[int(self.offsets[i]):int(self.offsets[i + 1])].decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def write_text_column(values, blob_path: str, offsets_path: str):
+    """Write strings as one UTF-8 blob plus an offsets array (missing values become '')"""
+    encoded = [(value if isinstance(value, str) else '').encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='int64')
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+
+    with open(blob_path, 'wb') as f:
+        for value in encoded:
+            f.write(value)
+    np.save(offsets_path, offsets)
+
+
+def corpus_hash(df) -> str:
+    """Stable SHA-256 over the article rows, used to detect corpus changes"""
+    digest = hashlib.sha256()
+    for row in df[['id', *TEXT_COLUMNS]].itertuples(index=False):
+        digest.update(repr(tuple(row)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def resolve_bundle(bundle_root: str) -> str:
+    """Return the active version directory of a bundle"""
+    with open(os.path.join(bundle_root, 'CURRENT')) as f:
+        return os.path.join(bundle_root, f.read().strip())
+
+
+def bundle_exists(bundle_root: str) -> bool:
+    return os.path.exists(os.path.join(bundle_root, 'CURRENT'))
+
+
+def write_bundle(bundle_root: str, df, embeddings: np.ndarray, language_indexes: dict,
+                 manifest: dict, lexical_indexes: dict = None, keep_versions: int = KEEP_VERSIONS) -> dict:
+    """
+    Write a new bundle version and make it the active one.
+
+    The version directory is fully written before CURRENT is atomically
+    replaced, so readers never see a partially written bundle. Versions
+    beyond the newest keep_versions are then deleted (0 keeps all).
+    lexical_indexes maps each language to its BM25 index arrays.
+
+    Returns:
+        The written manifest (its 'version' names the new directory)
+    """
+    version = time.strftime('%Y%m%d-%H%M%S') + f'-{uuid.uuid4().hex[:8]}'
+    version_dir = os.path.join(bundle_root, version)
+    os.makedirs(version_dir)
+
+    np.save(os.path.join(version_dir, 'embeddings.npy'), np.ascontiguousarray(embeddings))
+    np.save(os.path.join(version_dir, 'ids.npy'), df['id'].fillna(-1).to_numpy(dtype='int64'))
+    for column in TEXT_COLUMNS:
+        write_text_column(
+            df[column].tolist(),
+            os.path.join(version_dir, f'{column}.bin'),
+            os.path.join(version_dir, f'{column}.offsets.npy')
+        )
+
+    for language, (language_index, rows) in language_indexes.items():
+        faiss.write_index(language_index, os.path.join(version_dir, f'index.{language}.faiss'))
+        np.save(os.path.join(version_dir, f'rows.{language}.npy'), rows)
+    for language, arrays in (lexical_indexes or {}).items():
+        np.savez(os.path.join(version_dir, f'bm25.{language}.npz'), **arrays)
+
+    manifest = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'version': version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'num_articles': len(df),
+        'dimension': int(embeddings.shape[1]),
+        'embedding_dtype': str(embeddings.dtype),
+        'corpus_hash': corpus_hash(df),
+        'languages': sorted(language_indexes),
+        'lexical_languages': sorted(lexical_indexes or {}),
+        **manifest
+    }
+    with open(os.path.join(version_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Atomically publish the new version
+    current_tmp = os.path.join(bundle_root, f'CURRENT.{os.getpid()}.tmp')
+    with open(current_tmp, 'w') as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(bundle_root, 'CURRENT'))
+
+    if keep_versions > 0:
+        prune_versions(bundle_root, keep_versions)
+    return manifest
+
+
+def list_versions(bundle_root: str) -> list:
+    """Version directory names of a bundle, oldest first"""
+    return sorted(
+        name for name in os.listdir(bundle_root)
+        if os.path.isfile(os.path.join(bundle_root, name, 'manifest.json'))
+    )
+
+
+def prune_versions(bundle_root: str, keep: int = KEEP_VERSIONS) -> list:
+    """
+    Delete all but the newest keep versions, never the active one.
+
+    Processes still serving a deleted version are unaffected on POSIX
+    systems: files they have open or mapped stay readable until closed.
+
+    Returns:
+        Names of the deleted versions
+    """
+    current = os.path.basename(resolve_bundle(bundle_root))
+    stale = [name for name in list_versions(bundle_root)[:-keep] if name != current]
+    for name in stale:
+        shutil.rmtree(os.path.join(bundle_root, name), ignore_errors=True)
+    return stale
+
+
+def read_index(path: str):
+    """Open a FAISS index with mmap where supported (see FAISS_MMAP_FLAG_SETS), else read it fully"""
+    for flags in FAISS_MMAP_FLAG_SETS:
+        try:
+            return faiss.read_index(path, flags)
+        except RuntimeError:
+            pass
+    return faiss.read_index(path)
+
+
+def load_npz(path: str) -> dict:
+    """
+    Load the arrays of an .npz file, memory-mapping them in place
+
+    np.savez stores members uncompressed, so each array's data sits at a
+    fixed offset in the archive and can be mapped like a .npy file. Members
+    that are compressed or hold Python objects are read normally.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(archive.open(info))
+                continue
+
+            # Skip the local file header (30 bytes + name + extra field) to the .npy data
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<HH', f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(f)
+
+            if dtype.hasobject or 0 in shape:
+                arrays[name] = np.load(archive.open(info), allow_pickle=False)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                         order='F' if fortran_order else 'C')
+    return arrays
+
+
+def read_bundle(bundle_root: str) -> dict:
+    """
+    Open the active bundle version.
+
+    Returns:
+        Dict with manifest, embeddings (memmap), ids, text columns,
+        language_indexes ({lang: (index, rows)}) and
+        lexical_indexes ({lang: BM25 arrays}, empty for older bundles)
+    """
+    version_dir = resolve_bundle(bundle_root)
+
+    with open(os.path.join(version_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest['format_version'] not in SUPPORTED_FORMAT_VERSIONS:
+        raise ValueError(f"Unsupported bundle format {manifest['format_version']} in {version_dir}")
+
+    columns = {
+        column: TextColumn(
+            os.path.join(version_dir, f'{column}.bin'),
+            os.path.join(version_dir, f'{column}.offsets.npy')
+        )
+        for column in TEXT_COLUMNS
+    }
+
+    language_indexes = {
+        language: (
+            read_index(os.path.join(version_dir, f'index.{language}.faiss')),
+            np.load(os.path.join(version_dir, f'rows.{language}.npy'), mmap_mode='r')
+        )
+        for language in manifest['languages']
+    }
+
+    lexical_indexes = {
+        language: load_npz(os.path.join(version_dir, f'bm25.{language}.npz'))
+        for language in manifest.get('lexical_languages', [])
+    }
+
+    return {
+        'path': version_dir,
+        'manifest': manifest,
+        'embeddings': np.load(os.path.join(version_dir, 'embeddings.npy'), mmap_mode='r'),
+        'ids': np.load(os.path.join(version_dir, 'ids.npy'), mmap_mode='r'),
+        'columns': columns,
+        'language_indexes': language_indexes,
+        'lexical_indexes': lexical_indexes
+    }
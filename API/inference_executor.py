@@ -0,0 +1,124 @@
+"""
+Bounded inference executor for the Legal Semantic Search API
+Runs CPU-bound encoding and FAISS search off the event loop
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue is at capacity"""
+
+
+def configure_intra_op_threads(num_threads: int):
+    """
+    Set torch and FAISS intra-op thread counts.
+
+    Each executor worker runs its own encode/search call, so the intra-op
+    pools are shrunk to keep workers * threads close to the core count.
+    """
+    # torch is only configured if already imported; load_encoder() applies the
+    # same count when it imports torch, so the executor doesn't pull it in early
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        torch.set_num_threads(num_threads)
+
+    try:
+        import faiss
+        faiss.omp_set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+
+class InferenceExecutor:
+    """
+    Thread pool for model inference with a queue-depth limit.
+
+    Requests beyond max_pending (running + waiting) are rejected immediately
+    with QueueFullError instead of queueing behind model inference.
+    """
+
+    def __init__(self, max_workers: int = None, max_pending: int = None, intra_op_threads: int = None):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Number of inference threads (default: min(4, cores))
+            max_pending: Maximum running + queued calls (default: max_workers * 8)
+            intra_op_threads: torch/FAISS threads per call (default: cores // max_workers)
+        """
+        cores = os.cpu_count() or 1
+        self.max_workers = max_workers or min(4, cores)
+        self.max_pending = max_pending or self.max_workers * 8
+        self.intra_op_threads = intra_op_threads or max(1, cores // self.max_workers)
+
+        configure_intra_op_threads(self.intra_op_threads)
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of calls currently running or waiting"""
+        return self._pending
+
+    def record_rejection(self):
+        """Count a request rejected before reaching the executor (e.g. by a full batch queue)"""
+        with self._lock:
+            self.rejected += 1
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFullError(f"Inference queue full ({self._pending}/{self.max_pending})")
+            self._pending += 1
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+            if future is None or not future.cancelled():
+                self.completed += 1
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking function on the inference pool and await its result.
+
+        The slot is held until the pool thread finishes, so a caller that is
+        cancelled (e.g. a client disconnect) cannot free it while the call
+        still occupies a thread.
+
+        Raises:
+            QueueFullError: If max_pending calls are already in flight
+        """
+        self._acquire()
+        try:
+            future = self._pool.submit(partial(func, *args, **kwargs))
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        """Executor configuration and counters"""
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "intra_op_threads": self.intra_op_threads,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self):
+        """Stop accepting work and wait for running calls"""
+        self._pool.shutdown(wait=True)
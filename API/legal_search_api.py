@@ -3,62 +3,534 @@ Legal Semantic Search FastAPI Application
 Provides REST API endpoints for multilingual legal document search
 """
 
-from fastapi import FastAPI, HTTPException, Query, Path
+from fastapi import FastAPI, HTTPException, Query, Path, Header
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional, Dict, Any, Union, Annotated, Literal, Tuple
 import uvicorn
+import argparse
+import json
+import multiprocessing
 import os
+import orjson
+import asyncio
 import logging
+import tempfile
+import time
+import weakref
+from collections import Counter
 from contextlib import asynccontextmanager
 
-from legal_semantic_search import LegalSemanticSearch
+# The heavy encoder stack (torch, sentence_transformers, onnxruntime) is only
+# imported by load_encoder(), after the index is already serving
+from legal_semantic_search import LegalSemanticSearch, SEARCH_MODES, EncoderNotReadyError
+from encoder_backends import load_encoder
+from encoder_service import connect_encoder, run_service
+import index_bundle
+from inference_executor import InferenceExecutor, QueueFullError
+from query_batcher import QueryBatcher
+from snippets import ARTICLE_FIELDS, shape_results
+from reranker import CrossEncoderReranker
+from metrics import REGISTRY, MetricsMiddleware, render_values, run_with_stages, stage, stages_ms
+from profiling import (SamplingProfiler, ProfilerBusyError, SlowQueryLog, RequestStagesMiddleware, record_stages,
+                       request_stages)
+
+# Brotli is optional; without it responses are gzip-compressed
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Inference settings (0 = derive from the number of CPU cores)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "0"))
+INFERENCE_INTRA_OP_THREADS = int(os.getenv("INFERENCE_INTRA_OP_THREADS", "0"))
+
+# Micro-batching settings (BATCH_MAX_SIZE <= 1 disables batching). Queries wait up
+# to BATCH_MAX_WAIT_MS for a batch to fill only while the inference executor is busy
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+
+# Default search mode when a request does not set one ('semantic', 'hybrid' or 'lexical')
+SEARCH_MODE = os.getenv("SEARCH_MODE", "semantic")
+if SEARCH_MODE not in SEARCH_MODES:
+    raise ValueError(f"SEARCH_MODE must be one of {SEARCH_MODES}")
+
+# Cross-encoder re-ranking (RERANK_MODEL unset disables it). The budget is the
+# default per-request latency budget; re-ranking is cut short once it is spent.
+RERANK_MODEL = os.getenv("RERANK_MODEL", "")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "250"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "8"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "4096"))
+
+# Bulk search settings (/search/batch)
+BATCH_SEARCH_MAX_QUERIES = int(os.getenv("BATCH_SEARCH_MAX_QUERIES", "1000"))
+BATCH_SEARCH_ENCODE_SIZE = int(os.getenv("BATCH_SEARCH_ENCODE_SIZE", "64"))
+
+# NDJSON streaming settings: queries or articles processed per chunk
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "32"))
+
+# Response compression (bytes; 0 disables) and snippet length
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+SNIPPET_CHARS = int(os.getenv("SNIPPET_CHARS", "240"))
+
+# Query cache settings (TTL 0 = entries never expire)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "0"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+
+# FAISS index settings (type and storage apply when building from scratch;
+# search knobs and rescoring also apply to saved indexes)
+INDEX_TYPE = os.getenv("INDEX_TYPE", "flat")
+INDEX_PARAMS = {
+    name: int(os.environ[env])
+    for name, env in [("ef_search", "INDEX_EF_SEARCH"), ("nprobe", "INDEX_NPROBE")]
+    if os.getenv(env)
+}
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "float32")
+RESCORE_FACTOR = int(os.getenv("RESCORE_FACTOR", "0"))
+
+# Query encoder backend ('torch', 'torch-int8', 'onnx', 'onnx-int8'); the ONNX
+# backends load the model written by export_encoder.py from ENCODER_DIR
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")
+ENCODER_DIR = os.getenv("ENCODER_DIR", "encoder_onnx")
+
+# Warm-up passes of dummy queries per inference worker before reporting ready (0 disables)
+WARMUP_ROUNDS = int(os.getenv("WARMUP_ROUNDS", "2"))
+
+# Index bundle location
+BUNDLE_DIR = os.getenv("BUNDLE_DIR", "legal_search_bundle")
+
+# Multi-worker deployment (python legal_search_api.py --workers N sets these):
+# workers use the shared encoder process at ENCODER_SOCKET instead of loading
+# their own, and with MMAP_ARTICLE_TEXT serve article text from the mapped bundle
+ENCODER_SOCKET = os.getenv("ENCODER_SOCKET", "")
+ENCODER_CONNECT_TIMEOUT = float(os.getenv("ENCODER_CONNECT_TIMEOUT", "300"))
+ENCODER_SERVICE_THREADS = int(os.getenv("ENCODER_SERVICE_THREADS", "0"))
+MMAP_ARTICLE_TEXT = os.getenv("MMAP_ARTICLE_TEXT", "0") == "1"
+
+# Hot reload settings (ADMIN_TOKEN unset disables admin endpoints,
+# INDEX_WATCH_INTERVAL 0 disables polling the bundle for new versions)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+INDEX_WATCH_INTERVAL = float(os.getenv("INDEX_WATCH_INTERVAL", "0"))
+
+# Profiling (off unless enabled): POST /admin/profile sampling captures and
+# the X-Trace request header, which returns a Server-Timing stage breakdown
+PROFILING = os.getenv("PROFILING", "0") == "1"
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+# Log queries slower than this (ms) with their parameters and stage timings (0 disables)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+SLOW_QUERY_LOG_PER_MINUTE = int(os.getenv("SLOW_QUERY_LOG_PER_MINUTE", "60"))
+
 # Global model instance
 search_model = None
 
+# Index generation bookkeeping for hot reloads
+search_generation = 0
+retired_generations = []  # weakrefs to swapped-out models still referenced by in-flight requests
+reload_lock = None
+ingest_lock = None
+watch_task = None
+
+# Global inference executor, query batcher and optional re-ranker
+inference_executor = None
+query_batcher = None
+reranker = None
+
+# Sampling profiler (when PROFILING is enabled) and slow-query log
+profiler = SamplingProfiler(max_seconds=PROFILE_MAX_SECONDS) if PROFILING else None
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS, max_per_minute=SLOW_QUERY_LOG_PER_MINUTE)
+
+# Request metrics, exported on /metrics with the pipeline stage histogram
+HTTP_REQUESTS = REGISTRY.counter(
+    'legal_search_http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status')
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    'legal_search_http_request_seconds', 'HTTP request latency by route', ('method', 'route')
+)
+SEARCH_QUERIES = REGISTRY.counter(
+    'legal_search_queries_total', 'Search queries by endpoint, language filter and mode', ('endpoint', 'language', 'mode')
+)
+
+# Staged startup: 'loading' -> 'serving' (index loaded; lookups and lexical
+# search work) -> 'ready' (encoder loaded and warmed up), or 'failed'
+startup_stage = 'loading'
+startup_seconds = {}
+startup_task = None
+
+# Dummy queries for warm-up: plain text, an article number and a quoted phrase
+WARMUP_QUERIES = [
+    "theft of property",
+    "Article 107",
+    "ubujura bw'ibintu",
+    '"voluntary homicide"',
+    "peine d'emprisonnement pour corruption"
+]
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Load model on startup, cleanup on shutdown"""
-    global search_model
+    """
+    Load the index on startup, cleanup on shutdown
+    
+    Startup is staged: the index bundle and article store load here, so
+    lookups and lexical search serve as soon as the app starts. The encoder
+    (and re-ranker) load and warm up in the background; /health/ready
+    reports when semantic search is available.
+    """
+    global search_model, inference_executor, query_batcher, search_generation, reload_lock, ingest_lock, watch_task
+    global startup_stage, startup_task
     
     # Startup
-    logger.info("Loading legal semantic search model...")
+    start_time = time.monotonic()
+    inference_executor = InferenceExecutor(
+        max_workers=INFERENCE_WORKERS or None,
+        max_pending=INFERENCE_MAX_PENDING or None,
+        intra_op_threads=INFERENCE_INTRA_OP_THREADS or None
+    )
+    logger.info(f"Inference executor: {inference_executor.stats()}")
+    
+    logger.info("Loading legal search index...")
     try:
-        search_model = LegalSemanticSearch()
+        search_model = create_search_model()
+        load_index(search_model)
         
-        # Try to load saved model first
-        if os.path.exists('legal_search_model.pkl') and os.path.exists('legal_search_index.faiss'):
-            logger.info("Loading saved model...")
-            search_model.load_model()
-        else:
-            logger.info("No saved model found. Loading from scratch...")
-            search_model.load_data('penal.csv')
-            search_model.create_embeddings()
-            search_model.build_index()
-            search_model.save_model()
-        
-        logger.info("Model loaded successfully!")
+        search_generation = 1
+        startup_seconds['index'] = round(time.monotonic() - start_time, 3)
+        logger.info(f"Index loaded in {startup_seconds['index']}s; lookups and lexical search available")
         
     except Exception as e:
         logger.error(f"Failed to load model: {e}")
         raise e
     
+    reload_lock = asyncio.Lock()
+    ingest_lock = asyncio.Lock()
+    if INDEX_WATCH_INTERVAL > 0:
+        watch_task = asyncio.create_task(watch_bundle())
+    
+    if BATCH_MAX_SIZE > 1:
+        query_batcher = QueryBatcher(
+            inference_executor,
+            get_model=lambda: search_model,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS
+        )
+        await query_batcher.start()
+        logger.info(f"Query batching enabled: max {BATCH_MAX_SIZE} queries / {BATCH_MAX_WAIT_MS}ms")
+    
+    startup_stage = 'serving'
+    startup_task = asyncio.create_task(finish_startup())
+    
     yield
     
     # Shutdown
     logger.info("Shutting down...")
+    if startup_task is not None:
+        startup_task.cancel()
+    if watch_task is not None:
+        watch_task.cancel()
+    if query_batcher is not None:
+        await query_batcher.stop()
+    inference_executor.shutdown()
+
+def load_index(model: LegalSemanticSearch):
+    """
+    Load the index bundle into a model, creating the bundle first if there is none (blocking)
+    
+    Prefers the memory-mapped bundle, then migrates the legacy pickle
+    artifact, and as a last resort embeds penal.csv from scratch.
+    """
+    if index_bundle.bundle_exists(BUNDLE_DIR):
+        logger.info("Loading index bundle...")
+        model.load_bundle(BUNDLE_DIR, mmap_text=MMAP_ARTICLE_TEXT)
+    elif os.path.exists('legal_search_model.pkl'):
+        logger.info("Loading saved model and migrating it to an index bundle...")
+        model.load_model()
+        model.save_bundle(BUNDLE_DIR)
+    else:
+        logger.info("No saved model found. Loading from scratch...")
+        model.load_query_encoder()
+        model.load_data('penal.csv')
+        model.create_embeddings()
+        model.build_index()
+        model.save_bundle(BUNDLE_DIR)
+
+async def finish_startup():
+    """Second startup stage: load the encoder and re-ranker, warm up, then report ready"""
+    global startup_stage, reranker
+    
+    try:
+        if not search_model.encoder_ready:
+            start_time = time.monotonic()
+            if ENCODER_SOCKET:
+                logger.info(f"Connecting to the shared query encoder at {ENCODER_SOCKET}...")
+                encoder = await asyncio.to_thread(connect_encoder, ENCODER_SOCKET, ENCODER_CONNECT_TIMEOUT)
+                if encoder.model_name != search_model.model_name:
+                    logger.warning(f"Shared encoder runs {encoder.model_name}, index expects {search_model.model_name}")
+            else:
+                logger.info(f"Loading query encoder {search_model.model_name} ({ENCODER_BACKEND}) in the background...")
+                encoder = await asyncio.to_thread(
+                    load_encoder, search_model.model_name, ENCODER_BACKEND, ENCODER_DIR,
+                    inference_executor.intra_op_threads
+                )
+            # Attach it to the active generation, which a reload may have swapped meanwhile
+            async with reload_lock:
+                search_model.model = encoder
+            startup_seconds['encoder'] = round(time.monotonic() - start_time, 3)
+            logger.info(f"Query encoder loaded in {startup_seconds['encoder']}s")
+        
+        if RERANK_MODEL:
+            start_time = time.monotonic()
+            logger.info(f"Loading re-ranker {RERANK_MODEL}...")
+            reranker = await asyncio.to_thread(
+                CrossEncoderReranker, RERANK_MODEL, batch_size=RERANK_BATCH_SIZE, cache_size=RERANK_CACHE_SIZE
+            )
+            startup_seconds['reranker'] = round(time.monotonic() - start_time, 3)
+        
+        if WARMUP_ROUNDS > 0:
+            # One warm-up per inference worker, so each thread pays its own lazy init
+            start_time = time.monotonic()
+            await asyncio.gather(*(
+                inference_executor.run(warm_up, search_model, WARMUP_ROUNDS, reranker)
+                for _ in range(inference_executor.max_workers)
+            ))
+            startup_seconds['warm_up'] = round(time.monotonic() - start_time, 3)
+        
+        startup_stage = 'ready'
+        logger.info(f"Ready: semantic search available ({startup_seconds})")
+    except Exception as e:
+        startup_stage = 'failed'
+        logger.error(f"Startup failed: {e}")
+
+def warm_up(model: LegalSemanticSearch, rounds: int = 1, rerank_model: Optional[CrossEncoderReranker] = None):
+    """
+    Run dummy queries so one-off costs (allocator growth, index and article
+    page faults, tokenizer and kernel setup) are paid before real traffic (blocking).
+    
+    The encoder and index are called directly, bypassing the query caches, so
+    every round does real work and no dummy entries are cached. Semantic
+    queries are skipped while the encoder is not loaded.
+    """
+    for _ in range(rounds):
+        for language in [None, *model.language_indexes]:
+            for query in WARMUP_QUERIES:
+                model.lexical_search(query, top_k=5, language_filter=language)
+            if model.encoder_ready:
+                model.model.encode(WARMUP_QUERIES[0], normalize_embeddings=True)
+                embeddings = model.model.encode(WARMUP_QUERIES, batch_size=len(WARMUP_QUERIES),
+                                                normalize_embeddings=True)
+                results = model.search_embeddings(embeddings, top_k=5, language_filter=language)
+                if rerank_model is not None and results[0]:
+                    rerank_model.model.predict([(WARMUP_QUERIES[0], results[0][0]['article_text'])],
+                                               show_progress_bar=False)
+
+def create_search_model(encoder=None) -> LegalSemanticSearch:
+    """Create a search model from the environment settings, optionally reusing a loaded encoder"""
+    return LegalSemanticSearch(
+        embedding_cache_size=EMBEDDING_CACHE_SIZE,
+        embedding_cache_ttl=EMBEDDING_CACHE_TTL or None,
+        result_cache_size=RESULT_CACHE_SIZE,
+        index_type=INDEX_TYPE,
+        index_params=INDEX_PARAMS,
+        vector_storage=VECTOR_STORAGE,
+        rescore_factor=RESCORE_FACTOR,
+        encoder=encoder,
+        encoder_backend=ENCODER_BACKEND,
+        encoder_dir=ENCODER_DIR,
+        encoder_threads=inference_executor.intra_op_threads if inference_executor is not None else None,
+        lazy_encoder=True
+    )
+
+def load_generation(current: LegalSemanticSearch) -> LegalSemanticSearch:
+    """Load and warm the active bundle version as a new model generation (blocking)"""
+    model = create_search_model(encoder=current.model)
+    
+    # Same encoder, so cached query embeddings remain valid
+    model.embedding_cache = current.embedding_cache
+    model.load_bundle(BUNDLE_DIR, mmap_text=MMAP_ARTICLE_TEXT)
+    
+    # Warm up: touch the index and article pages before taking traffic
+    warm_up(model)
+    return model
+
+def ingest_corpus(current: LegalSemanticSearch, csv_path: str) -> dict:
+    """
+    Apply a corpus update and publish it as a new bundle version (blocking)
+    
+    Only new or changed articles are embedded, but the indexes are rebuilt in
+    full. An unchanged corpus publishes nothing, so the following reload is a no-op.
+    """
+    model = create_search_model(encoder=current.model)
+    model.load_bundle(BUNDLE_DIR)
+    summary = model.update_corpus(csv_path)
+    if summary['changed']:
+        model.save_bundle(BUNDLE_DIR)
+    return summary
+
+async def reload_index() -> bool:
+    """
+    Load the active bundle in the background and atomically swap it in.
+    
+    Requests already running keep their reference to the old generation, which
+    is released once they finish. Returns False if the bundle version is unchanged.
+    """
+    global search_model, search_generation
+    
+    async with reload_lock:
+        version_dir = index_bundle.resolve_bundle(BUNDLE_DIR)
+        active = search_model.bundle_manifest
+        if active is not None and os.path.basename(version_dir) == active['version']:
+            return False
+        
+        logger.info(f"Loading index generation {search_generation + 1} from {version_dir}...")
+        new_model = await asyncio.to_thread(load_generation, search_model)
+        
+        old_model = search_model
+        search_model = new_model
+        search_generation += 1
+        
+        retired_generations.append(weakref.ref(old_model))
+        del old_model
+        if reranker is not None:
+            # Article ids may now refer to different text
+            reranker.pair_cache.clear()
+        logger.info(f"Swapped to index generation {search_generation} ({new_model.bundle_manifest['version']})")
+        return True
+
+async def watch_bundle():
+    """Poll the bundle's CURRENT pointer and hot-reload when a new version is published"""
+    while True:
+        await asyncio.sleep(INDEX_WATCH_INTERVAL)
+        try:
+            await reload_index()
+        except Exception as e:
+            logger.error(f"Index reload failed: {e}")
+
+def draining_generations() -> int:
+    """Number of swapped-out generations still held by in-flight requests"""
+    retired_generations[:] = [ref for ref in retired_generations if ref() is not None]
+    return len(retired_generations)
+
+def require_admin(token: Optional[str]):
+    """Check the X-Admin-Token header against ADMIN_TOKEN"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API disabled (set ADMIN_TOKEN)")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+async def run_inference(func, *args, **kwargs):
+    """
+    Run CPU-bound model work on the inference executor, shedding load when full
+    
+    Stage timings of the call are added to the request's breakdown when one
+    is being collected (trace mode or slow-query logging).
+    """
+    try:
+        if request_stages.get() is None:
+            return await inference_executor.run(func, *args, **kwargs)
+        result, stages = await inference_executor.run(run_with_stages, func, *args, **kwargs)
+        record_stages(stages)
+        return result
+    except QueueFullError as e:
+        logger.warning(f"Rejecting request: {e}")
+        raise HTTPException(status_code=503, detail="Server busy, retry later", headers={"Retry-After": "1"})
+    except EncoderNotReadyError:
+        raise encoder_not_ready()
+
+def encoder_not_ready() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Query encoder is still loading; lookups and lexical search are available",
+        headers={"Retry-After": "5"}
+    )
+
+async def run_search(query: str, top_k: int, language_filter: Optional[str], min_score: float,
+                     mode: str = SEARCH_MODE) -> Tuple[List[dict], Dict[str, float]]:
+    """
+    Run a single search, batched with concurrent requests when batching is enabled
+    
+    Returns the results and the seconds spent per pipeline stage.
+    """
+    # Until the encoder is loaded, queries run alone so that a semantic query
+    # cannot fail a batch of lexical ones. Queries that skip the encoder
+    # (lexical mode, article-number and quoted-phrase hybrid queries) never
+    # wait for a batch to fill.
+    if (query_batcher is None or not search_model.encoder_ready
+            or not search_model.needs_encoder(query, mode)):
+        return await run_inference(
+            run_with_stages,
+            search_model.search,
+            query=query,
+            top_k=top_k,
+            language_filter=language_filter,
+            min_score=min_score,
+            mode=mode
+        )
+    
+    try:
+        results, stages = await query_batcher.search(query, top_k, language_filter, min_score, mode)
+    except QueueFullError as e:
+        logger.warning(f"Rejecting request: {e}")
+        raise HTTPException(status_code=503, detail="Server busy, retry later", headers={"Retry-After": "1"})
+    record_stages(stages)
+    return results, stages
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (faster and more compact than the stdlib encoder)"""
+    
+    def render(self, content: Any) -> bytes:
+        with stage('serialize') as timer:
+            body = orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        record_stages({'serialize': timer.seconds})
+        return body
+
+def ndjson_line(record: dict) -> bytes:
+    return orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+
+async def stream_chunks(run_chunk, num_chunks: int):
+    """
+    Stream NDJSON records chunk by chunk.
+    
+    The first chunk is computed before the response starts, so overload (503)
+    and bad requests still get a proper status code. StreamingResponse awaits
+    each send, so the next chunk is only computed once the client has taken
+    the previous lines (backpressure). Errors after the first byte are reported
+    as a final {"error": ...} record.
+    """
+    first = await run_chunk(0)
+    
+    async def records():
+        for line in first:
+            yield line
+        for chunk in range(1, num_chunks):
+            try:
+                lines = await run_chunk(chunk)
+            except HTTPException as e:
+                yield ndjson_line({"error": e.detail, "status_code": e.status_code})
+                return
+            except Exception as e:
+                logger.error(f"Streaming failed: {e}")
+                yield ndjson_line({"error": str(e), "status_code": 500})
+                return
+            for line in lines:
+                yield line
+    
+    return StreamingResponse(records(), media_type="application/x-ndjson")
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Legal Semantic Search API",
     description="Multilingual semantic search for Rwanda Penal Code articles",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -70,18 +542,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiate br/gzip compression from Accept-Encoding
+if COMPRESSION_MIN_SIZE > 0:
+    if BrotliMiddleware is not None:
+        app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# Per-request stage breakdowns for trace mode and the slow-query log
+if PROFILING or SLOW_QUERY_MS > 0:
+    app.add_middleware(RequestStagesMiddleware, trace=PROFILING)
+
+# Outermost, so request latency includes compression
+app.add_middleware(MetricsMiddleware, requests=HTTP_REQUESTS, latency=HTTP_LATENCY)
+
 # Pydantic models for request/response
-class SearchRequest(BaseModel):
+ArticleField = Literal['id', 'article_label', 'article_text', 'language', 'similarity_score', 'snippet']
+SearchMode = Literal['semantic', 'hybrid', 'lexical']
+
+class ResultShapeOptions(BaseModel):
+    """Payload slimming: with `fields` or `snippet` set, results carry only the selected keys"""
+    fields: Optional[List[ArticleField]] = Field(None, description="Result fields to return (default: all)")
+    snippet: bool = Field(False, description="Return a short excerpt instead of the full article text")
+    snippet_chars: int = Field(SNIPPET_CHARS, ge=40, le=2000, description="Maximum snippet length")
+
+class SearchRequest(ResultShapeOptions):
     query: str = Field(..., description="Search query text", example="murder voluntary killing")
     top_k: int = Field(1, ge=1, le=20, description="Number of results to return")
     language_filter: Optional[str] = Field(None, pattern="^(rw|en|fr)$", description="Filter by language")
     min_score: float = Field(0.0, ge=0.0, le=1.0, description="Minimum similarity score")
+    mode: SearchMode = Field(SEARCH_MODE, description="semantic, hybrid (BM25 + embeddings) or lexical (BM25 only)")
+    rerank: bool = Field(False, description="Re-rank the top candidates with the cross-encoder")
+    rerank_budget_ms: float = Field(RERANK_BUDGET_MS, gt=0, le=10000,
+                                    description="Request latency budget; re-ranking is cut short when it runs out")
 
-class CrossLingualRequest(BaseModel):
+class CrossLingualRequest(ResultShapeOptions):
     query: str = Field(..., description="Search query in any language", example="murder killing")
     target_language: str = Field("en", pattern="^(rw|en|fr)$", description="Target language for results")
     min_score: float = Field(0.0, ge=0.0, le=1.0, description="Minimum similarity score")
 
+TopK = Annotated[int, Field(ge=1, le=20)]
+LanguageFilter = Optional[Annotated[str, Field(pattern="^(rw|en|fr)$")]]
+MinScore = Annotated[float, Field(ge=0.0, le=1.0)]
+
+class BatchSearchRequest(ResultShapeOptions):
+    queries: List[str] = Field(..., min_length=1, description="Search query texts",
+                               example=["murder voluntary killing", "theft of property"])
+    top_k: Union[TopK, List[TopK]] = Field(1, description="Number of results, shared or one per query")
+    language_filter: Union[LanguageFilter, List[LanguageFilter]] = Field(
+        None, description="Filter by language, shared or one per query")
+    min_score: Union[MinScore, List[MinScore]] = Field(0.0, description="Minimum similarity score, shared or one per query")
+    mode: SearchMode = Field(SEARCH_MODE, description="semantic, hybrid (BM25 + embeddings) or lexical (BM25 only)")
+
+    @model_validator(mode="after")
+    def check_per_query_lengths(self):
+        if len(self.queries) > BATCH_SEARCH_MAX_QUERIES:
+            raise ValueError(f"At most {BATCH_SEARCH_MAX_QUERIES} queries per batch")
+        for name in ("top_k", "language_filter", "min_score"):
+            value = getattr(self, name)
+            if isinstance(value, list) and len(value) != len(self.queries):
+                raise ValueError(f"{name} has {len(value)} values for {len(self.queries)} queries")
+        return self
+
 class ArticleResponse(BaseModel):
     id: int
     article_label: str
@@ -94,6 +616,18 @@ class SearchResponse(BaseModel):
     results: List[ArticleResponse]
     total_results: int
     processing_time_ms: float
+    stage_timings_ms: Optional[Dict[str, float]] = None
+    rerank: Optional[Dict[str, Any]] = None
+
+class BatchSearchResult(BaseModel):
+    query: str
+    results: List[ArticleResponse]
+    total_results: int
+
+class BatchSearchResponse(BaseModel):
+    results: List[BatchSearchResult]
+    total_queries: int
+    processing_time_ms: float
 
 class TranslationResponse(BaseModel):
     article_id: int
@@ -102,8 +636,72 @@ class TranslationResponse(BaseModel):
 class HealthResponse(BaseModel):
     status: str
     model_loaded: bool
+    startup_stage: str
+    encoder_ready: bool
     total_articles: int
     languages: Dict[str, int]
+    generation: int
+    index_version: Optional[str]
+    draining_generations: int
+
+class ReadinessResponse(BaseModel):
+    status: str
+    startup_stage: str
+    encoder_ready: bool
+    reranker_ready: Optional[bool]
+    startup_seconds: Dict[str, float]
+
+class IngestRequest(BaseModel):
+    csv_path: str = Field("penal.csv", description="Path of the updated corpus CSV on the server")
+
+class IngestResponse(BaseModel):
+    summary: Dict[str, Any]
+    generation: int
+    index_version: Optional[str]
+
+class ReloadResponse(BaseModel):
+    reloaded: bool
+    generation: int
+    index_version: Optional[str]
+
+def count_batch_queries(endpoint: str, request: BatchSearchRequest):
+    """Count a batch request's queries by language filter and mode"""
+    filters = request.language_filter
+    if not isinstance(filters, list):
+        filters = [filters] * len(request.queries)
+    for language, count in Counter(filters).items():
+        SEARCH_QUERIES.inc(count, endpoint=endpoint, language=language or "all", mode=request.mode)
+
+def shaped(results: List[dict], query: str, options: ResultShapeOptions) -> List[dict]:
+    """Apply the request's field projection and snippet mode to result dicts"""
+    return shape_results(results, query, options.fields, options.snippet, options.snippet_chars)
+
+def search_response(query: str, results: List[dict], processing_time: float, options: ResultShapeOptions,
+                    stage_timings: Optional[Dict[str, float]] = None, rerank: Optional[Dict[str, Any]] = None):
+    """
+    Build a search response.
+    
+    Projected or snippet results no longer match ArticleResponse, so they are
+    returned directly without response-model validation.
+    """
+    if options.fields is None and not options.snippet:
+        # Result dicts already match ArticleResponse; the response model validates them once
+        return SearchResponse(
+            query=query,
+            results=results,
+            total_results=len(results),
+            processing_time_ms=round(processing_time, 2),
+            stage_timings_ms=stage_timings,
+            rerank=rerank
+        )
+    return FastJSONResponse({
+        "query": query,
+        "results": shaped(results, query, options),
+        "total_results": len(results),
+        "processing_time_ms": round(processing_time, 2),
+        "stage_timings_ms": stage_timings,
+        "rerank": rerank
+    })
 
 # Health check endpoint
 @app.get("/health", response_model=HealthResponse)
@@ -119,13 +717,40 @@ async def health_check():
         return HealthResponse(
             status="healthy",
             model_loaded=True,
+            startup_stage=startup_stage,
+            encoder_ready=search_model.encoder_ready,
             total_articles=len(search_model.df),
-            languages=language_counts
+            languages=language_counts,
+            generation=search_generation,
+            index_version=search_model.bundle_manifest['version'] if search_model.bundle_manifest else None,
+            draining_generations=draining_generations()
         )
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness: the process is up and its event loop responds"""
+    return {"status": "alive"}
+
+@app.get("/health/ready", response_model=ReadinessResponse)
+async def readiness():
+    """
+    Readiness: 200 once the encoder is loaded and warmed up, 503 before
+    
+    Lookups and lexical search already work while startup_stage is 'serving'.
+    """
+    ready = startup_stage == 'ready'
+    content = ReadinessResponse(
+        status="ready" if ready else "not ready",
+        startup_stage=startup_stage,
+        encoder_ready=search_model is not None and search_model.encoder_ready,
+        reranker_ready=reranker is not None if RERANK_MODEL else None,
+        startup_seconds=startup_seconds
+    )
+    return FastJSONResponse(content.model_dump(), status_code=200 if ready else 503)
+
 # Main search endpoint
 @app.post("/search", response_model=SearchResponse)
 async def search_articles(request: SearchRequest):
@@ -136,45 +761,58 @@ async def search_articles(request: SearchRequest):
     - **top_k**: Number of results (1-20)
     - **language_filter**: Filter by language (rw/en/fr) or null for all
     - **min_score**: Minimum similarity score (0.0-1.0)
+    - **mode**: semantic, hybrid (BM25 + embeddings with rank fusion) or lexical (BM25 only);
+      hybrid and lexical answer "Article N" and quoted-phrase queries without the encoder
+    - **rerank**: Re-order the top candidates with the cross-encoder within **rerank_budget_ms**
     """
     global search_model
     
     if search_model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
+    if request.rerank and reranker is None:
+        if RERANK_MODEL:
+            raise HTTPException(status_code=503, detail="Re-ranker is still loading", headers={"Retry-After": "5"})
+        raise HTTPException(status_code=400, detail="Re-ranking disabled (set RERANK_MODEL)")
     
     try:
-        import time
-        start_time = time.time()
+        start_time = time.perf_counter()
+        deadline = time.monotonic() + request.rerank_budget_ms / 1000
+        
+        SEARCH_QUERIES.inc(endpoint="/search", language=request.language_filter or "all", mode=request.mode)
         
-        # Perform search
-        results = search_model.search(
+        # Perform search (a deeper candidate list when re-ranking)
+        results, stages = await run_search(
             query=request.query,
-            top_k=request.top_k,
+            top_k=max(request.top_k, RERANK_CANDIDATES) if request.rerank else request.top_k,
             language_filter=request.language_filter,
-            min_score=request.min_score
+            min_score=request.min_score,
+            mode=request.mode
         )
+        # Engine stages plus the end-to-end search and re-rank times
+        stage_timings = stages_ms(stages)
+        stage_timings["search"] = round((time.perf_counter() - start_time) * 1000, 2)
         
-        processing_time = (time.time() - start_time) * 1000  # Convert to ms
+        rerank_info = None
+        if request.rerank:
+            rerank_start = time.perf_counter()
+            results, rerank_info = await run_inference(reranker.rerank, request.query, results, deadline)
+            stage_timings["rerank"] = round((time.perf_counter() - rerank_start) * 1000, 2)
+            results = results[:request.top_k]
         
-        # Convert to response format
-        article_responses = [
-            ArticleResponse(
-                id=result['id'],
-                article_label=result['article_label'],
-                article_text=result['article_text'],  # Full text is now available
-                language=result['language'],
-                similarity_score=result['similarity_score']
-            )
-            for result in results
-        ]
+        processing_time = (time.perf_counter() - start_time) * 1000  # Convert to ms
+        slow_query_log.observe("/search", processing_time, {
+            "query": request.query,
+            "top_k": request.top_k,
+            "language_filter": request.language_filter,
+            "min_score": request.min_score,
+            "mode": request.mode,
+            "rerank": request.rerank
+        }, request_stages.get() or stages)
         
-        return SearchResponse(
-            query=request.query,
-            results=article_responses,
-            total_results=len(article_responses),
-            processing_time_ms=round(processing_time, 2)
-        )
+        return search_response(request.query, results, processing_time, request, stage_timings, rerank_info)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Search failed: {e}")
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
@@ -195,40 +833,187 @@ async def cross_lingual_search(request: CrossLingualRequest):
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        import time
-        start_time = time.time()
+        start_time = time.perf_counter()
+        
+        SEARCH_QUERIES.inc(endpoint="/search/cross-lingual", language=request.target_language, mode="semantic")
         
         # Perform cross-lingual search
-        results = search_model.search_cross_lingual(
+        results = await run_inference(
+            search_model.search_cross_lingual,
             query=request.query,
             target_language=request.target_language,
             min_score=request.min_score
         )
         
-        processing_time = (time.time() - start_time) * 1000
+        processing_time = (time.perf_counter() - start_time) * 1000
+        slow_query_log.observe("/search/cross-lingual", processing_time, {
+            "query": request.query,
+            "target_language": request.target_language,
+            "min_score": request.min_score
+        }, request_stages.get())
         
-        # Convert to response format
-        article_responses = [
-            ArticleResponse(
-                id=result['id'],
-                article_label=result['article_label'],
-                article_text=result['article_text'],
-                language=result['language'],
-                similarity_score=result['similarity_score']
-            )
-            for result in results
-        ]
+        return search_response(request.query, results, processing_time, request)
         
-        return SearchResponse(
-            query=request.query,
-            results=article_responses,
-            total_results=len(article_responses),
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Cross-lingual search failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Cross-lingual search failed: {str(e)}")
+
+# Batch search endpoint
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def batch_search(request: BatchSearchRequest):
+    """
+    Search for many queries in one request
+    
+    Queries are encoded in chunks and searched with one FAISS call per language filter.
+    
+    - **queries**: List of query texts (any language)
+    - **top_k**: Number of results (1-20), shared or one per query
+    - **language_filter**: Filter by language (rw/en/fr) or null, shared or one per query
+    - **min_score**: Minimum similarity score (0.0-1.0), shared or one per query
+    """
+    global search_model
+    
+    if search_model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    try:
+        start_time = time.perf_counter()
+        count_batch_queries("/search/batch", request)
+        
+        results = await run_inference(
+            search_model.search_batch,
+            queries=request.queries,
+            top_k=request.top_k,
+            language_filter=request.language_filter,
+            min_score=request.min_score,
+            mode=request.mode,
+            encode_batch_size=BATCH_SEARCH_ENCODE_SIZE
+        )
+        
+        processing_time = (time.perf_counter() - start_time) * 1000
+        slow_query_log.observe("/search/batch", processing_time, {
+            "num_queries": len(request.queries),
+            "queries": request.queries[:5],  # A sample; batches can hold up to BATCH_SEARCH_MAX_QUERIES
+            "top_k": request.top_k,
+            "language_filter": request.language_filter,
+            "min_score": request.min_score,
+            "mode": request.mode
+        }, request_stages.get())
+        
+        if request.fields is not None or request.snippet:
+            return FastJSONResponse({
+                "results": [
+                    {"query": query, "results": shaped(query_results, query, request),
+                     "total_results": len(query_results)}
+                    for query, query_results in zip(request.queries, results)
+                ],
+                "total_queries": len(request.queries),
+                "processing_time_ms": round(processing_time, 2)
+            })
+        
+        return BatchSearchResponse(
+            results=[
+                BatchSearchResult(query=query, results=query_results, total_results=len(query_results))
+                for query, query_results in zip(request.queries, results)
+            ],
+            total_queries=len(request.queries),
             processing_time_ms=round(processing_time, 2)
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Cross-lingual search failed: {e}")
-        raise HTTPException(status_code=500, detail=f"Cross-lingual search failed: {str(e)}")
+        logger.error(f"Batch search failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
+
+# Streaming batch search endpoint
+@app.post("/search/batch/stream")
+async def batch_search_stream(request: BatchSearchRequest):
+    """
+    Batch search streamed as NDJSON, one line per query as each chunk completes
+    
+    Takes the same body as /search/batch. Each line has index, query,
+    results and total_results.
+    """
+    global search_model
+    
+    if search_model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    # Pin the generation so a hot reload does not change results mid-stream
+    model = search_model
+    queries = request.queries
+    count_batch_queries("/search/batch/stream", request)
+    
+    def per_query(value, start, end):
+        return value[start:end] if isinstance(value, list) else value
+    
+    async def run_chunk(chunk: int) -> List[bytes]:
+        start, end = chunk * STREAM_CHUNK_SIZE, (chunk + 1) * STREAM_CHUNK_SIZE
+        results = await run_inference(
+            model.search_batch,
+            queries=queries[start:end],
+            top_k=per_query(request.top_k, start, end),
+            language_filter=per_query(request.language_filter, start, end),
+            min_score=per_query(request.min_score, start, end),
+            mode=request.mode,
+            encode_batch_size=BATCH_SEARCH_ENCODE_SIZE
+        )
+        return [
+            ndjson_line({"index": start + i, "query": query, "results": shaped(query_results, query, request),
+                         "total_results": len(query_results)})
+            for i, (query, query_results) in enumerate(zip(queries[start:end], results))
+        ]
+    
+    try:
+        return await stream_chunks(run_chunk, -(-len(queries) // STREAM_CHUNK_SIZE))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch search failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
+
+# Corpus export endpoint
+@app.get("/export/articles")
+async def export_articles(
+    language: Optional[str] = Query(None, pattern="^(rw|en|fr)$", description="Export only this language"),
+    neighbours: int = Query(5, ge=0, le=20, description="Nearest neighbours per article (0 = articles only)"),
+    neighbour_language: Optional[str] = Query(None, pattern="^(rw|en|fr)$", description="Language of the neighbours"),
+    min_score: float = Query(0.0, ge=0.0, le=1.0, description="Minimum neighbour similarity score")
+):
+    """
+    Stream all articles (optionally of one language) with their nearest neighbours as NDJSON
+    
+    Each line is an article with a `neighbours` list. Neighbours come from the
+    stored article embeddings, so no queries are encoded.
+    """
+    global search_model
+    
+    if search_model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    model = search_model
+    positions = model.article_positions(language)
+    
+    async def run_chunk(chunk: int) -> List[bytes]:
+        articles = await run_inference(
+            model.article_neighbours,
+            positions[chunk * STREAM_CHUNK_SIZE:(chunk + 1) * STREAM_CHUNK_SIZE],
+            top_k=neighbours,
+            language_filter=neighbour_language,
+            min_score=min_score
+        )
+        return [ndjson_line(article) for article in articles]
+    
+    try:
+        return await stream_chunks(run_chunk, max(1, -(-len(positions) // STREAM_CHUNK_SIZE)))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Export failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
 # Find translations endpoint
 @app.get("/article/{article_id}/translations", response_model=TranslationResponse)
@@ -294,24 +1079,16 @@ async def get_article(
     
     try:
         # Find the specific article
-        article_row = search_model.df[
-            (search_model.df['id'] == article_id) & 
-            (search_model.df['language'] == language)
-        ]
+        article = search_model.get_article(article_id, language)
         
-        if len(article_row) == 0:
+        if article is None:
             raise HTTPException(
                 status_code=404, 
                 detail=f"Article {article_id} not found in language '{language}'"
             )
         
-        row = article_row.iloc[0]
-        
         return ArticleResponse(
-            id=int(row['id']),
-            article_label=row['article_label'],
-            article_text=row['article_text'],
-            language=row['language'],
+            **article,
             similarity_score=1.0  # Perfect match for direct lookup
         )
         
@@ -327,16 +1104,31 @@ async def quick_search(
     q: str = Query(..., description="Search query"),
     top_k: int = Query(5, ge=1, le=20, description="Number of results"),
     lang: Optional[str] = Query(None, pattern="^(rw|en|fr)$", description="Language filter"),
-    min_score: float = Query(0.0, ge=0.0, le=1.0, description="Minimum score")
+    min_score: float = Query(0.0, ge=0.0, le=1.0, description="Minimum score"),
+    fields: Optional[str] = Query(None, description="Comma-separated result fields, e.g. id,article_label,snippet"),
+    snippet: bool = Query(False, description="Return a short excerpt instead of the full article text"),
+    snippet_chars: int = Query(SNIPPET_CHARS, ge=40, le=2000, description="Maximum snippet length"),
+    mode: SearchMode = Query(SEARCH_MODE, description="semantic, hybrid or lexical"),
+    rerank: bool = Query(False, description="Re-rank the top candidates with the cross-encoder")
 ):
     """
     Quick search endpoint using GET request (for testing/simple usage)
     """
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    unknown = sorted(set(field_list or []) - set(ARTICLE_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(unknown)}")
+    
     request = SearchRequest(
         query=q,
         top_k=top_k,
         language_filter=lang,
-        min_score=min_score
+        min_score=min_score,
+        fields=field_list,
+        snippet=snippet,
+        snippet_chars=snippet_chars,
+        mode=mode,
+        rerank=rerank
     )
     return await search_articles(request)
 
@@ -350,17 +1142,31 @@ async def get_stats():
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        df = search_model.df
+        model = search_model
+        df = model.df
+        # The first call after an index build runs a recall probe
+        storage = await asyncio.to_thread(model.storage_stats)
         
         stats = {
             "total_articles": len(df),
-            "unique_articles": len(df) // 3,  # Each article has 3 language versions
+            "unique_articles": len(model.group_rows),  # Translation groups (one per article)
             "languages": df['language'].value_counts().to_dict(),
             "model_info": {
-                "embedding_dimension": search_model.embeddings.shape[1] if search_model.embeddings is not None else None,
-                "total_embeddings": search_model.embeddings.shape[0] if search_model.embeddings is not None else None,
-                "model_name": "paraphrase-multilingual-mpnet-base-v2"
-            }
+                "embedding_dimension": model.embeddings.shape[1] if model.embeddings is not None else None,
+                "total_embeddings": model.embeddings.shape[0] if model.embeddings is not None else None,
+                "model_name": model.model_name,
+                "encoder_backend": model.encoder_backend,
+                "encoder_socket": ENCODER_SOCKET or None,
+                "worker_pid": os.getpid(),
+                "bundle": model.bundle_manifest,
+                "index_type": model.index_type,
+                "index_params": model.index_params
+            },
+            "storage": storage,
+            "cache": model.cache_stats(),
+            "inference": inference_executor.stats(),
+            "batching": query_batcher.stats() if query_batcher is not None else None,
+            "rerank": reranker.stats() if reranker is not None else None
         }
         
         return stats
@@ -369,10 +1175,219 @@ async def get_stats():
         logger.error(f"Stats failed: {e}")
         raise HTTPException(status_code=500, detail=f"Stats failed: {str(e)}")
 
-if __name__ == "__main__":
-    uvicorn.run(
-        "legal_search_api:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
+# Prometheus metrics endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Metrics in the Prometheus text format
+    
+    Request counts and latency by route, queries by endpoint/language/mode,
+    per-stage pipeline latency histograms, plus cache, batching, executor
+    and index values read from their stats at scrape time.
+    """
+    model = search_model
+    gauges = [
+        ("legal_search_ready", "1 once the encoder is loaded and warmed up", {}, startup_stage == 'ready'),
+        ("legal_search_index_generation", "Active index generation", {}, search_generation),
+        ("legal_search_draining_generations", "Swapped-out generations still serving requests", {},
+         draining_generations()),
+        ("legal_search_inference_pending", "Inference calls running or queued", {}, inference_executor.pending),
+        ("legal_search_batch_queue_depth", "Queries waiting for a micro-batch", {},
+         query_batcher.stats()["queued"] if query_batcher is not None else None)
+    ]
+    counters = [
+        ("legal_search_inference_completed_total", "Completed inference calls", {}, inference_executor.completed),
+        ("legal_search_inference_rejected_total", "Calls rejected with 503 because the queue was full", {},
+         inference_executor.rejected)
+    ]
+    
+    if model is not None:
+        gauges += [
+            ("legal_search_articles", "Articles in the active index", {}, len(model.df)),
+            ("legal_search_index_vectors", "Vectors in the FAISS indexes", {}, model.index_size),
+            ("legal_search_embedding_bytes", "Size of the stored embedding matrix", {}, model.embeddings.nbytes)
+        ]
+        caches = dict(model.cache_stats())
+        if reranker is not None:
+            caches["rerank_pairs"] = reranker.pair_cache.stats()
+        gauges += [("legal_search_cache_entries", "Entries per cache", {"cache": name}, cache["size"])
+                   for name, cache in caches.items()]
+        for field in ("hits", "misses", "evictions"):
+            counters += [(f"legal_search_cache_{field}_total", f"Cache {field} per cache", {"cache": name}, cache[field])
+                         for name, cache in caches.items()]
+    
+    if query_batcher is not None:
+        counters += [
+            ("legal_search_batches_total", "Micro-batches run", {}, query_batcher.total_batches),
+            ("legal_search_batched_queries_total", "Queries run in micro-batches", {}, query_batcher.total_queries)
+        ]
+        counters += [("legal_search_batches_by_size_total", "Micro-batches by number of queries", {"size": size}, count)
+                     for size, count in sorted(query_batcher.batch_sizes.items())]
+    
+    if reranker is not None:
+        counters += [(f"legal_search_rerank_{field}_total", f"Re-rank requests ({field})", {}, getattr(reranker, field))
+                     for field in ("requests", "truncated", "skipped")]
+    
+    return PlainTextResponse(
+        REGISTRY.render() + render_values(gauges) + render_values(counters, kind='counter'),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
     )
+
+# Admin: sampling profiler capture
+@app.post("/admin/profile")
+async def admin_profile(
+    seconds: float = Query(10.0, gt=0, description="Capture duration (capped at PROFILE_MAX_SECONDS)"),
+    interval_ms: float = Query(5.0, ge=1.0, le=1000.0, description="Sampling interval"),
+    threads: Optional[str] = Query(None, description="Only sample threads whose name starts with this, e.g. inference"),
+    include_idle: bool = Query(False, description="Keep samples of threads waiting for work"),
+    format: Literal["json", "collapsed"] = Query("json", description="json summary or collapsed stacks for flame graphs"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Sample the worker's Python stacks for a few seconds while it serves traffic
+    
+    Requires PROFILING=1 and the X-Admin-Token header. The sampler runs on its
+    own thread, outside the inference pool; one capture runs at a time.
+    """
+    require_admin(x_admin_token)
+    
+    if profiler is None:
+        raise HTTPException(status_code=403, detail="Profiling disabled (set PROFILING=1)")
+    
+    try:
+        profile = await asyncio.to_thread(profiler.capture, seconds, interval_ms, include_idle, threads)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if format == "collapsed":
+        return PlainTextResponse("\n".join(profile["collapsed"]) + "\n")
+    return profile
+
+# Admin: hot index reload
+@app.post("/admin/reload", response_model=ReloadResponse)
+async def admin_reload(x_admin_token: Optional[str] = Header(None)):
+    """
+    Load the active index bundle version and swap it in without downtime
+    
+    Requires the X-Admin-Token header to match ADMIN_TOKEN.
+    """
+    require_admin(x_admin_token)
+    
+    if search_model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    try:
+        reloaded = await reload_index()
+        return ReloadResponse(
+            reloaded=reloaded,
+            generation=search_generation,
+            index_version=search_model.bundle_manifest['version'] if search_model.bundle_manifest else None
+        )
+    except Exception as e:
+        logger.error(f"Index reload failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Index reload failed: {str(e)}")
+
+# Admin: corpus ingest (embeds changed articles, rebuilds the indexes)
+@app.post("/admin/ingest", response_model=IngestResponse)
+async def admin_ingest(request: IngestRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Embed only new or changed articles from a CSV, publish a new bundle and swap it in
+    
+    Embedding is incremental, index building is not: every ingest rebuilds all
+    per-language FAISS and BM25 indexes, which takes time proportional to the
+    whole corpus. Requires the X-Admin-Token header to match ADMIN_TOKEN.
+    """
+    require_admin(x_admin_token)
+    
+    if search_model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    if not os.path.exists(request.csv_path):
+        raise HTTPException(status_code=404, detail=f"CSV not found: {request.csv_path}")
+    
+    try:
+        async with ingest_lock:
+            summary = await asyncio.to_thread(ingest_corpus, search_model, request.csv_path)
+            await reload_index()
+        
+        return IngestResponse(
+            summary=summary,
+            generation=search_generation,
+            index_version=search_model.bundle_manifest['version'] if search_model.bundle_manifest else None
+        )
+    except EncoderNotReadyError:
+        raise encoder_not_ready()
+    except Exception as e:
+        logger.error(f"Corpus ingest failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Corpus ingest failed: {str(e)}")
+
+def prepare_index():
+    """Create the index bundle if there is none (launcher child process)"""
+    if not index_bundle.bundle_exists(BUNDLE_DIR):
+        load_index(create_search_model())
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Run the API
+    
+    With several workers, the index bundle is created once up front, every
+    worker memory-maps the same bundle files (index, embeddings, BM25 and
+    article text), and one shared encoder process serves all workers over a
+    Unix socket, so host memory no longer grows with a model per worker.
+    """
+    parser = argparse.ArgumentParser(description="Run the Legal Semantic Search API")
+    parser.add_argument('--host', default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument('--port', type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument('--workers', type=int, default=int(os.getenv("WORKERS", "1")), help="Worker processes")
+    parser.add_argument('--shared-encoder', action=argparse.BooleanOptionalAction, default=None,
+                        help="Encode in one shared process (default: on with more than one worker)")
+    parser.add_argument('--reload', action='store_true', help="Restart on code changes (development, one worker)")
+    args = parser.parse_args(argv)
+    
+    if args.reload:
+        uvicorn.run("legal_search_api:app", host=args.host, port=args.port, reload=True)
+        return
+    
+    # Children are spawned, so they import this module afresh and read the settings below
+    context = multiprocessing.get_context('spawn')
+    encoder_process = None
+    shared_encoder = args.shared_encoder if args.shared_encoder is not None else args.workers > 1
+    
+    if args.workers > 1 or shared_encoder:
+        # Build or migrate the bundle in a short-lived child, so this supervisor never holds a model
+        builder = context.Process(target=prepare_index, name='prepare-index')
+        builder.start()
+        builder.join()
+        if builder.exitcode != 0:
+            raise SystemExit("Could not prepare the index bundle")
+    
+    if args.workers > 1:
+        os.environ.setdefault("MMAP_ARTICLE_TEXT", "1")
+        # Workers each run a small FAISS search per query; don't oversubscribe the cores
+        os.environ.setdefault("INFERENCE_INTRA_OP_THREADS", "1")
+        # /admin/reload and /admin/ingest reach one worker; the others follow the bundle
+        os.environ.setdefault("INDEX_WATCH_INTERVAL", "5")
+    
+    if shared_encoder:
+        socket_path = ENCODER_SOCKET or os.path.join(tempfile.gettempdir(), f"legal_search_encoder.{os.getpid()}.sock")
+        with open(os.path.join(index_bundle.resolve_bundle(BUNDLE_DIR), 'manifest.json')) as f:
+            model_name = json.load(f)['model_name']
+        encoder_process = context.Process(
+            target=run_service,
+            args=(socket_path, model_name, ENCODER_BACKEND, ENCODER_DIR, ENCODER_SERVICE_THREADS or None),
+            name='encoder-service',
+            daemon=True
+        )
+        encoder_process.start()
+        os.environ["ENCODER_SOCKET"] = socket_path
+        logger.info(f"Shared encoder process {encoder_process.pid} serving {model_name} on {socket_path}")
+    
+    try:
+        uvicorn.run("legal_search_api:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        if encoder_process is not None:
+            encoder_process.terminate()
+            encoder_process.join(timeout=10)
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,208 @@ Uses sentence-transformers for multilingual legal text search
 
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import faiss
 import pickle
 import os
+import time
+import re
 from typing import List, Tuple
 import warnings
 warnings.filterwarnings('ignore')
 
+from query_cache import LRUCache
+from embedding_pipeline import encode_corpus, text_hash
+from encoder_backends import load_encoder
+from lexical_index import BM25Index, tokenize, contains_phrase, reciprocal_rank_fusion
+from metrics import stage
+import index_bundle
+
+
+# Supported FAISS index backends and their tuning knobs
+INDEX_TYPES = ('flat', 'hnsw', 'ivf')
+DEFAULT_INDEX_PARAMS = {
+    'hnsw_m': 32,           # HNSW graph degree
+    'ef_construction': 200, # HNSW build-time beam width
+    'ef_search': 64,        # HNSW query-time beam width
+    'nlist': None,          # IVF cell count (None = 4 * sqrt(n))
+    'nprobe': 8,            # IVF cells scanned per query
+    'pq_m': 64,             # PQ sub-quantizers (must divide the dimension)
+    'pq_nbits': 8           # PQ bits per sub-quantizer code
+}
+
+# Vector storage modes: how vectors are encoded in the FAISS index, and the
+# dtype used for the stored embedding matrix (in memory and on disk)
+VECTOR_STORAGE_MODES = {
+    'float32': 'float32',
+    'float16': 'float16',
+    'sq8': 'float16',
+    'pq': 'float16'
+}
+
+# Queries per encoder forward pass in search_batch()
+QUERY_ENCODE_BATCH_SIZE = 64
+
+# Search modes: embedding only, BM25 + embedding fused with RRF, or BM25 only.
+# Hybrid and lexical modes answer article-number and quoted-phrase queries
+# from the inverted index without running the encoder.
+SEARCH_MODES = ('semantic', 'hybrid', 'lexical')
+
+# Candidates taken from each ranking before hybrid fusion
+HYBRID_CANDIDATES = 50
+
+# Minimum index candidates pooled into translation groups by cross-lingual search
+CROSS_LINGUAL_CANDIDATES = 50
+
+# Queries such as 'Article 107', 'art. 107' or 'Ingingo ya 107'
+ARTICLE_QUERY_PATTERN = re.compile(r'^\s*(?:article|art\.?|ingingo(?:\s+ya)?)\s*(\d+)\s*$', re.IGNORECASE)
+PHRASE_PATTERN = re.compile(r'"([^"]+)"')
+
+
+class EncoderNotReadyError(RuntimeError):
+    """Raised when a query needs the encoder before it has been loaded"""
+
+
+def build_faiss_index(vectors: np.ndarray, index_type: str = 'flat', index_params: dict = None,
+                      vector_storage: str = 'float32'):
+    """
+    Build an inner-product FAISS index over normalized vectors
+    
+    Args:
+        vectors: Matrix of normalized embeddings
+        index_type: 'flat' (exact), 'hnsw' (graph) or 'ivf' (inverted lists)
+        index_params: Overrides for DEFAULT_INDEX_PARAMS
+        vector_storage: Vector encoding inside the index
+            - 'float32': Full precision (4 bytes/dim)
+            - 'float16': Half precision scalar quantizer (2 bytes/dim)
+            - 'sq8': 8-bit scalar quantizer (1 byte/dim)
+            - 'pq': Product quantization (pq_m * pq_nbits bits/vector)
+        
+    Returns:
+        FAISS index containing all vectors
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+    if vector_storage not in VECTOR_STORAGE_MODES:
+        raise ValueError(f"Unknown vector storage '{vector_storage}', expected one of {tuple(VECTOR_STORAGE_MODES)}")
+    
+    params = {**DEFAULT_INDEX_PARAMS, **(index_params or {})}
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    n, dimension = vectors.shape
+    
+    if vector_storage == 'pq':
+        if dimension % params['pq_m'] != 0:
+            raise ValueError(f"pq_m={params['pq_m']} must divide the embedding dimension {dimension}")
+        # PQ training needs at least 2^nbits points per sub-quantizer
+        nbits = max(1, min(params['pq_nbits'], int(np.log2(n))))
+        encoding = f"PQ{params['pq_m']}x{nbits}"
+    else:
+        encoding = {'float32': 'Flat', 'float16': 'SQfp16', 'sq8': 'SQ8'}[vector_storage]
+    
+    if index_type == 'hnsw':
+        factory = f"HNSW{params['hnsw_m']},{encoding}"
+    elif index_type == 'ivf':
+        # Keep ~39 training points per cell, as FAISS recommends
+        nlist = params['nlist'] or int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n // 39))
+        factory = f"IVF{nlist},{encoding}"
+    else:
+        factory = encoding
+    
+    index = faiss.index_factory(dimension, factory, faiss.METRIC_INNER_PRODUCT)
+    if index_type == 'hnsw':
+        faiss.downcast_index(index).hnsw.efConstruction = params['ef_construction']
+    if not index.is_trained:
+        index.train(vectors)
+    
+    index.add(vectors)
+    set_search_params(index, params)
+    return index
+
+
+def set_search_params(index, index_params: dict = None):
+    """Apply query-time knobs (efSearch, nprobe) to an HNSW or IVF index"""
+    params = {**DEFAULT_INDEX_PARAMS, **(index_params or {})}
+    index = faiss.downcast_index(index)
+    
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = params['ef_search']
+    elif isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(params['nprobe'], index.nlist)
+
+
+def index_nbytes(index) -> int:
+    """
+    Approximate memory held by a FAISS index, computed from its code sizes
+    
+    Unlike faiss.serialize_index() this copies nothing, so it is cheap for
+    large indexes and does not fault in memory-mapped ones.
+    """
+    index = faiss.downcast_index(index)
+    
+    # Trained quantizer tables (PQ codebooks, scalar quantizer ranges)
+    extra = 0
+    if getattr(index, 'pq', None) is not None:
+        extra += index.pq.centroids.size() * 4
+    if getattr(index, 'sq', None) is not None:
+        extra += index.sq.trained.size() * 4
+    
+    if isinstance(index, faiss.IndexHNSW):
+        # Stored codes plus the graph: int32 neighbour links, offsets and levels
+        hnsw = index.hnsw
+        return index_nbytes(index.storage) + hnsw.neighbors.size() * 4 + hnsw.offsets.size() * 8 \
+            + hnsw.levels.size() * 4
+    if isinstance(index, faiss.IndexIVF):
+        # Codes and an int64 id per vector in the inverted lists, plus the coarse quantizer
+        return index.ntotal * (index.code_size + 8) + index_nbytes(index.quantizer) + extra
+    return index.ntotal * index.sa_code_size() + extra
+
+
+def _per_query(value, n: int) -> list:
+    """Expand a shared search parameter into one value per query"""
+    if isinstance(value, (list, tuple)):
+        if len(value) != n:
+            raise ValueError(f"Expected {n} per-query values, got {len(value)}")
+        return list(value)
+    return [value] * n
+
+
+def article_texts(df) -> List[str]:
+    """Texts that get embedded for each article: label and text for better context"""
+    return (df['article_label'].fillna('') + '. ' + df['article_text'].fillna('')).tolist()
+
+
+# Article number in labels such as 'Article 107: ...' or 'Ingingo ya 107: ...'
+ARTICLE_NUMBER_PATTERN = re.compile(r'(\d+)')
+
+
+def article_group_keys(labels: List, languages: List) -> List:
+    """
+    Derive a stable translation-group key for each row
+    
+    Rows of different languages share a key when their labels carry the same
+    article number at the same occurrence: the n-th 'Article 5' in English
+    groups with the n-th 'Ingingo ya 5' in Kinyarwanda. Rows without a number
+    get None.
+    """
+    seen = {}
+    keys = []
+    for label, language in zip(labels, languages):
+        match = ARTICLE_NUMBER_PATTERN.search(label) if isinstance(label, str) else None
+        if match is None or not isinstance(language, str):
+            keys.append(None)
+            continue
+        number = int(match.group(1))
+        occurrence = seen.get((number, language), 0)
+        seen[(number, language)] = occurrence + 1
+        keys.append((number, occurrence))
+    return keys
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text for cache lookups (case and whitespace insensitive)"""
+    return ' '.join(query.lower().split())
+
+
 class LegalSemanticSearch:
     """
     Semantic search model for legal corpus with multilingual support.
@@ -24,7 +218,10 @@ class LegalSemanticSearch:
     - Article recommendation
     """
     
-    def __init__(self, model_name='paraphrase-multilingual-mpnet-base-v2'):
+    def __init__(self, model_name='paraphrase-multilingual-mpnet-base-v2', embedding_cache_size=1024,
+                 embedding_cache_ttl=None, result_cache_size=1024, index_type='flat', index_params=None,
+                 vector_storage='float32', rescore_factor=0, encoder=None, encoder_backend='torch',
+                 encoder_dir='encoder_onnx', encoder_threads=None, lazy_encoder=False):
         """
         Initialize the semantic search model.
         
@@ -33,56 +230,370 @@ class LegalSemanticSearch:
                 - 'paraphrase-multilingual-mpnet-base-v2': Best cross-lingual
                 - 'all-MiniLM-L6-v2': Fast, single language
                 - 'distiluse-base-multilingual-cased': Good for legal text
+            embedding_cache_size: Max cached query embeddings (0 disables)
+            embedding_cache_ttl: Query embedding lifetime in seconds, or None
+            result_cache_size: Max cached search results (0 disables)
+            index_type: FAISS backend for build_index() ('flat', 'hnsw', 'ivf')
+            index_params: Overrides for DEFAULT_INDEX_PARAMS (hnsw_m, ef_search, nlist, nprobe, ...)
+            vector_storage: Index vector encoding ('float32', 'float16', 'sq8', 'pq');
+                compressed modes also keep the embedding matrix as float16
+            rescore_factor: Re-rank top_k * rescore_factor index candidates with exact
+                scores from the stored embeddings (0 or 1 disables)
+            encoder: Already-loaded SentenceTransformer to reuse instead of loading model_name
+            encoder_backend: Query encoder backend ('torch', 'torch-int8', 'onnx', 'onnx-int8')
+            encoder_dir: Exported model directory for the ONNX backends (see export_encoder.py)
+            encoder_threads: Encoder intra-op threads (None = runtime default)
+            lazy_encoder: Don't load the encoder yet; lookups and lexical search work
+                without it, and load_query_encoder() enables semantic search
         """
-        print(f"Loading model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.encoder_backend = encoder_backend
+        self.encoder_dir = encoder_dir
+        self.encoder_threads = encoder_threads
+        self.model = encoder
+        if encoder is None and not lazy_encoder:
+            self.load_query_encoder()
         self.df = None
         self.embeddings = None
-        self.index = None
+        self.index_type = index_type
+        self.index_params = {**DEFAULT_INDEX_PARAMS, **(index_params or {})}
+        self._index_param_overrides = dict(index_params or {})
+        self.vector_storage = vector_storage
+        self.rescore_factor = rescore_factor
+        self._storage_stats = None
+        self.bundle_manifest = None
+        
+        # Language -> (FAISS index over that language's rows, row positions in df);
+        # unfiltered searches merge the results of every language's index
+        self.language_indexes = {}
+        
+        # Language -> BM25 inverted index over that language's rows
+        self.lexical_indexes = {}
         
+        # Query text -> embedding, and (embedding, search params) -> results
+        self.embedding_cache = LRUCache(embedding_cache_size, ttl=embedding_cache_ttl)
+        self.result_cache = LRUCache(result_cache_size)
+        
+    @property
+    def encoder_ready(self) -> bool:
+        """True once the query encoder is loaded"""
+        return self.model is not None
+    
+    def load_query_encoder(self):
+        """Load the query encoder for this model's backend (blocking); returns it"""
+        print(f"Loading model: {self.model_name} ({self.encoder_backend})")
+        self.model = load_encoder(self.model_name, self.encoder_backend, self.encoder_dir, self.encoder_threads)
+        return self.model
+    
+    def _require_encoder(self):
+        if self.model is None:
+            raise EncoderNotReadyError("Query encoder is not loaded yet")
+    
     def load_data(self, csv_path='penal.csv'):
         """Load legal corpus data"""
         print(f"Loading data from {csv_path}...")
         self.df = pd.read_csv(csv_path)
+        self.build_lookups()
         print(f"Loaded {len(self.df)} articles")
         print(f"Languages: {self.df['language'].value_counts().to_dict()}")
         return self.df
     
-    def create_embeddings(self):
-        """Create embeddings for all articles"""
+    @property
+    def cache_namespace(self) -> str:
+        """Embedding cache namespace; quantized/exported backends produce slightly different vectors"""
+        return self.model_name if self.encoder_backend == 'torch' else f"{self.model_name}:{self.encoder_backend}"
+    
+    def create_embeddings(self, embedding_cache=None, workers=1):
+        """
+        Create embeddings for all articles
+        
+        Args:
+            embedding_cache: Optional EmbeddingCache to reuse vectors across builds
+            workers: Number of encoding processes
+        """
         if self.df is None:
             raise ValueError("Load data first using load_data()")
         
+        self._require_encoder()
         print("Creating embeddings...")
         # Use label and text for better context
-        texts = (self.df['article_label'] + '. ' + self.df['article_text']).tolist()
+        texts = article_texts(self.df)
         
-        # Generate embeddings
-        self.embeddings = self.model.encode(
-            texts, 
-            show_progress_bar=True,
-            normalize_embeddings=True  # For better cosine similarity
-        )
+        # Generate normalized embeddings (for better cosine similarity)
+        if workers > 1 and self.encoder_backend.startswith('onnx'):
+            raise ValueError("Multi-process encoding needs a torch encoder backend")
+        self.embeddings = encode_corpus(self.model, texts, self.cache_namespace, cache=embedding_cache,
+                                        workers=workers)
         
         print(f"Created embeddings of shape: {self.embeddings.shape}")
         return self.embeddings
     
+    @property
+    def index_ready(self) -> bool:
+        """True once the FAISS indexes are built or loaded"""
+        return bool(self.language_indexes)
+    
+    @property
+    def index_size(self) -> int:
+        """Number of vectors across the per-language FAISS indexes"""
+        return sum(index.ntotal for index, _ in self.language_indexes.values())
+    
     def build_index(self):
-        """Build FAISS index for fast similarity search"""
+        """
+        Build the FAISS indexes for fast similarity search
+        
+        Each language gets its own index and every vector is indexed once;
+        there is no combined index, so unfiltered searches merge the
+        per-language results.
+        """
         if self.embeddings is None:
             self.create_embeddings()
         
-        print("Building FAISS index...")
-        dimension = self.embeddings.shape[1]
+        print(f"Building FAISS indexes ({self.index_type})...")
+        
+        # Compressed storage modes keep the embedding matrix in half precision
+        self.embeddings = self.embeddings.astype(VECTOR_STORAGE_MODES[self.vector_storage], copy=False)
         
-        # Use cosine similarity (inner product on normalized vectors)
-        self.index = faiss.IndexFlatIP(dimension)
-        self.index.add(self.embeddings.astype('float32'))
+        self.build_language_indexes()
+        self.build_lexical_indexes()
         
-        print(f"Index built with {self.index.ntotal} vectors")
-        return self.index
+        print(f"Index built with {self.index_size} vectors")
+        self.result_cache.clear()
+        self._storage_stats = None
+        return self.language_indexes
     
-    def search(self, query: str, top_k: int = 5, language_filter: str = None, min_score: float = 0.0) -> List[dict]:
+    def build_language_indexes(self):
+        """Build one FAISS index per language so filtered searches only scan that language"""
+        languages = self.df['language'].to_numpy()
+        
+        self.language_indexes = {}
+        for language in self.df['language'].dropna().unique():
+            rows = np.flatnonzero(languages == language).astype('int64')
+            # Cosine similarity (inner product on normalized vectors)
+            index = build_faiss_index(self.embeddings[rows], self.index_type, self.index_params, self.vector_storage)
+            self.language_indexes[language] = (index, rows)
+        
+        print(f"Language indexes: { {lang: len(rows) for lang, (_, rows) in self.language_indexes.items()} }")
+        return self.language_indexes
+    
+    def build_lexical_indexes(self):
+        """Build one BM25 inverted index per language over article label and text"""
+        languages = self.df['language'].to_numpy()
+        texts = self.corpus_texts()
+        
+        self.lexical_indexes = {}
+        for language in self.df['language'].dropna().unique():
+            rows = np.flatnonzero(languages == language).astype('int64')
+            self.lexical_indexes[language] = BM25Index.build([texts[row] for row in rows], rows)
+        
+        print(f"Lexical indexes: { {lang: len(index.terms) for lang, index in self.lexical_indexes.items()} } terms")
+        return self.lexical_indexes
+    
+    def update_corpus(self, csv_path='penal.csv') -> dict:
+        """
+        Update the corpus from a new CSV, embedding only new or changed articles
+        
+        Rows are matched to the current corpus by content hash; only new or
+        changed articles are embedded, and stored embeddings are reused for
+        the rest. The indexes are not updated in place: every per-language
+        FAISS index and BM25 index is rebuilt from scratch, so the cost of an
+        update grows with the corpus, not with the change. If the CSV matches
+        the current corpus row for row, nothing is rebuilt.
+        
+        Args:
+            csv_path: Path to the updated corpus CSV
+            
+        Returns:
+            Summary with added/removed/unchanged counts, timings and whether
+            the corpus changed
+        """
+        if self.embeddings is None or self.df is None:
+            raise ValueError("Load or build a model before updating it")
+        
+        start = time.time()
+        new_df = pd.read_csv(csv_path)
+        
+        old_hashes = [text_hash(text) for text in self.corpus_texts()]
+        old_positions = {}
+        for position, digest in enumerate(old_hashes):
+            old_positions.setdefault(digest, position)
+        
+        new_texts = article_texts(new_df)
+        new_hashes = [text_hash(text) for text in new_texts]
+        
+        if new_hashes == old_hashes and self._same_row_keys(new_df):
+            summary = {
+                'total_articles': len(new_df),
+                'added_or_changed': 0,
+                'removed': 0,
+                'unchanged': len(new_df),
+                'changed': False,
+                'encode_seconds': 0.0,
+                'total_seconds': round(time.time() - start, 3)
+            }
+            print(f"Corpus unchanged: {summary}")
+            return summary
+        
+        to_encode = [i for i, digest in enumerate(new_hashes) if digest not in old_positions]
+        
+        embeddings = np.empty((len(new_df), self.embeddings.shape[1]), dtype=self.embeddings.dtype)
+        reused = [i for i, digest in enumerate(new_hashes) if digest in old_positions]
+        embeddings[reused] = self.embeddings[[old_positions[new_hashes[i]] for i in reused]]
+        
+        if to_encode:
+            self._require_encoder()
+            print(f"Embedding {len(to_encode)} new or changed articles...")
+            embeddings[to_encode] = encode_corpus(self.model, [new_texts[i] for i in to_encode], self.cache_namespace)
+        
+        # A changed article keeps its (id, language) key, so only vanished keys count as removed
+        removed = len(self._row_keys(self.df) - self._row_keys(new_df))
+        encode_seconds = time.time() - start
+        
+        self.df = new_df
+        self.embeddings = embeddings
+        self.build_lookups()
+        self.build_index()
+        
+        summary = {
+            'total_articles': len(new_df),
+            'added_or_changed': len(to_encode),
+            'removed': removed,
+            'unchanged': len(reused),
+            'changed': True,
+            'encode_seconds': round(encode_seconds, 3),
+            'total_seconds': round(time.time() - start, 3)
+        }
+        print(f"Corpus updated: {summary}")
+        return summary
+    
+    def _same_row_keys(self, df) -> bool:
+        """True if df has the same ids and languages as the loaded corpus, row for row"""
+        if len(df) != len(self.df):
+            return False
+        ids = df['id'].fillna(-1).to_numpy(dtype='int64')
+        languages = df['language'].fillna('').tolist()
+        return (np.array_equal(ids, self.df['id'].fillna(-1).to_numpy(dtype='int64'))
+                and languages == self.df['language'].fillna('').tolist())
+    
+    @staticmethod
+    def _row_keys(df) -> set:
+        """(id, language) keys of the article rows in df"""
+        ids = df['id'].to_numpy(dtype='float64')
+        languages = df['language'].tolist()
+        return {
+            (int(article_id), language) for article_id, language in zip(ids, languages)
+            if article_id == article_id and isinstance(language, str)
+        }
+    
+    def encode_queries(self, queries: List[str], batch_size: int = QUERY_ENCODE_BATCH_SIZE) -> np.ndarray:
+        """
+        Encode a list of queries into normalized float32 embeddings, using the embedding cache
+        
+        Uncached queries are encoded in chunks of batch_size, which bounds encoder
+        memory for large batches.
+        """
+        keys = [normalize_query(query) for query in queries]
+        cached = [self.embedding_cache.get(key) for key in keys]
+        
+        # Encode only the distinct queries that are not cached
+        missing = list(dict.fromkeys(key for key, emb in zip(keys, cached) if emb is None))
+        if missing:
+            self._require_encoder()
+            with stage('encode'):
+                encoded = self.model.encode(
+                    missing,
+                    batch_size=max(1, min(len(missing), batch_size)),
+                    normalize_embeddings=True
+                )
+                encoded = np.asarray(encoded, dtype='float32').reshape(len(missing), -1)
+            fresh = dict(zip(missing, encoded))
+            for key, emb in fresh.items():
+                self.embedding_cache.put(key, emb)
+            cached = [emb if emb is not None else fresh[key] for key, emb in zip(keys, cached)]
+        
+        return np.vstack(cached)
+    
+    def _materialize(self, scores: np.ndarray, indices: np.ndarray, top_ks: List[int], language_filter: str,
+                     min_scores: List[float]) -> List[List[dict]]:
+        """
+        Turn a block of FAISS scores/indices into filtered result dicts
+        
+        Score, language and empty-slot masks are applied with numpy over the
+        whole candidate block; only the surviving rows are read from the
+        article columns.
+        """
+        positions = np.maximum(indices, 0)
+        codes = self._language_codes[positions]
+        valid = (indices >= 0) & (scores >= np.asarray(min_scores, dtype='float32')[:, None])
+        if language_filter:
+            valid &= codes == self._language_code.get(language_filter, -2)
+        else:
+            valid &= codes >= 0  # Skip blank rows
+        
+        ids, labels, texts, languages = self._ids, self._labels, self._texts, self._languages
+        results = []
+        for row, top_k in enumerate(top_ks):
+            keep = np.flatnonzero(valid[row])[:top_k]
+            results.append([
+                {
+                    'id': ids[position],
+                    'article_label': labels[position],
+                    'article_text': texts[position],  # Keep full text for API
+                    'language': languages[position],
+                    'similarity_score': score
+                }
+                for position, score in zip(indices[row, keep].tolist(), scores[row, keep].tolist())
+            ])
+        return results
+    
+    def _search_index(self, query_embeddings: np.ndarray, top_k: int, language_filter: str = None):
+        """
+        Run FAISS search, returning scores and row positions in df (-1 for empty slots)
+        
+        Filtered searches use the language's own index, so every candidate matches
+        the filter. Unfiltered searches take the top_k of every language's index
+        and merge them by score. With rescoring enabled, extra candidates are
+        fetched and re-ranked by exact scores.
+        """
+        if self.rescore_factor > 1:
+            scores, indices = self._search_candidates(query_embeddings, top_k * self.rescore_factor, language_filter)
+            return self._rescore(query_embeddings, indices, top_k)
+        return self._search_candidates(query_embeddings, top_k, language_filter)
+    
+    def _rescore(self, query_embeddings: np.ndarray, indices: np.ndarray, top_k: int):
+        """Re-rank candidate rows by exact inner product against the stored embeddings"""
+        vectors = self.embeddings[np.maximum(indices, 0)].astype('float32')
+        exact = np.einsum('qkd,qd->qk', vectors, query_embeddings)
+        exact[indices < 0] = -np.inf
+        
+        order = np.argsort(-exact, axis=1, kind='stable')[:, :top_k]
+        return np.take_along_axis(exact, order, axis=1), np.take_along_axis(indices, order, axis=1)
+    
+    def _search_candidates(self, query_embeddings: np.ndarray, top_k: int, language_filter: str = None):
+        """Raw FAISS search on one language's index, or on all of them merged by score"""
+        languages = [language_filter] if language_filter else list(self.language_indexes)
+        found = []
+        for language in languages:
+            if language not in self.language_indexes:
+                continue
+            index, rows = self.language_indexes[language]
+            scores, local = index.search(query_embeddings, k=min(top_k, index.ntotal))
+            found.append((scores, np.where(local >= 0, rows[np.maximum(local, 0)], -1)))
+        
+        if not found:
+            empty = np.full((len(query_embeddings), 0), -1, dtype='int64')
+            return empty.astype('float32'), empty
+        if len(found) == 1:
+            return found[0]
+        
+        # Empty slots score -FLT_MAX under inner product, so they sort last
+        scores = np.hstack([scores for scores, _ in found])
+        indices = np.hstack([indices for _, indices in found])
+        order = np.argsort(-scores, axis=1, kind='stable')[:, :top_k]
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(indices, order, axis=1)
+    
+    def search(self, query: str, top_k: int = 5, language_filter: str = None, min_score: float = 0.0,
+               mode: str = 'semantic') -> List[dict]:
         """
         Search for similar articles
         
@@ -91,46 +602,423 @@ class LegalSemanticSearch:
             top_k: Number of results to return
             language_filter: Filter by language ('rw', 'en', 'fr') or None for all
             min_score: Minimum similarity score (0.0-1.0). Default 0.0 (all results)
+            mode: 'semantic' (embeddings), 'hybrid' (BM25 + embeddings, RRF) or 'lexical' (BM25 only)
             
         Returns:
             List of similar articles with scores
         """
-        if self.index is None:
+        return self.search_batch([query], top_k=top_k, language_filter=language_filter, min_score=min_score,
+                                 mode=mode)[0]
+    
+    def search_batch(self, queries: List[str], top_k=5, language_filter=None, min_score=0.0, mode='semantic',
+                     encode_batch_size: int = QUERY_ENCODE_BATCH_SIZE) -> List[List[dict]]:
+        """
+        Search for several queries with batched encoding and one index search per language filter
+        
+        Args:
+            queries: List of search query texts
+            top_k: Number of results, either shared or one value per query
+            language_filter: Language filter, either shared or one value per query
+            min_score: Minimum similarity score, either shared or one value per query
+            mode: Search mode (see SEARCH_MODES), either shared or one value per query
+            encode_batch_size: Number of queries per encoder forward pass
+            
+        Returns:
+            One list of similar articles per query, in input order
+        """
+        if not self.index_ready:
             raise ValueError("Build index first using build_index()")
         
-        # Encode query
-        query_embedding = self.model.encode(query, normalize_embeddings=True)
-        query_embedding = query_embedding.reshape(1, -1)
+        if not queries:
+            return []
         
-        # Search
-        scores, indices = self.index.search(query_embedding.astype('float32'), k=top_k * 3)  # Get more candidates
+        top_ks = _per_query(top_k, len(queries))
+        language_filters = _per_query(language_filter, len(queries))
+        min_scores = _per_query(min_score, len(queries))
+        modes = _per_query(mode, len(queries))
+        for query_mode in set(modes):
+            if query_mode not in SEARCH_MODES:
+                raise ValueError(f"Unknown search mode '{query_mode}', expected one of {SEARCH_MODES}")
         
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            # Skip results below minimum score
-            if score < min_score:
-                continue
-                
-            if idx < len(self.df):
-                row = self.df.iloc[idx]
-                
-                # Apply language filter
-                if language_filter and row['language'] != language_filter:
-                    continue
-                
-                results.append({
-                    'id': int(row['id']),
-                    'article_label': row['article_label'],
-                    'article_text': row['article_text'],  # Keep full text for API
-                    'language': row['language'],
-                    'similarity_score': float(score)
-                })
-                
-                if len(results) >= top_k:
-                    break
+        # Lexical fast path: lexical queries, and article-number or quoted-phrase
+        # queries in hybrid mode, never reach the encoder
+        results = [None] * len(queries)
+        if set(modes) != {'semantic'}:
+            with stage('lexical'):
+                for i, query_mode in enumerate(modes):
+                    if query_mode == 'lexical':
+                        results[i] = self.lexical_search(queries[i], top_ks[i], language_filters[i], min_scores[i])
+                    elif query_mode == 'hybrid':
+                        results[i] = self._lexical_fast_path(queries[i], top_ks[i], language_filters[i],
+                                                             min_scores[i])
+        
+        to_encode = [i for i in range(len(queries)) if results[i] is None]
+        if not to_encode:
+            return results
+        
+        # Encode in chunks, then search with the full query matrix
+        query_embeddings = self.encode_queries([queries[i] for i in to_encode], batch_size=encode_batch_size)
+        
+        # Serve repeated (embedding, params) combinations from the result cache
+        cache_keys = {}
+        pending = []
+        hybrid = []
+        for position, i in enumerate(to_encode):
+            key = (query_embeddings[position].tobytes(), top_ks[i], language_filters[i], min_scores[i], modes[i])
+            if modes[i] == 'hybrid':
+                # BM25 scores depend on the query text, not only its embedding
+                key += (queries[i],)
+            cache_keys[i] = key
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                results[i] = [dict(result) for result in cached]
+            elif modes[i] == 'hybrid':
+                hybrid.append((position, i))
+            else:
+                pending.append((position, i))
+        
+        if pending:
+            found = self.search_embeddings(
+                query_embeddings[[position for position, _ in pending]],
+                top_k=[top_ks[i] for _, i in pending],
+                language_filter=[language_filters[i] for _, i in pending],
+                min_score=[min_scores[i] for _, i in pending]
+            )
+            for (_, i), result in zip(pending, found):
+                results[i] = result
+        
+        for position, i in hybrid:
+            results[i] = self._hybrid_search(queries[i], query_embeddings[position], top_ks[i], language_filters[i],
+                                             min_scores[i])
+        
+        for _, i in pending + hybrid:
+            self.result_cache.put(cache_keys[i], [dict(item) for item in results[i]])
+        
+        return results
+    
+    def _result(self, position: int, score: float) -> dict:
+        article = self._article(position)
+        article['similarity_score'] = score
+        return article
+    
+    def _lexical_indexes_for(self, language_filter: str = None) -> list:
+        if language_filter:
+            return [self.lexical_indexes[language_filter]] if language_filter in self.lexical_indexes else []
+        return list(self.lexical_indexes.values())
+    
+    @staticmethod
+    def needs_encoder(query: str, mode: str = 'semantic') -> bool:
+        """Whether a search in this mode encodes the query (lexical and fast-path queries do not)"""
+        if mode == 'lexical':
+            return False
+        if mode == 'hybrid':
+            if ARTICLE_QUERY_PATTERN.match(query):
+                return False
+            if PHRASE_PATTERN.search(query) and not PHRASE_PATTERN.sub('', query).strip():
+                return False
+        return True
+    
+    def _lexical_fast_path(self, query: str, top_k: int, language_filter: str = None,
+                           min_score: float = 0.0) -> List[dict]:
+        """
+        Answer article-number and quoted-phrase queries from lookups and the inverted index
+        
+        Returns:
+            Results, or None if the query is neither kind
+        """
+        match = ARTICLE_QUERY_PATTERN.match(query)
+        if match:
+            rows = self._rows_by_article_number.get(int(match.group(1)), [])
+            if language_filter:
+                rows = [row for row in rows if self._languages[row] == language_filter]
+            return [self._result(row, 1.0) for row in rows[:top_k]]
+        
+        phrases = PHRASE_PATTERN.findall(query)
+        if phrases and not PHRASE_PATTERN.sub('', query).strip():
+            return self._phrase_search([tokenize(phrase) for phrase in phrases], top_k, language_filter, min_score)
+        
+        return None
+    
+    def _phrase_search(self, phrases: List[List[str]], top_k: int, language_filter: str = None,
+                       min_score: float = 0.0) -> List[dict]:
+        """Articles containing every phrase verbatim (after tokenization), ranked by BM25"""
+        tokens = [token for phrase in phrases for token in phrase]
+        found = []
+        for lexical in self._lexical_indexes_for(language_filter):
+            # Postings narrow the candidates; the phrase check only tokenizes those
+            candidates = [
+                doc for doc in lexical.documents_with_all(tokens).tolist()
+                if all(contains_phrase(tokenize(self._article_text(lexical.rows[doc])), phrase) for phrase in phrases)
+            ]
+            if candidates:
+                found.extend(zip(*lexical.search(tokens, top_k, np.array(candidates))))
+        return self._rank_lexical(found, top_k, min_score)
+    
+    def _rank_lexical(self, found: list, top_k: int, min_score: float) -> List[dict]:
+        """Sort (row, BM25 score) pairs, scaling scores so the best hit is 1.0"""
+        if not found:
+            return []
+        found.sort(key=lambda item: -item[1])
+        best = float(found[0][1])
+        results = [self._result(int(row), float(score) / best) for row, score in found[:top_k]]
+        return [result for result in results if result['similarity_score'] >= min_score]
+    
+    def _article_text(self, position: int) -> str:
+        """Text indexed for an article (label and text, as embedded)"""
+        label, text = self._labels[position], self._texts[position]
+        return f"{label if isinstance(label, str) else ''}. {text if isinstance(text, str) else ''}"
+    
+    def corpus_texts(self) -> List[str]:
+        """Indexed text of every row, as article_texts() builds it from the DataFrame"""
+        return [self._article_text(position) for position in range(len(self._labels))]
+    
+    def corpus_frame(self) -> pd.DataFrame:
+        """The corpus DataFrame with its 'article_text' column, restored from the mapped blob if needed"""
+        if 'article_text' in self.df:
+            return self.df
+        return self.df.assign(article_text=[text or np.nan for text in self._texts])
+    
+    def lexical_search(self, query: str, top_k: int = 5, language_filter: str = None,
+                       min_score: float = 0.0) -> List[dict]:
+        """
+        BM25 search without the encoder
+        
+        Article-number and quoted-phrase queries use the fast path. Scores are
+        BM25 scaled so the best hit is 1.0; without a language filter each
+        language is scored by its own index and the hits are merged.
+        
+        Args:
+            query: Search query text
+            top_k: Number of results to return
+            language_filter: Filter by language ('rw', 'en', 'fr') or None for all
+            min_score: Minimum scaled score (0.0-1.0)
+            
+        Returns:
+            List of matching articles with scores
+        """
+        results = self._lexical_fast_path(query, top_k, language_filter, min_score)
+        if results is not None:
+            return results
+        
+        tokens = tokenize(query)
+        found = []
+        for lexical in self._lexical_indexes_for(language_filter):
+            found.extend(zip(*lexical.search(tokens, top_k)))
+        return self._rank_lexical(found, top_k, min_score)
+    
+    def _hybrid_search(self, query: str, query_embedding: np.ndarray, top_k: int, language_filter: str = None,
+                       min_score: float = 0.0) -> List[dict]:
+        """
+        Fuse the semantic ranking with per-language BM25 rankings (reciprocal-rank fusion)
+        
+        Results are ordered by fused rank but report the cosine similarity, so
+        min_score keeps its meaning across modes.
+        """
+        depth = max(top_k, HYBRID_CANDIDATES)
+        with stage('index_search'):
+            _, indices = self._search_index(query_embedding.reshape(1, -1), depth, language_filter)
+        semantic = [row for row in indices[0].tolist() if row >= 0 and self._language_codes[row] >= 0]
+        if language_filter:
+            semantic = [row for row in semantic if self._languages[row] == language_filter]
+        
+        with stage('lexical'):
+            tokens = tokenize(query)
+            lexical = [index.search(tokens, depth)[0].tolist() for index in self._lexical_indexes_for(language_filter)]
+        
+        with stage('materialize'):
+            fused = reciprocal_rank_fusion([semantic, *lexical])
+            rows = np.array(sorted(fused, key=lambda row: -fused[row]), dtype='int64')
+            if len(rows) == 0:
+                return []
+            cosine = np.asarray(self.embeddings[rows], dtype='float32') @ query_embedding
+            keep = np.flatnonzero(cosine >= min_score)[:top_k]
+            return [self._result(row, score) for row, score in zip(rows[keep].tolist(), cosine[keep].tolist())]
+    
+    def search_embeddings(self, query_embeddings: np.ndarray, top_k=5, language_filter=None,
+                          min_score=0.0) -> List[List[dict]]:
+        """
+        Search with already-encoded queries (no encoder or result cache involved)
+        
+        Args:
+            query_embeddings: float32 matrix of normalized query embeddings
+            top_k: Number of results, either shared or one value per query
+            language_filter: Language filter, either shared or one value per query
+            min_score: Minimum similarity score, either shared or one value per query
+            
+        Returns:
+            One list of similar articles per query, in input order
+        """
+        n = len(query_embeddings)
+        top_ks = _per_query(top_k, n)
+        language_filters = _per_query(language_filter, n)
+        min_scores = _per_query(min_score, n)
+        
+        # Group queries by language so filtered queries scan only their language's index
+        groups = {}
+        for i in range(n):
+            groups.setdefault(language_filters[i], []).append(i)
+        
+        results = [None] * n
+        for language_filter, group in groups.items():
+            group_top_ks = [top_ks[i] for i in group]
+            with stage('index_search'):
+                scores, indices = self._search_index(query_embeddings[group], max(group_top_ks), language_filter)
+            with stage('materialize'):
+                found = self._materialize(scores, indices, group_top_ks, language_filter,
+                                          [min_scores[i] for i in group])
+            for i, result in zip(group, found):
+                results[i] = result
         
         return results
     
+    def storage_stats(self) -> dict:
+        """
+        Memory footprint per vector and recall of the index against exact search
+        
+        Recall@10 is measured once per index build, using up to 200 stored
+        embeddings as queries and exact inner product as ground truth; the
+        first call runs those searches, so call it off the event loop.
+        """
+        if self._storage_stats is not None:
+            return self._storage_stats
+        
+        n, dimension = self.embeddings.shape
+        index_bytes = sum(index_nbytes(index) for index, _ in self.language_indexes.values())
+        
+        # Blank rows are in no index, so they are neither queries nor ground truth
+        indexed = self.article_positions()
+        rng = np.random.default_rng(0)
+        sample = rng.choice(indexed, size=min(200, len(indexed)), replace=False)
+        queries = self.embeddings[sample].astype('float32')
+        k = min(10, len(indexed))
+        
+        exact = queries @ self.embeddings[indexed].astype('float32').T
+        truth = indexed[np.argsort(-exact, axis=1)[:, :k]]
+        _, found = self._search_index(queries, k)
+        recall = np.mean([len(set(t) & set(f)) / k for t, f in zip(truth, found)])
+        
+        self._storage_stats = {
+            'vector_storage': self.vector_storage,
+            'rescore_factor': self.rescore_factor,
+            'embedding_dtype': str(self.embeddings.dtype),
+            'embedding_bytes_per_vector': int(self.embeddings.itemsize * dimension),
+            'index_bytes_per_vector': round(index_bytes / n, 1),
+            'recall_at_10': round(float(recall), 4)
+        }
+        return self._storage_stats
+    
+    def cache_stats(self) -> dict:
+        """Hit/miss counters for the query embedding and result caches"""
+        return {
+            'embedding_cache': self.embedding_cache.stats(),
+            'result_cache': self.result_cache.stats()
+        }
+    
+    def build_lookups(self):
+        """
+        Build constant-time lookup tables over the loaded corpus
+        
+        - article columns as tuples and language codes as a numpy array
+        - (article_id, language) -> row position
+        - row -> translation group, and group -> {language: row position}
+        - language -> per-group target row array for vectorized cross-lingual search
+        """
+        ids = self.df['id'].tolist()
+        languages = self.df['language'].tolist()
+        
+        # Array-backed article columns used to materialize results without pandas
+        self._ids = tuple(int(article_id) if article_id == article_id else None for article_id in ids)
+        self._labels = tuple(self.df['article_label'].tolist())
+        # Bundles loaded with mmap_text keep the article text in the mapped blob
+        if 'article_text' in self.df:
+            self._texts = tuple(self.df['article_text'].tolist())
+        self._languages = tuple(languages)
+        self._language_code = {
+            language: code for code, language in enumerate(sorted({l for l in languages if isinstance(l, str)}))
+        }
+        self._language_codes = np.array([self._language_code.get(l, -1) for l in languages], dtype='int16')
+        
+        self._row_by_id_language = {}
+        self._row_by_id = {}
+        for position, (article_id, language) in enumerate(zip(self._ids, languages)):
+            if article_id is None:
+                continue
+            self._row_by_id_language.setdefault((article_id, language), position)
+            self._row_by_id.setdefault(article_id, position)
+        
+        # Article number (first number in the label) -> rows, for 'Article N' queries
+        self._rows_by_article_number = {}
+        for position, label in enumerate(self._labels):
+            match = ARTICLE_NUMBER_PATTERN.search(label) if isinstance(label, str) else None
+            if match:
+                self._rows_by_article_number.setdefault(int(match.group(1)), []).append(position)
+        
+        # Translation groups: rows with the same article number/occurrence across languages
+        group_ids = {}
+        self.group_of_row = np.full(len(self.df), -1, dtype='int64')
+        self.group_rows = []
+        for position, key in enumerate(article_group_keys(self._labels, languages)):
+            if key is None:
+                continue
+            group = group_ids.setdefault(key, len(group_ids))
+            if group == len(self.group_rows):
+                self.group_rows.append({})
+            self.group_rows[group].setdefault(languages[position], position)
+            self.group_of_row[position] = group
+        
+        self._group_target_rows = {}
+        for group, rows in enumerate(self.group_rows):
+            for language, position in rows.items():
+                target = self._group_target_rows.setdefault(language, np.full(len(self.group_rows), -1, dtype='int64'))
+                target[group] = position
+        
+        # Cross-lingual search depth: rows per group, and per target language the
+        # indexed rows that cannot yield a result (no group, or no target row)
+        grouped = self.group_of_row[self.group_of_row >= 0]
+        self._max_group_rows = int(np.bincount(grouped).max()) if len(grouped) else 0
+        groups = self.group_of_row[self.article_positions()]
+        self._cross_lingual_dead_rows = {
+            language: int(np.count_nonzero((groups < 0) | (target[np.maximum(groups, 0)] < 0)))
+            for language, target in self._group_target_rows.items()
+        }
+    
+    def _article(self, position: int) -> dict:
+        return {
+            'id': self._ids[position],
+            'article_label': self._labels[position],
+            'article_text': self._texts[position],
+            'language': self._languages[position]
+        }
+    
+    def _translation_rows(self, article_id: int) -> dict:
+        """{language: row position} for every language version of an article"""
+        position = self._row_by_id.get(article_id)
+        if position is None:
+            return {}
+        group = self.group_of_row[position]
+        if group < 0:
+            return {self._languages[position]: position}
+        return self.group_rows[group]
+    
+    def get_article(self, article_id: int, language: str) -> dict:
+        """
+        Get one language version of an article
+        
+        Args:
+            article_id: ID of the article (any of its language versions)
+            language: Language version to return
+            
+        Returns:
+            Article dict, or None if there is no such article/language
+        """
+        if self.df is None:
+            raise ValueError("Load data first")
+        
+        position = self._row_by_id_language.get((article_id, language))
+        if position is None:
+            position = self._translation_rows(article_id).get(language)
+        return self._article(position) if position is not None else None
+    
     def find_translation(self, article_id: int) -> List[dict]:
         """
         Find translations of an article across languages
@@ -144,74 +1032,124 @@ class LegalSemanticSearch:
         if self.df is None:
             raise ValueError("Load data first")
         
-        # Get the article
-        article = self.df[self.df['id'] == article_id]
-        if len(article) == 0:
-            return []
+        return [self._article(position) for position in sorted(self._translation_rows(article_id).values())]
+    
+    def article_positions(self, language: str = None) -> np.ndarray:
+        """Row positions of all articles, or of one language, in corpus order (blank rows excluded)"""
+        if language is None:
+            return np.flatnonzero(self._language_codes >= 0)
+        return np.flatnonzero(self._language_codes == self._language_code.get(language, -2))
+    
+    def article_neighbours(self, positions, top_k: int = 5, language_filter: str = None,
+                           min_score: float = 0.0) -> List[dict]:
+        """
+        Look up articles by row position together with their nearest neighbours
         
-        # Find all articles with same id (they are translations)
-        translations = self.df[self.df['id'] == article_id]
+        Stored article embeddings are used as queries, so nothing is encoded.
         
-        results = []
-        for idx, row in translations.iterrows():
-            results.append({
-                'id': int(row['id']),
-                'article_label': row['article_label'],
-                'article_text': row['article_text'],
-                'language': row['language']
-            })
+        Args:
+            positions: Row positions of the articles
+            top_k: Number of neighbours per article (the article itself is excluded)
+            language_filter: Restrict neighbours to one language
+            min_score: Minimum neighbour similarity score
+            
+        Returns:
+            One article dict per position, with a 'neighbours' list of similar articles
+        """
+        positions = np.asarray(positions, dtype='int64')
+        articles = [self._article(position) for position in positions.tolist()]
+        if top_k <= 0 or len(positions) == 0:
+            return [{**article, 'neighbours': []} for article in articles]
         
-        return results
+        query_embeddings = np.asarray(self.embeddings[positions], dtype='float32')
+        found = self.search_embeddings(query_embeddings, top_k + 1, language_filter, min_score)
+        for article, neighbours in zip(articles, found):
+            article['neighbours'] = [n for n in neighbours if n['id'] != article['id']][:top_k]
+        return articles
     
-    def search_cross_lingual(self, query: str, target_language: str = 'en', min_score: float = 0.0) -> List[dict]:
+    def search_cross_lingual(self, query: str, target_language: str = 'en', min_score: float = 0.0,
+                             top_k: int = 5) -> List[dict]:
         """
         Search in any language, return results in target language
         
+        Each translation group is scored by its best-matching language version
+        (max-pooling over the group's vectors), and the group's target-language
+        row is returned. Candidates come from the per-language FAISS indexes
+        (re-scored when rescore_factor is set): the best row of the top_k-th
+        group ranks below at most (top_k - 1) rows per group of better groups,
+        plus rows that yield no result (ungrouped, or in a group without a
+        target-language row). Fetching that many candidates (at least
+        CROSS_LINGUAL_CANDIDATES) returns the same groups as scoring every
+        indexed row.
+        
         Args:
             query: Search query in any language
             target_language: Language for results ('rw', 'en', 'fr')
             min_score: Minimum similarity score for filtering
+            top_k: Number of results to return
             
         Returns:
             List of similar articles in target language
         """
-        # Search across all languages
-        all_results = self.search(query, top_k=20, language_filter=None, min_score=min_score)
+        if not self.index_ready:
+            raise ValueError("Build index first using build_index()")
         
-        # Group by article ID and find translations
-        found_ids = set()
-        target_results = []
+        target_rows = self._group_target_rows.get(target_language)
+        if target_rows is None:
+            return []
         
-        for result in all_results:
-            article_id = result['id']
-            if article_id not in found_ids:
-                # Find translation in target language
-                translations = self.find_translation(article_id)
-                
-                for trans in translations:
-                    if trans['language'] == target_language:
-                        trans['similarity_score'] = result['similarity_score']
-                        target_results.append(trans)
-                        found_ids.add(article_id)
-                        break
+        query_embeddings = self.encode_queries([query])
+        depth = max((top_k - 1) * self._max_group_rows + 1 + self._cross_lingual_dead_rows[target_language],
+                    CROSS_LINGUAL_CANDIDATES)
+        with stage('index_search'):
+            scores, rows = self._search_index(query_embeddings, depth)
         
-        return target_results[:5]
+        with stage('materialize'):
+            # Max-pool row scores into their translation groups: candidates are
+            # sorted by score, so a group's first row is its best
+            scores, rows = scores[0], rows[0]
+            keep = rows >= 0
+            groups = self.group_of_row[rows[keep]]
+            scores = scores[keep]
+            grouped = groups >= 0
+            groups, first = np.unique(groups[grouped], return_index=True)
+            group_scores = scores[grouped][first]
+            
+            valid = (target_rows[groups] >= 0) & (group_scores >= min_score)
+            groups, group_scores = groups[valid], group_scores[valid]
+            order = np.argsort(-group_scores, kind='stable')[:top_k]
+            
+            results = []
+            for group, score in zip(groups[order].tolist(), group_scores[order].tolist()):
+                article = self._article(target_rows[group])
+                article['similarity_score'] = score
+                results.append(article)
+        return results
     
     def save_model(self, filepath='legal_search_model.pkl'):
         """Save the model and data"""
         print(f"Saving model to {filepath}...")
         
         data_to_save = {
-            'df': self.df,
+            'df': self.corpus_frame(),
             'embeddings': self.embeddings,
-            'model_name': self.model.get_sentence_embedding_dimension()
+            'model_name': self.model_name,
+            'embedding_dimension': self.embeddings.shape[1],
+            'language_rows': {lang: rows for lang, (_, rows) in self.language_indexes.items()},
+            'lexical_indexes': {lang: index.to_arrays() for lang, index in self.lexical_indexes.items()},
+            'index_config': {
+                'index_type': self.index_type,
+                'index_params': self.index_params,
+                'vector_storage': self.vector_storage
+            }
         }
         
         with open(filepath, 'wb') as f:
             pickle.dump(data_to_save, f)
         
-        # Save FAISS index separately
-        faiss.write_index(self.index, 'legal_search_index.faiss')
+        # Save FAISS indexes separately
+        for language, (index, _) in self.language_indexes.items():
+            faiss.write_index(index, f'legal_search_index.{language}.faiss')
         print("Model saved successfully")
     
     def load_model(self, filepath='legal_search_model.pkl'):
@@ -223,11 +1161,120 @@ class LegalSemanticSearch:
         
         self.df = data['df']
         self.embeddings = data['embeddings']
+        self.build_lookups()
+        
+        # Saved index type and params; knobs passed to this instance take precedence
+        index_config = data.get('index_config', {'index_type': 'flat', 'index_params': {}})
+        self.index_type = index_config['index_type']
+        self.vector_storage = index_config.get('vector_storage', 'float32')
+        self.index_params = {**DEFAULT_INDEX_PARAMS, **index_config['index_params'], **self._index_param_overrides}
         
-        # Load FAISS index
-        self.index = faiss.read_index('legal_search_index.faiss')
+        # Load per-language indexes, rebuilding them for artifacts saved without them
+        # (their combined legal_search_index.faiss is no longer used)
+        language_rows = data.get('language_rows')
+        if language_rows and all(os.path.exists(f'legal_search_index.{lang}.faiss') for lang in language_rows):
+            self.language_indexes = {
+                lang: (faiss.read_index(f'legal_search_index.{lang}.faiss'), rows)
+                for lang, rows in language_rows.items()
+            }
+        else:
+            self.build_language_indexes()
+        
+        # BM25 indexes (rebuilt for artifacts saved without them)
+        if data.get('lexical_indexes'):
+            self.lexical_indexes = {
+                lang: BM25Index.from_arrays(arrays) for lang, arrays in data['lexical_indexes'].items()
+            }
+        else:
+            self.build_lexical_indexes()
+        
+        for index, _ in self.language_indexes.values():
+            set_search_params(index, self.index_params)
+        
+        self.result_cache.clear()
+        self._storage_stats = None
         print("Model loaded successfully")
 
+    
+    def save_bundle(self, bundle_dir='legal_search_bundle'):
+        """
+        Save the model artifacts as a new version of a memory-mappable bundle
+        
+        Args:
+            bundle_dir: Bundle root directory (created if missing)
+            
+        Returns:
+            Path of the written version directory
+        """
+        if not self.index_ready:
+            raise ValueError("Build index first using build_index()")
+        
+        print(f"Saving index bundle to {bundle_dir}...")
+        manifest = index_bundle.write_bundle(
+            bundle_dir,
+            self.corpus_frame(),
+            self.embeddings,
+            self.language_indexes,
+            lexical_indexes={lang: index.to_arrays() for lang, index in self.lexical_indexes.items()},
+            manifest={
+                'model_name': self.model_name,
+                'index_type': self.index_type,
+                'index_params': self.index_params,
+                'vector_storage': self.vector_storage
+            }
+        )
+        self.bundle_manifest = manifest
+        version_dir = os.path.join(bundle_dir, manifest['version'])
+        print(f"Bundle saved to {version_dir}")
+        return version_dir
+    
+    def load_bundle(self, bundle_dir='legal_search_bundle', mmap_text=False):
+        """
+        Load the active version of an index bundle, memory-mapping its files
+        
+        Args:
+            bundle_dir: Bundle root directory
+            mmap_text: Serve article text straight from the mapped blob, decoded
+                per result, instead of a private copy; processes on one host then
+                share it through the page cache. self.df has no 'article_text'
+                column in this mode.
+        """
+        print(f"Loading index bundle from {bundle_dir}...")
+        bundle = index_bundle.read_bundle(bundle_dir)
+        manifest = bundle['manifest']
+        
+        if manifest['model_name'] != self.model_name:
+            print(f"Warning: bundle was built with {manifest['model_name']}, encoder is {self.model_name}")
+        
+        ids = np.asarray(bundle['ids'])
+        columns = {
+            column: [value or np.nan for value in values]
+            for column, values in bundle['columns'].items()
+            if not (mmap_text and column == 'article_text')
+        }
+        self.df = pd.DataFrame({'id': np.where(ids < 0, np.nan, ids), **columns})
+        if mmap_text:
+            self._texts = bundle['columns']['article_text']
+        self.build_lookups()
+        self.embeddings = bundle['embeddings']
+        self.language_indexes = bundle['language_indexes']
+        if bundle['lexical_indexes']:
+            self.lexical_indexes = {
+                lang: BM25Index.from_arrays(arrays) for lang, arrays in bundle['lexical_indexes'].items()
+            }
+        else:
+            self.build_lexical_indexes()
+        
+        self.index_type = manifest['index_type']
+        self.vector_storage = manifest['vector_storage']
+        self.index_params = {**DEFAULT_INDEX_PARAMS, **manifest['index_params'], **self._index_param_overrides}
+        for index, _ in self.language_indexes.values():
+            set_search_params(index, self.index_params)
+        
+        self.bundle_manifest = manifest
+        self.result_cache.clear()
+        self._storage_stats = None
+        print(f"Bundle {manifest['version']} loaded ({manifest['num_articles']} articles)")
 
 def demonstrate_usage():
     """Demonstrate the usage of the legal search model"""
@@ -284,7 +1331,7 @@ def demonstrate_usage():
         print(f"   Similarity: {result['similarity_score']:.4f}")
     
     # Save model for future use
-    search_model.save_model()
+    search_model.save_bundle()
     
     print("\n" + "=" * 80)
     print("Model saved! You can now load it faster next time.")
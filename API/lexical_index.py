@@ -0,0 +1,186 @@
+"""
+BM25 inverted index for lexical retrieval
+Complements embedding search for exact terms: article numbers, Kinyarwanda
+legal vocabulary and rare proper nouns
+"""
+
+import re
+import unicodedata
+from typing import Dict, List
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Constant of reciprocal-rank fusion (rank r contributes 1 / (RRF_K + r))
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-folded word tokens ('Génocide' and 'genocide' match)"""
+    if not isinstance(text, str):
+        return []
+    folded = unicodedata.normalize('NFKD', text.lower())
+    folded = ''.join(c for c in folded if not unicodedata.combining(c))
+    return TOKEN_PATTERN.findall(folded)
+
+
+def contains_phrase(tokens: List[str], phrase: List[str]) -> bool:
+    """True if phrase occurs as a contiguous token sequence in tokens"""
+    n = len(phrase)
+    if n == 0:
+        return True
+    first = phrase[0]
+    return any(tokens[i:i + n] == phrase for i in range(len(tokens) - n + 1) if tokens[i] == first)
+
+
+def reciprocal_rank_fusion(rankings: List, k: int = RRF_K) -> Dict[int, float]:
+    """
+    Fuse several ranked lists of row positions
+
+    Args:
+        rankings: Lists of row positions, best first
+        k: RRF constant
+
+    Returns:
+        {row position: fused score}
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank + 1)
+    return fused
+
+
+class BM25Index:
+    """
+    Okapi BM25 over one language's articles, stored as CSR postings.
+
+    Document i of the index is corpus row rows[i]; search results are
+    returned as corpus row positions.
+    """
+
+    def __init__(self, terms: np.ndarray, indptr: np.ndarray, doc_ids: np.ndarray, term_freqs: np.ndarray,
+                 doc_lengths: np.ndarray, rows: np.ndarray, k1: float = 1.5, b: float = 0.75):
+        self.terms = terms
+        self.term_ids = {term: i for i, term in enumerate(terms.tolist())}
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.rows = rows
+        self.k1 = float(k1)
+        self.b = float(b)
+
+        num_docs = len(doc_lengths)
+        doc_freqs = np.diff(indptr)
+        self.idf = np.log1p((num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype('float32')
+        avg_length = doc_lengths.mean() if num_docs else 1.0
+        # Per-document length normalization term of the BM25 denominator
+        self._length_norm = (self.k1 * (1 - self.b + self.b * doc_lengths / max(avg_length, 1e-9))).astype('float32')
+
+    @classmethod
+    def build(cls, texts: List[str], rows: np.ndarray, k1: float = 1.5, b: float = 0.75) -> 'BM25Index':
+        """
+        Build the index from article texts
+
+        Args:
+            texts: Text of each document
+            rows: Corpus row position of each document
+            k1: Term frequency saturation
+            b: Length normalization strength
+        """
+        postings = {}
+        doc_lengths = np.zeros(len(texts), dtype='float32')
+        for doc, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[doc] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                postings.setdefault(token, []).append((doc, count))
+
+        terms = sorted(postings)
+        indptr = np.zeros(len(terms) + 1, dtype='int64')
+        np.cumsum([len(postings[term]) for term in terms], out=indptr[1:])
+        doc_ids = np.fromiter((doc for term in terms for doc, _ in postings[term]), dtype='int32', count=indptr[-1])
+        term_freqs = np.fromiter((tf for term in terms for _, tf in postings[term]), dtype='float32', count=indptr[-1])
+
+        return cls(np.array(terms, dtype=str), indptr, doc_ids, term_freqs, doc_lengths,
+                   np.asarray(rows, dtype='int64'), k1, b)
+
+    def to_arrays(self) -> dict:
+        """Arrays for persistence (np.savez / pickle)"""
+        return {
+            'terms': self.terms,
+            'indptr': self.indptr,
+            'doc_ids': self.doc_ids,
+            'term_freqs': self.term_freqs,
+            'doc_lengths': self.doc_lengths,
+            'rows': self.rows,
+            'params': np.array([self.k1, self.b], dtype='float64')
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict) -> 'BM25Index':
+        k1, b = np.asarray(arrays['params']).tolist()
+        return cls(np.asarray(arrays['terms']), np.asarray(arrays['indptr']), np.asarray(arrays['doc_ids']),
+                   np.asarray(arrays['term_freqs']), np.asarray(arrays['doc_lengths']), np.asarray(arrays['rows']),
+                   k1, b)
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def _postings(self, term: str):
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return None, None, 0.0
+        start, end = self.indptr[term_id], self.indptr[term_id + 1]
+        return self.doc_ids[start:end], self.term_freqs[start:end], self.idf[term_id]
+
+    def scores(self, tokens: List[str]) -> np.ndarray:
+        """BM25 score of every document for the query tokens"""
+        scores = np.zeros(len(self), dtype='float32')
+        for term in set(tokens):
+            docs, tfs, idf = self._postings(term)
+            if docs is None:
+                continue
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + self._length_norm[docs])
+        return scores
+
+    def documents_with_all(self, tokens: List[str]) -> np.ndarray:
+        """Documents containing every token"""
+        docs = None
+        for term in set(tokens):
+            found, _, _ = self._postings(term)
+            if found is None:
+                return np.zeros(0, dtype='int32')
+            docs = found if docs is None else np.intersect1d(docs, found, assume_unique=True)
+        return docs if docs is not None else np.zeros(0, dtype='int32')
+
+    def search(self, tokens: List[str], k: int, candidates: np.ndarray = None):
+        """
+        Top-k documents by BM25
+
+        Args:
+            tokens: Query tokens
+            k: Number of results
+            candidates: Restrict to these document numbers
+
+        Returns:
+            (corpus row positions, BM25 scores), best first, zero scores dropped
+        """
+        scores = self.scores(tokens)
+        if candidates is not None:
+            mask = np.zeros(len(self), dtype=bool)
+            mask[candidates] = True
+            scores = np.where(mask, scores, 0.0)
+
+        k = min(k, len(self))
+        if k <= 0:
+            return np.zeros(0, dtype='int64'), np.zeros(0, dtype='float32')
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        top = top[scores[top] > 0]
+        return self.rows[top], scores[top]
@@ -0,0 +1,262 @@
+"""
+Low-overhead latency instrumentation for the search pipeline
+Monotonic stage timers, counters and histograms rendered in the Prometheus
+text exposition format, with no client library dependency
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+# Latency buckets in seconds: 100µs up to 10s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+
+def _label_text(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if isinstance(value, bool):
+        return str(int(value))
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing count per label combination"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple([labels[name] for name in self.labelnames])
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_label_text(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram per label combination.
+
+    observe() is a bisect and two additions under a lock (a couple of
+    microseconds), cheap enough to stay enabled in production.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., +Inf count], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple([labels[name] for name in self.labelnames])
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], dict]:
+        """Per label combination: count, sum and non-cumulative bucket counts"""
+        with self._lock:
+            return {key: {'counts': list(counts), 'sum': total, 'count': sum(counts)}
+                    for key, (counts, total) in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in self.snapshot().items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series['counts']):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {_number(series['sum'])}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {series['count']}")
+        return lines
+
+
+class Registry:
+    """Metrics rendered together on /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def render_values(values: List[Tuple[str, str, Dict[str, str], float]], kind: str = 'gauge') -> str:
+    """
+    Render values read at scrape time from existing stats (cache sizes, queue depth, index size)
+
+    Args:
+        values: (name, help, labels, value) tuples; samples of one name must be adjacent
+        kind: Prometheus metric type ('gauge', or 'counter' for running totals)
+
+    Returns:
+        Prometheus text lines
+    """
+    lines = []
+    previous = None
+    for name, documentation, labels, value in values:
+        if value is None:
+            continue
+        if name != previous:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            previous = name
+        lines.append(f"{name}{_label_text(tuple(labels), tuple(labels.values()))} {_number(value)}")
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'legal_search_stage_seconds',
+    'Time per search pipeline stage (encode includes tokenize)',
+    ('stage',)
+)
+
+# Per-thread stage totals of the call being collected (see collect_stages)
+_local = threading.local()
+
+
+class StageTimer:
+    """
+    Context manager timing a pipeline stage with the monotonic clock
+
+    The duration is added to the stage histogram and, when the current thread
+    is inside collect_stages(), to that call's per-stage totals. A plain class
+    rather than a generator keeps the overhead to a few microseconds.
+    """
+
+    __slots__ = ('name', 'start', 'seconds')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.0
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = self.seconds = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(seconds, stage=self.name)
+        totals = getattr(_local, 'totals', None)
+        if totals is not None:
+            totals[self.name] = totals.get(self.name, 0.0) + seconds
+        return False
+
+
+def stage(name: str) -> StageTimer:
+    """Time the enclosed code as a pipeline stage: with stage('encode'): ..."""
+    return StageTimer(name)
+
+
+@contextmanager
+def collect_stages():
+    """
+    Collect the stage durations of the enclosed code on this thread into a dict of seconds
+
+    Nested collections also count towards the enclosing one.
+    """
+    previous = getattr(_local, 'totals', None)
+    totals = _local.totals = {}
+    try:
+        yield totals
+    finally:
+        _local.totals = previous
+        if previous is not None:
+            for name, seconds in totals.items():
+                previous[name] = previous.get(name, 0.0) + seconds
+
+
+def run_with_stages(func: Callable, *args, **kwargs):
+    """Call func, returning (result, {stage: seconds}) for the stages it ran"""
+    with collect_stages() as totals:
+        result = func(*args, **kwargs)
+    return result, totals
+
+
+def stages_ms(totals: Dict[str, float]) -> Dict[str, float]:
+    """Stage seconds as rounded milliseconds"""
+    return {name: round(seconds * 1000, 3) for name, seconds in totals.items()}
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting HTTP requests and their latency by route template and status
+
+    Unmatched paths share one 'unmatched' label so scanners cannot blow up
+    the label cardinality.
+    """
+
+    def __init__(self, app, requests: Counter, latency: Histogram):
+        self.app = app
+        self.requests = requests
+        self.latency = latency
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            self.requests.inc(method=scope['method'], route=route, status=status['code'])
+            self.latency.observe(time.perf_counter() - start, method=scope['method'], route=route)
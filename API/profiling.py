@@ -0,0 +1,264 @@
+"""
+On-demand profiling for a live search worker
+A dependency-free sampling profiler, per-request trace mode (Server-Timing
+header) and a rate-limited slow-query log
+"""
+
+import collections
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import orjson
+
+# Leaf frames of threads parked waiting for work (idle executor workers, the
+# event loop's selector, condition waits); dropped unless include_idle is set
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('selectors.py', 'select'),
+    ('thread.py', '_worker'),
+    ('queue.py', 'get')
+}
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a capture is requested while another one is running"""
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of all threads at a fixed interval.
+
+    The sampler runs on its own thread and only reads sys._current_frames(),
+    so the profiled code is neither instrumented nor slowed beyond the GIL
+    time of each sample. Only one capture runs at a time.
+    """
+
+    def __init__(self, max_seconds: float = 30.0, min_interval_ms: float = 1.0):
+        """
+        Initialize the profiler.
+
+        Args:
+            max_seconds: Longest allowed capture
+            min_interval_ms: Shortest allowed sampling interval
+        """
+        self.max_seconds = max_seconds
+        self.min_interval = min_interval_ms / 1000.0
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def capture(self, seconds: float, interval_ms: float = 5.0, include_idle: bool = False,
+                thread_prefix: Optional[str] = None, top: int = 25) -> dict:
+        """
+        Sample all threads for a while (blocking)
+
+        Args:
+            seconds: Capture duration (capped at max_seconds)
+            interval_ms: Time between samples
+            include_idle: Keep samples of threads parked waiting for work
+            thread_prefix: Only sample threads whose name starts with this (e.g. 'inference')
+            top: Number of functions in the self/total time summaries
+
+        Returns:
+            Sample counts, the hottest functions by self and total samples, and
+            stacks in collapsed format ('thread;outer;...;leaf count'), which
+            flamegraph.pl and speedscope read directly
+
+        Raises:
+            ProfilerBusyError: If a capture is already running
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile capture is already running")
+        try:
+            return self._capture(min(seconds, self.max_seconds), max(interval_ms / 1000.0, self.min_interval),
+                                 include_idle, thread_prefix, top)
+        finally:
+            self._lock.release()
+
+    def _capture(self, seconds: float, interval: float, include_idle: bool, thread_prefix: Optional[str],
+                 top: int) -> dict:
+        own_thread = threading.get_ident()
+        stacks = collections.Counter()
+        samples = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_thread:
+                    continue
+                name = names.get(ident, str(ident))
+                if thread_prefix and not name.startswith(thread_prefix):
+                    continue
+                stack = _frame_stack(frame)
+                if not include_idle and stack and stack[-1][:2] in IDLE_FRAMES:
+                    continue
+                stacks[(name, tuple(stack))] += 1
+            samples += 1
+            time.sleep(max(0.0, interval - (time.perf_counter() - now)))
+
+        elapsed = time.perf_counter() - start
+        self_counts = collections.Counter()
+        total_counts = collections.Counter()
+        for (_, stack), count in stacks.items():
+            if stack:
+                self_counts[_frame_label(stack[-1])] += count
+            for label in {_frame_label(frame) for frame in stack}:
+                total_counts[label] += count
+
+        return {
+            'seconds': round(elapsed, 3),
+            'interval_ms': round(interval * 1000, 3),
+            'samples': samples,
+            'thread_samples': sum(stacks.values()),
+            'top_self': [{'function': label, 'samples': count} for label, count in self_counts.most_common(top)],
+            'top_total': [{'function': label, 'samples': count} for label, count in total_counts.most_common(top)],
+            'collapsed': [
+                ';'.join([name.replace(';', '_'), *(_frame_label(frame) for frame in stack)]) + f' {count}'
+                for (name, stack), count in stacks.most_common()
+            ]
+        }
+
+
+def _frame_stack(frame) -> List[tuple]:
+    """(file name, function, first line) per frame, outermost first"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((os.path.basename(code.co_filename), code.co_name, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _frame_label(frame: tuple) -> str:
+    filename, function, line = frame
+    return f"{function} ({filename}:{line})"
+
+
+# Stage seconds of the current request (None outside RequestStagesMiddleware)
+request_stages: contextvars.ContextVar = contextvars.ContextVar('request_stages', default=None)
+
+
+def record_stages(stages: Dict[str, float]):
+    """Add stage seconds to the current request's breakdown"""
+    totals = request_stages.get()
+    if totals is not None:
+        for name, seconds in stages.items():
+            totals[name] = totals.get(name, 0.0) + seconds
+
+
+def server_timing(stages: Dict[str, float]) -> str:
+    """Stage seconds as a Server-Timing header value (milliseconds)"""
+    return ', '.join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in stages.items())
+
+
+class RequestStagesMiddleware:
+    """
+    ASGI middleware giving each request a stage breakdown (see record_stages).
+
+    With trace mode enabled, requests sent with the trace header get it back
+    as a Server-Timing response header, plus the time until the response
+    started ('app').
+    """
+
+    def __init__(self, app, trace: bool = True, header: str = 'x-trace'):
+        self.app = app
+        self.trace = trace
+        self.header = header.lower().encode()
+
+    def _traced(self, scope) -> bool:
+        return self.trace and any(name == self.header and value not in (b'', b'0') for name, value in scope['headers'])
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stages = {}
+        token = request_stages.set(stages)
+        respond = send
+
+        if self._traced(scope):
+            async def respond(message):
+                if message['type'] == 'http.response.start':
+                    timing = server_timing({**stages, 'app': time.perf_counter() - start})
+                    message = {**message, 'headers': [*message.get('headers', []),
+                                                      (b'server-timing', timing.encode())]}
+                await send(message)
+
+        try:
+            await self.app(scope, receive, respond)
+        finally:
+            request_stages.reset(token)
+
+
+class SlowQueryLog:
+    """
+    Logs queries slower than a threshold as one JSON line each.
+
+    At most max_per_minute lines are written per minute, so a latency spike
+    cannot flood the logs; the number of suppressed lines is reported with
+    the next one written.
+    """
+
+    def __init__(self, threshold_ms: float, max_per_minute: int = 60,
+                 logger: logging.Logger = None):
+        self.threshold_ms = threshold_ms
+        self.max_per_minute = max_per_minute
+        self.logger = logger or logging.getLogger('legal_search_api.slow_queries')
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._written = 0
+        self._suppressed = 0
+        self.logged = 0
+
+    def observe(self, endpoint: str, elapsed_ms: float, params: dict, stages: Dict[str, float] = None) -> bool:
+        """
+        Log the query if it exceeded the threshold
+
+        Args:
+            endpoint: Request path
+            elapsed_ms: Handler processing time
+            params: Query text, filters and other request parameters
+            stages: Stage seconds of the request
+
+        Returns:
+            True if a line was written
+        """
+        if self.threshold_ms <= 0 or elapsed_ms < self.threshold_ms:
+            return False
+
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 60:
+                self._window_start, self._written = now, 0
+            if self._written >= self.max_per_minute:
+                self._suppressed += 1
+                return False
+            self._written += 1
+            suppressed, self._suppressed = self._suppressed, 0
+            self.logged += 1
+
+        record = {
+            'endpoint': endpoint,
+            'elapsed_ms': round(elapsed_ms, 2),
+            **params,
+            'stages_ms': {name: round(seconds * 1000, 3) for name, seconds in (stages or {}).items()}
+        }
+        if suppressed:
+            record['suppressed'] = suppressed
+        self.logger.warning(orjson.dumps(record).decode())
+        return True
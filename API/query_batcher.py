@@ -0,0 +1,153 @@
+"""
+Dynamic micro-batching for the Legal Semantic Search API
+Groups concurrent search requests into a single encode + index search call
+"""
+
+import asyncio
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from inference_executor import InferenceExecutor, QueueFullError
+from metrics import STAGE_SECONDS, run_with_stages
+
+
+class QueryBatcher:
+    """
+    Collects search requests arriving within a short window and runs them
+    as one LegalSemanticSearch.search_batch() call on the inference executor.
+
+    A batch is flushed when it reaches max_batch_size or when max_wait_ms has
+    passed since its first query arrived, whichever comes first. When the
+    executor is idle the queries already queued are flushed at once, so a
+    lone request does not wait out the window; batches fill up while
+    earlier ones occupy the executor.
+    """
+
+    def __init__(self, executor: InferenceExecutor, get_model: Callable, max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0, max_queued: int = None):
+        """
+        Initialize the batcher.
+
+        Args:
+            executor: Inference executor that runs the batched search
+            get_model: Callable returning the current LegalSemanticSearch instance
+            max_batch_size: Maximum number of queries per encode call
+            max_wait_ms: Maximum time to wait for a batch to fill
+            max_queued: Maximum queries waiting for a batch (default: max_batch_size * executor.max_pending)
+        """
+        self.executor = executor
+        self.get_model = get_model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queued = max_queued or max_batch_size * executor.max_pending
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batch_tasks = set()
+
+        self.batch_sizes = Counter()
+        self.total_batches = 0
+        self.total_queries = 0
+
+    async def start(self):
+        """Start the background batching task"""
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._collect_batches())
+
+    async def stop(self):
+        """Stop batching and wait for in-flight batches"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+
+    async def search(self, query: str, top_k: int = 5, language_filter: str = None, min_score: float = 0.0,
+                     mode: str = 'semantic') -> Tuple[List[dict], Dict[str, float]]:
+        """
+        Queue a query for the next batch and wait for its results.
+
+        Returns:
+            (results, seconds per stage of the batch that ran it, including
+            this query's 'batch_wait' in the queue)
+
+        Raises:
+            QueueFullError: If max_queued queries are already waiting
+        """
+        if self._queue.qsize() >= self.max_queued:
+            self.executor.record_rejection()
+            raise QueueFullError(f"Batch queue full ({self._queue.qsize()}/{self.max_queued})")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, top_k, language_filter, min_score, mode, time.perf_counter(), future))
+        return await future
+
+    async def _collect_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            deadline = loop.time() + self.max_wait
+
+            # Waiting for more queries only pays off while the executor is busy
+            while len(batch) < self.max_batch_size and self.executor.pending > 0:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: list):
+        queries, top_ks, language_filters, min_scores, modes, queued_at, futures = zip(*batch)
+
+        started = time.perf_counter()
+        waits = [started - queued for queued in queued_at]
+        for wait in waits:
+            STAGE_SECONDS.observe(wait, stage='batch_wait')
+
+        self.batch_sizes[len(batch)] += 1
+        self.total_batches += 1
+        self.total_queries += len(batch)
+
+        try:
+            results, stages = await self.executor.run(
+                run_with_stages,
+                self.get_model().search_batch,
+                list(queries),
+                top_k=list(top_ks),
+                language_filter=list(language_filters),
+                min_score=list(min_scores),
+                mode=list(modes)
+            )
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result, wait in zip(futures, results, waits):
+            if not future.done():
+                future.set_result((result, {'batch_wait': wait, **stages}))
+
+    def stats(self) -> dict:
+        """Batching configuration and achieved batch sizes"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "total_batches": self.total_batches,
+            "total_queries": self.total_queries,
+            "avg_batch_size": round(self.total_queries / self.total_batches, 2) if self.total_batches else 0.0,
+            "batch_size_counts": dict(sorted(self.batch_sizes.items()))
+        }
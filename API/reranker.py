@@ -0,0 +1,137 @@
+"""
+Second-stage cross-encoder re-ranking for search results
+Scores (query, article) pairs jointly within a per-request time budget
+"""
+
+import threading
+import time
+from typing import List, Tuple
+
+from metrics import stage
+from query_cache import LRUCache
+from legal_semantic_search import normalize_query
+
+
+class CrossEncoderReranker:
+    """
+    Re-orders bi-encoder candidates with a small local cross-encoder.
+
+    Candidates are scored in batches, best bi-encoder candidates first. Before
+    each batch the remaining budget is compared with the observed batch time:
+    if it no longer fits, re-ranking stops and the unscored candidates keep
+    their bi-encoder order after the scored ones. Pair scores are cached per
+    (query, article).
+    """
+
+    def __init__(self, model_name: str = 'cross-encoder/mmarco-mMiniLMv2-L12-H384-v1', batch_size: int = 8,
+                 max_length: int = 256, cache_size: int = 4096, model=None):
+        """
+        Initialize the re-ranker.
+
+        Args:
+            model_name: CrossEncoder model (multilingual by default)
+            batch_size: Pairs per cross-encoder forward pass
+            max_length: Max tokens per (query, article) pair
+            cache_size: Max cached pair scores (0 disables)
+            model: Already-loaded CrossEncoder to use instead of loading model_name
+        """
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(model_name, max_length=max_length)
+        self.model_name = model_name
+        self.model = model
+        self.batch_size = batch_size
+        self.pair_cache = LRUCache(cache_size)
+
+        self._lock = threading.Lock()
+        self._batch_seconds = None  # Moving average of one batch's latency
+        self.requests = 0
+        self.truncated = 0
+        self.skipped = 0
+
+    def _pair_text(self, result: dict) -> str:
+        return f"{result['article_label']}. {result['article_text']}"
+
+    def _observe(self, seconds: float):
+        with self._lock:
+            if self._batch_seconds is None:
+                self._batch_seconds = seconds
+            else:
+                self._batch_seconds = 0.8 * self._batch_seconds + 0.2 * seconds
+
+    def rerank(self, query: str, results: List[dict], deadline: float = None) -> Tuple[List[dict], dict]:
+        """
+        Re-order results by cross-encoder score
+
+        Args:
+            query: Query text
+            results: Candidates in bi-encoder order
+            deadline: time.monotonic() value by which re-ranking must finish (None = no limit)
+
+        Returns:
+            (re-ordered results, info with scored/cached counts, status and elapsed ms)
+        """
+        start = time.monotonic()
+        self.requests += 1
+        key = normalize_query(query)
+
+        scores = {}
+        for position, result in enumerate(results):
+            cached = self.pair_cache.get((key, result['id']))
+            if cached is not None:
+                scores[position] = cached
+        cached_count = len(scores)
+
+        pending = [position for position in range(len(results)) if position not in scores]
+        status = 'complete'
+        with stage('rerank'):
+            for batch_start in range(0, len(pending), self.batch_size):
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    expected = self._batch_seconds or 0.0
+                    if remaining <= 0 or expected > remaining:
+                        status = 'skipped' if batch_start == 0 else 'truncated'
+                        break
+
+                batch = pending[batch_start:batch_start + self.batch_size]
+                batch_start_time = time.monotonic()
+                batch_scores = self.model.predict(
+                    [(query, self._pair_text(results[position])) for position in batch],
+                    batch_size=len(batch),
+                    show_progress_bar=False
+                )
+                self._observe(time.monotonic() - batch_start_time)
+
+                for position, score in zip(batch, batch_scores):
+                    scores[position] = float(score)
+                    self.pair_cache.put((key, results[position]['id']), float(score))
+
+        if status == 'skipped':
+            self.skipped += 1
+        elif status == 'truncated':
+            self.truncated += 1
+
+        # Scored candidates by cross-encoder score, then the rest in their original order
+        scored = sorted(scores, key=lambda position: -scores[position])
+        unscored = [position for position in range(len(results)) if position not in scores]
+        reranked = [results[position] for position in scored + unscored]
+
+        return reranked, {
+            'status': 'cached' if results and not pending else status,
+            'scored': len(scores),
+            'cached': cached_count,
+            'candidates': len(results),
+            'ms': round((time.monotonic() - start) * 1000, 2)
+        }
+
+    def stats(self) -> dict:
+        """Configuration, budget outcomes and pair cache counters"""
+        return {
+            'model_name': self.model_name,
+            'batch_size': self.batch_size,
+            'avg_batch_ms': round(self._batch_seconds * 1000, 2) if self._batch_seconds is not None else None,
+            'requests': self.requests,
+            'truncated': self.truncated,
+            'skipped': self.skipped,
+            'pair_cache': self.pair_cache.stats()
+        }
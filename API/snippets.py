@@ -0,0 +1,102 @@
+"""
+Result payload shaping for mobile clients
+Field projection and bounded article excerpts around the best-matching sentence
+"""
+
+import re
+from typing import List, Optional
+
+ARTICLE_FIELDS = ('id', 'article_label', 'article_text', 'language', 'similarity_score', 'snippet')
+
+# Fields returned in snippet mode when no explicit projection is given
+SNIPPET_FIELDS = ('id', 'article_label', 'language', 'similarity_score', 'snippet')
+
+SENTENCE_PATTERN = re.compile(r'(?<=[.;:!?])\s+|\n+')
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def query_terms(query: str) -> set:
+    """Lowercased query words, ignoring one- and two-letter words"""
+    return {word for word in WORD_PATTERN.findall(query.lower()) if len(word) > 2}
+
+
+def best_snippet(text: str, terms: set, max_chars: int = 240) -> str:
+    """
+    Bounded excerpt of text around the sentence sharing the most query terms
+
+    Matching is lexical, so it adds no encoder work per hit. When no sentence
+    shares a term, the excerpt starts at the beginning of the text. Short
+    sentences are extended with the following ones up to max_chars; long ones
+    are cut on word boundaries around the first matching term.
+
+    Args:
+        text: Full article text
+        terms: Query terms from query_terms()
+        max_chars: Maximum excerpt length (excluding ellipses)
+
+    Returns:
+        The excerpt, with '…' marking cut text
+    """
+    if not text:
+        return ''
+    if len(text) <= max_chars:
+        return text
+
+    sentences = [s for s in SENTENCE_PATTERN.split(text) if s.strip()]
+    overlaps = [len(terms & set(WORD_PATTERN.findall(s.lower()))) for s in sentences]
+    best = max(range(len(sentences)), key=lambda i: (overlaps[i], -i)) if terms else 0
+
+    snippet = sentences[best]
+    if len(snippet) > max_chars:
+        # Center the window on the first matching term
+        lowered = snippet.lower()
+        hits = [lowered.find(term) for term in terms if term in lowered]
+        anchor = min(hits) if hits else 0
+        start = max(0, min(anchor - max_chars // 3, len(snippet) - max_chars))
+        if start > 0:
+            start = snippet.find(' ', start) + 1 or start
+        end = start + max_chars
+        if end < len(snippet):
+            space = snippet.rfind(' ', start, end)
+            end = space if space > start else end
+        excerpt = snippet[start:end].strip()
+        prefix = '…' if start > 0 or best > 0 else ''
+        suffix = '…' if end < len(snippet) or best < len(sentences) - 1 else ''
+        return f"{prefix}{excerpt}{suffix}"
+
+    # Extend with following sentences while they fit
+    last = best
+    while last + 1 < len(sentences) and len(snippet) + 1 + len(sentences[last + 1]) <= max_chars:
+        last += 1
+        snippet = f"{snippet} {sentences[last]}"
+    prefix = '…' if best > 0 else ''
+    suffix = '…' if last < len(sentences) - 1 else ''
+    return f"{prefix}{snippet}{suffix}"
+
+
+def shape_results(results: List[dict], query: str, fields: Optional[List[str]] = None, snippet: bool = False,
+                  snippet_chars: int = 240) -> List[dict]:
+    """
+    Apply field projection and snippet mode to search result dicts
+
+    Args:
+        results: Result dicts from LegalSemanticSearch
+        query: Query text used to pick the snippet sentence
+        fields: Keys to keep (None = all fields, or SNIPPET_FIELDS in snippet mode)
+        snippet: Add a 'snippet' excerpt
+        snippet_chars: Maximum snippet length
+
+    Returns:
+        New result dicts with only the selected keys
+    """
+    if fields is None and not snippet:
+        return results
+
+    keep = list(fields) if fields is not None else list(SNIPPET_FIELDS)
+    if snippet and 'snippet' not in keep:
+        keep.append('snippet')
+    if 'snippet' in keep:
+        terms = query_terms(query)
+        results = [{**result, 'snippet': best_snippet(result['article_text'], terms, snippet_chars)}
+                   for result in results]
+    return [{field: result[field] for field in keep if field in result} for result in results]
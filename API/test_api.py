@@ -1,6 +1,7 @@
 """
 Test client for Legal Semantic Search API
 Demonstrates how to use all the API endpoints
+(for latency and throughput under load see benchmarks/bench_http.py)
 """
 
 import requests
@@ -25,6 +26,19 @@ def test_health():
     
     print()
 
+def test_readiness():
+    """Test liveness and readiness probes"""
+    print("🔍 Testing liveness and readiness...")
+    live = requests.get(f"{BASE_URL}/health/live")
+    ready = requests.get(f"{BASE_URL}/health/ready")
+    
+    print(f"   Live: {live.status_code}")
+    data = ready.json()
+    print(f"   Ready: {ready.status_code} (stage: {data['startup_stage']})")
+    print(f"   Startup seconds: {data['startup_seconds']}")
+    
+    print()
+
 def test_search():
     """Test basic search endpoint"""
     print("🔍 Testing basic search...")
@@ -84,6 +98,35 @@ def test_cross_lingual_search():
     
     print()
 
+def test_batch_search():
+    """Test batch search endpoint"""
+    print("🔍 Testing batch search...")
+    
+    search_data = {
+        "queries": ["murder voluntary killing", "theft of property", "ubujura"],
+        "top_k": 2,
+        "language_filter": ["en", "fr", None],
+        "min_score": 0.3
+    }
+    
+    response = requests.post(f"{BASE_URL}/search/batch", json=search_data)
+    
+    if response.status_code == 200:
+        data = response.json()
+        print(f"✅ Batch search successful!")
+        print(f"   Queries: {data['total_queries']}")
+        print(f"   Processing time: {data['processing_time_ms']}ms")
+        
+        for item in data['results']:
+            print(f"   '{item['query']}': {item['total_results']} results")
+            for result in item['results']:
+                print(f"      Article {result['id']} ({result['language']}) - {result['similarity_score']:.4f}")
+    else:
+        print(f"❌ Batch search failed: {response.status_code}")
+        print(f"   Error: {response.text}")
+    
+    print()
+
 def test_get_translations():
     """Test translation lookup endpoint"""
     print("🔍 Testing translation lookup...")
@@ -173,6 +216,43 @@ def test_stats():
     
     print()
 
+def test_trace():
+    """Test per-request trace mode (server started with PROFILING=1)"""
+    print("🔍 Testing trace mode...")
+    
+    response = requests.post(
+        f"{BASE_URL}/search",
+        json={"query": "theft of property", "top_k": 3},
+        headers={"X-Trace": "1"}
+    )
+    
+    timing = response.headers.get("Server-Timing")
+    if timing:
+        print(f"✅ Stage breakdown:")
+        for entry in timing.split(", "):
+            print(f"   {entry}")
+    else:
+        print(f"⚠️  No Server-Timing header (start the server with PROFILING=1)")
+    
+    print()
+
+def test_metrics():
+    """Test Prometheus metrics endpoint"""
+    print("🔍 Testing metrics endpoint...")
+    
+    response = requests.get(f"{BASE_URL}/metrics")
+    
+    if response.status_code == 200:
+        stage_counts = [line for line in response.text.splitlines()
+                        if line.startswith("legal_search_stage_seconds_count")]
+        print(f"✅ Metrics retrieved successfully!")
+        for line in stage_counts:
+            print(f"   {line}")
+    else:
+        print(f"❌ Metrics failed: {response.status_code}")
+    
+    print()
+
 def run_all_tests():
     """Run all API tests"""
     print("=" * 80)
@@ -186,7 +266,8 @@ def run_all_tests():
     max_retries = 30
     for i in range(max_retries):
         try:
-            response = requests.get(f"{BASE_URL}/health", timeout=5)
+            # 503 until the encoder is loaded and warmed up
+            response = requests.get(f"{BASE_URL}/health/ready", timeout=5)
             if response.status_code == 200:
                 print("✅ API is ready!")
                 break
@@ -204,12 +285,16 @@ def run_all_tests():
     
     # Run all tests
     test_health()
+    test_readiness()
     test_search()
     test_cross_lingual_search()
+    test_batch_search()
     test_get_translations()
     test_get_article()
     test_quick_search()
     test_stats()
+    test_metrics()
+    test_trace()
     
     print("=" * 80)
     print("✅ All tests completed!")
@@ -0,0 +1,55 @@
+"""
+Smoke test for the encoder parity check
+Runs parity_check() against legal_search_model.pkl with an encoder that
+replays the reference embeddings, so no model is loaded.
+
+Usage (from the API directory):
+    python -m pytest -q test_encoder_backends.py
+"""
+
+import pickle
+
+import numpy as np
+
+from encoder_backends import parity_check
+from legal_semantic_search import article_texts
+
+MODEL_PATH = 'legal_search_model.pkl'
+
+
+class ReplayEncoder:
+    """Returns the reference embedding of each corpus text; blank rows have none"""
+
+    def __init__(self, df, embeddings):
+        self.vectors = {
+            text: vector for text, vector, language in zip(article_texts(df), embeddings, df['language'])
+            if isinstance(language, str)
+        }
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False):
+        for text in texts:
+            assert text in self.vectors, f"blank row in parity comparison: {text!r}"
+        vectors = np.array([self.vectors[text] for text in texts], dtype='float32')
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+
+def test_parity_check_skips_blank_rows():
+    with open(MODEL_PATH, 'rb') as f:
+        data = pickle.load(f)
+    df = data['df']
+    encoder = ReplayEncoder(df, np.asarray(data['embeddings'], dtype='float32'))
+
+    stats = parity_check(encoder, MODEL_PATH)
+    assert stats['rows'] == int(df['language'].notna().sum())
+    assert stats['min_cosine'] > 0.9999
+
+    sampled = parity_check(encoder, MODEL_PATH, sample=300)
+    assert sampled['rows'] == 300
+    assert sampled['min_cosine'] > 0.9999
+
+
+if __name__ == "__main__":
+    test_parity_check_skips_blank_rows()
+    print("parity check smoke test passed")
@@ -0,0 +1,38 @@
+"""
+Corpus update CLI
+Embeds only new or changed articles from a CSV, rebuilds the indexes in full
+and publishes a new index bundle
+
+Usage:
+    python update_corpus.py penal.csv --bundle-dir legal_search_bundle
+
+Running API servers pick up the new version through POST /admin/reload
+or the INDEX_WATCH_INTERVAL poller.
+"""
+
+import argparse
+
+from legal_semantic_search import LegalSemanticSearch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the legal search index from a CSV (re-embeds changed articles only)")
+    parser.add_argument('csv_path', help="Updated corpus CSV (id, article_label, article_text, language)")
+    parser.add_argument('--bundle-dir', default='legal_search_bundle', help="Index bundle to update")
+    parser.add_argument('--model-name', default='paraphrase-multilingual-mpnet-base-v2')
+    args = parser.parse_args()
+
+    search_model = LegalSemanticSearch(model_name=args.model_name)
+    search_model.load_bundle(args.bundle_dir)
+    summary = search_model.update_corpus(args.csv_path)
+    version_dir = search_model.save_bundle(args.bundle_dir) if summary['changed'] else None
+
+    print("=" * 80)
+    print(f"Published {version_dir}" if version_dir else f"Corpus unchanged; {args.bundle_dir} not updated")
+    for key, value in summary.items():
+        print(f"   {key}: {value}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()